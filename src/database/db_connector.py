@@ -1,5 +1,11 @@
 import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,12 +18,266 @@ DB_PARAMS = {
     "port": os.getenv("DB_PORT"),
 }
 
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 2))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 16))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 60))
 
-def get_db_connection():
-    """Establishes and returns a new database connection."""
+
+def create_db_connection():
+    """Establishes and returns a new, unpooled database connection."""
     try:
         conn = psycopg2.connect(**DB_PARAMS)
         return conn
     except Exception as e:
         print(f"❌ Database connection error: {e}")
         raise e
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled psycopg2 connection.
+    Behaves like the underlying connection, but close() checks it back into the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._conn, name)
+
+
+class ConnectionPool:
+    """
+    Thread-safe, blocking connection pool with health checks and usage stats.
+    Keeps at least `minconn` connections open and never more than `maxconn`.
+    """
+
+    def __init__(
+        self,
+        minconn=DB_POOL_MIN,
+        maxconn=DB_POOL_MAX,
+        timeout=DB_POOL_TIMEOUT,
+        health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+        connect=create_db_connection,
+    ):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool sizing: min={minconn}, max={maxconn}")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = []  # [(conn, last_used_monotonic)]
+        self._in_use = set()
+        self._pending = 0  # slots reserved by threads currently opening a connection
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "peak_in_use": 0,
+        }
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+        self._stats["connections_created"] = minconn
+
+    def _discard(self, conn):
+        self._stats["connections_discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _is_healthy(self, conn, last_used):
+        """Cheap check for closed connections, plus a ping if the connection sat idle too long."""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            logging.warning(f"[DB_POOL]: Health check failed, discarding connection: {e}")
+            return False
+
+    def acquire(self, timeout=None):
+        """Checks out a connection, blocking until one is available or `timeout` expires."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use.add(conn)
+                    fresh = False
+                elif self._size() < self.maxconn:
+                    # Reserve the slot, then connect outside the lock
+                    self._pending += 1
+                    fresh = True
+                else:
+                    remaining = timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolError(
+                            f"Timed out after {timeout}s waiting for a database connection"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            if fresh:
+                conn = None
+                try:
+                    conn = self._connect()
+                finally:
+                    with self._cond:
+                        self._pending -= 1
+                        if conn is not None:
+                            self._in_use.add(conn)
+                            self._stats["connections_created"] += 1
+                        self._cond.notify()
+            elif not self._is_healthy(conn, last_used):
+                with self._cond:
+                    self._in_use.discard(conn)
+                    self._discard(conn)
+                    self._cond.notify()
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["total_wait_time"] += wait_time
+                self._stats["max_wait_time"] = max(
+                    self._stats["max_wait_time"], wait_time
+                )
+                if waited:
+                    self._stats["waits"] += 1
+                self._stats["peak_in_use"] = max(
+                    self._stats["peak_in_use"], len(self._in_use)
+                )
+            return conn
+
+    def release(self, conn):
+        """Checks a connection back in, rolling back any open transaction first."""
+        healthy = not conn.closed
+        if healthy and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                healthy = False
+
+        with self._cond:
+            if conn not in self._in_use:
+                logging.warning("[DB_POOL]: Released a connection not owned by the pool.")
+                self._discard(conn)
+                return
+            self._in_use.discard(conn)
+            if self._closed or not healthy or self._size() >= self.maxconn:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Closes idle connections; in-use connections are closed as they are released."""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        """Returns a snapshot of pool sizing, utilization and wait-time statistics."""
+        with self._cond:
+            s = dict(self._stats)
+            s["in_use"] = len(self._in_use)
+            s["idle"] = len(self._idle)
+            s["size"] = self._size()
+            s["max_size"] = self.maxconn
+            s["utilization"] = len(self._in_use) / self.maxconn
+            s["avg_wait_time"] = (
+                s["total_wait_time"] / s["checkouts"] if s["checkouts"] else 0.0
+            )
+            return s
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_db_pool(minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX):
+    """Creates the process-wide connection pool (idempotent)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(minconn=minconn, maxconn=maxconn)
+            logging.info(f"[DB_POOL]: Initialized pool (min={minconn}, max={maxconn}).")
+        return _pool
+
+
+def get_db_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    return _pool or init_db_pool()
+
+
+def close_db_pool():
+    """Closes the process-wide connection pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_db_connection(timeout=None):
+    """Checks out a pooled database connection. Call close() on it to return it to the pool."""
+    pool = get_db_pool()
+    try:
+        return PooledConnection(pool, pool.acquire(timeout))
+    except Exception as e:
+        print(f"❌ Database connection error: {e}")
+        raise e
+
+
+@contextmanager
+def db_connection(timeout=None):
+    """Context manager that checks out a pooled connection and always checks it back in."""
+    conn = get_db_connection(timeout)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_pool_stats():
+    """Returns pool statistics, or None if the pool has not been created."""
+    return _pool.stats() if _pool is not None else None
@@ -141,6 +141,20 @@ def check_url_exists(url, conn):
         return None
 
 
+def check_url_id_exists(url_id, conn):
+    """
+    Check if a URL with the given ID is still in the database.
+    Return True if found, else False.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM url WHERE id = %s", (url_id,))
+            return cur.fetchone() is not None
+    except Exception as e:
+        logging.error(f"Error checking URL ID existence: {e}")
+        return False
+
+
 def update_last_crawled(url_id, conn):
     """
     Update the last_crawled timestamp of a URL to NOW().
@@ -157,7 +171,39 @@ def update_last_crawled(url_id, conn):
         logging.error(f"Error updating last_crawled: {e}")
 
 
+def mark_url_duplicate(url_id, original_id, conn):
+    """
+    Link a URL to the already processed URL whose content it nearly duplicates.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE url SET duplicate_of = %s WHERE id = %s",
+                (original_id, url_id),
+            )
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error marking URL duplicate: {e}")
+
+
 # ---------------- RESTAURANT TABLE ----------------
+# Callbacks run after a restaurant row is inserted: callback(restaurant_id, name, address)
+_restaurant_listeners = []
+
+
+def register_restaurant_listener(callback):
+    """Registers a callback that is notified whenever insert_restaurant adds a row."""
+    if callback not in _restaurant_listeners:
+        _restaurant_listeners.append(callback)
+
+
+def unregister_restaurant_listener(callback):
+    """Removes a callback registered with register_restaurant_listener."""
+    if callback in _restaurant_listeners:
+        _restaurant_listeners.remove(callback)
+
+
 def insert_restaurant(name, address, conn):
     """Insert a restaurant into the database and return its ID."""
     try:
@@ -168,12 +214,18 @@ def insert_restaurant(name, address, conn):
             )
             restaurant_id = cur.fetchone()[0]
             conn.commit()
-            return restaurant_id
     except Exception as e:
         conn.rollback()
         logging.error(f"Error inserting restaurant: {e}")
         return None
 
+    for callback in list(_restaurant_listeners):
+        try:
+            callback(restaurant_id, name, address)
+        except Exception as e:
+            logging.error(f"Error in restaurant listener: {e}")
+    return restaurant_id
+
 
 def check_restaurant_exists(name, conn):
     """Check if a restaurant exists in the database by name."""
@@ -187,6 +239,20 @@ def check_restaurant_exists(name, conn):
         return None
 
 
+def get_restaurants_after_id(last_id, conn):
+    """Return (id, name, address) for every restaurant with an ID greater than last_id, in ID order."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id, name, address FROM restaurant WHERE id > %s ORDER BY id",
+                (last_id,),
+            )
+            return cur.fetchall()
+    except Exception as e:
+        logging.error(f"Error fetching restaurants: {e}")
+        return []
+
+
 # ---------------- REFERENCE TABLE ----------------
 def insert_reference(restaurant_id, url_id, relevance_score, conn):
     """Insert a reference with a relevance score."""
@@ -282,6 +348,98 @@ def get_priority_queue_url(conn):
         return None
 
 
+def claim_priority_queue_urls(
+    worker_id, batch_size, lease_seconds, conn, per_domain_limit=None
+):
+    """
+    Atomically leases up to `batch_size` of the highest-priority URLs to `worker_id`.
+    Rows leased by other workers are skipped rather than waited on, so concurrent
+    workers get disjoint batches; expired leases (crashed workers) are claimable again.
+    With `per_domain_limit`, at most that many URLs per domain are taken from a
+    look-ahead window of the queue, so one domain can't fill the whole batch.
+    Returns [(url_id, full_url, priority)] in priority order.
+    """
+    if per_domain_limit is None:
+        claimable = """
+                    SELECT url_id
+                    FROM url_priority_queue
+                    WHERE lease_expires_at IS NULL OR lease_expires_at < NOW()
+                    ORDER BY priority DESC
+                    LIMIT %(batch_size)s
+                    FOR UPDATE SKIP LOCKED
+        """
+    else:
+        claimable = """
+                    SELECT q.url_id
+                    FROM url_priority_queue q
+                    JOIN (
+                        SELECT url_id, ROW_NUMBER() OVER (
+                            PARTITION BY domain_id ORDER BY priority DESC
+                        ) AS domain_rank
+                        FROM (
+                            SELECT q2.url_id, q2.priority, source.domain_id
+                            FROM url_priority_queue q2
+                            JOIN url ON url.id = q2.url_id
+                            JOIN source ON source.id = url.source_id
+                            WHERE q2.lease_expires_at IS NULL OR q2.lease_expires_at < NOW()
+                            ORDER BY q2.priority DESC
+                            LIMIT %(window)s
+                        ) window_rows
+                    ) ranked ON ranked.url_id = q.url_id
+                    WHERE ranked.domain_rank <= %(per_domain_limit)s
+                      AND (q.lease_expires_at IS NULL OR q.lease_expires_at < NOW())
+                    ORDER BY q.priority DESC
+                    LIMIT %(batch_size)s
+                    FOR UPDATE OF q SKIP LOCKED
+        """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                WITH claimable AS ({claimable})
+                UPDATE url_priority_queue
+                SET leased_by = %(worker_id)s,
+                    lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+                FROM claimable, url
+                WHERE url_priority_queue.url_id = claimable.url_id
+                  AND url.id = url_priority_queue.url_id
+                RETURNING url.id, url.full_url, url_priority_queue.priority
+                """,
+                {
+                    "batch_size": batch_size,
+                    "window": batch_size * 10,
+                    "per_domain_limit": per_domain_limit,
+                    "worker_id": worker_id,
+                    "lease_seconds": lease_seconds,
+                },
+            )
+            rows = cur.fetchall()
+            conn.commit()
+            return sorted(rows, key=lambda row: row[2], reverse=True)
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error claiming URLs from priority queue: {e}")
+        return []
+
+
+def release_url_lease(url_id, worker_id, conn):
+    """
+    Returns a URL leased to `worker_id` to the priority queue so any worker can
+    claim it again. A lease another worker has since reclaimed is left alone.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE url_priority_queue SET leased_by = NULL, lease_expires_at = NULL "
+                "WHERE url_id = %s AND leased_by = %s",
+                (url_id, worker_id),
+            )
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error releasing URL lease: {e}")
+
+
 def get_priority_queue_restaurant(conn):
     """Get the restaurant with the highest priority from the priority queue."""
     try:
@@ -349,12 +507,19 @@ def remove_from_restaurant_priority_queue(name, conn):
 
 
 # ---------------- CUSTOM FUNCTIONS ----------------
-def fuzzy_search_restaurant_name(search_term, conn):
-    """Calls the PostgreSQL stored function fuzzy_search_restaurant_name to find the best matching restaurant."""
+def fuzzy_search_restaurant_name(search_term, conn, threshold=None):
+    """
+    Calls the PostgreSQL stored function fuzzy_search_restaurant_name to find the best matching restaurant.
+    Only restaurants with similarity >= threshold are considered (pg_trgm.similarity_threshold if None).
+    """
     try:
         with conn.cursor() as cur:
-            query = "SELECT id, name, address, confidence FROM fuzzy_search_restaurant_name(%s)"
-            cur.execute(query, (search_term,))
+            if threshold is None:
+                query = "SELECT id, name, address, confidence FROM fuzzy_search_restaurant_name(%s)"
+                cur.execute(query, (search_term,))
+            else:
+                query = "SELECT id, name, address, confidence FROM fuzzy_search_restaurant_name(%s, %s)"
+                cur.execute(query, (search_term, threshold))
             result = cur.fetchone()
 
             if result:
@@ -368,3 +533,34 @@ def fuzzy_search_restaurant_name(search_term, conn):
     except Exception as e:
         logging.error(f"Error in fuzzy search: {e}")
         return None
+
+
+def batch_fuzzy_search_restaurant_names(search_terms, conn, threshold=None):
+    """
+    Calls the PostgreSQL stored function fuzzy_search_restaurant_names to resolve many names in one round trip.
+    Returns {search_term: {"id", "name", "address", "confidence", "exact"} or None}.
+    """
+    try:
+        with conn.cursor() as cur:
+            query = (
+                "SELECT search_term, id, name, address, confidence, exact "
+                "FROM fuzzy_search_restaurant_names(%s::text[], %s)"
+            )
+            cur.execute(query, (list(search_terms), threshold))
+            matches = {}
+            for term, r_id, name, address, confidence, exact in cur.fetchall():
+                matches[term] = (
+                    {
+                        "id": r_id,
+                        "name": name,
+                        "address": address,
+                        "confidence": confidence,
+                        "exact": exact,
+                    }
+                    if r_id is not None
+                    else None
+                )
+            return matches
+    except Exception as e:
+        logging.error(f"Error in batch fuzzy search: {e}")
+        return {}
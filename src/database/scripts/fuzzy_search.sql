@@ -1,9 +1,35 @@
 -- Enable pg_trgm extension if needed
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
--- Create function for name-only search
+-- The signature changed, so drop the old single-argument version to avoid an ambiguous overload
+DROP FUNCTION IF EXISTS fuzzy_search_restaurant_name(TEXT);
+
+-- Puts pg_trgm.similarity_threshold back after a search changed it for its own query.
+-- `previous` is NULL when pg_trgm wasn't loaded before the search, i.e. nothing had set it,
+-- so the session's reset value (the default, or the server's configured value) applies.
+CREATE OR REPLACE FUNCTION restore_similarity_threshold(previous TEXT)
+RETURNS VOID
+AS $$
+BEGIN
+    PERFORM set_config(
+        'pg_trgm.similarity_threshold',
+        COALESCE(
+            previous,
+            (SELECT s.reset_val FROM pg_settings s WHERE s.name = 'pg_trgm.similarity_threshold')
+        ),
+        true
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create function for name-only search.
+-- Candidates come from the indexed % operator (restaurant_name_trgm_idx), which keeps rows with
+-- similarity >= pg_trgm.similarity_threshold. Passing `threshold` sets it for this call only;
+-- the previous setting is restored before returning. NULL keeps the session setting (0.3 by
+-- default). The surviving rows are ordered by <-> distance, i.e. highest similarity first.
 CREATE OR REPLACE FUNCTION fuzzy_search_restaurant_name(
-    search_term TEXT
+    search_term TEXT,
+    threshold DOUBLE PRECISION DEFAULT NULL
 )
 RETURNS TABLE (
     id INT,
@@ -12,7 +38,13 @@ RETURNS TABLE (
     confidence DOUBLE PRECISION
 )
 AS $$
+DECLARE
+    previous_threshold TEXT := current_setting('pg_trgm.similarity_threshold', true);
 BEGIN
+    IF threshold IS NOT NULL THEN
+        PERFORM set_config('pg_trgm.similarity_threshold', threshold::TEXT, true);
+    END IF;
+
     RETURN QUERY
     SELECT
         r.id,
@@ -21,8 +53,76 @@ BEGIN
         CAST(similarity(r.name, search_term) AS DOUBLE PRECISION) AS confidence
     FROM
         restaurant r
+    WHERE
+        r.name % search_term
     ORDER BY
-        confidence DESC
+        r.name <-> search_term
     LIMIT 1;
+
+    IF threshold IS NOT NULL THEN
+        PERFORM restore_similarity_threshold(previous_threshold);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch version: resolves every candidate name from a page in one call.
+-- Returns one row per input term, in input order. An exact name match wins (confidence 1,
+-- exact = TRUE, the same hit check_restaurant_exists would find); otherwise the best %
+-- match as in fuzzy_search_restaurant_name. Terms with no match get NULL columns.
+CREATE OR REPLACE FUNCTION fuzzy_search_restaurant_names(
+    search_terms TEXT[],
+    threshold DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS TABLE (
+    search_term TEXT,
+    id INT,
+    name TEXT,
+    address TEXT,
+    confidence DOUBLE PRECISION,
+    exact BOOLEAN
+)
+AS $$
+DECLARE
+    previous_threshold TEXT := current_setting('pg_trgm.similarity_threshold', true);
+BEGIN
+    IF threshold IS NOT NULL THEN
+        PERFORM set_config('pg_trgm.similarity_threshold', threshold::TEXT, true);
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        t.term,
+        m.id,
+        m.name,
+        m.address,
+        m.confidence,
+        m.exact
+    FROM
+        unnest(search_terms) WITH ORDINALITY AS t(term, ord)
+    LEFT JOIN LATERAL (
+        SELECT
+            r.id,
+            r.name,
+            r.address,
+            CASE
+                WHEN r.name = t.term THEN 1.0
+                ELSE CAST(similarity(r.name, t.term) AS DOUBLE PRECISION)
+            END AS confidence,
+            r.name = t.term AS exact
+        FROM
+            restaurant r
+        WHERE
+            r.name = t.term OR r.name % t.term
+        ORDER BY
+            r.name = t.term DESC,
+            r.name <-> t.term
+        LIMIT 1
+    ) m ON TRUE
+    ORDER BY
+        t.ord;
+
+    IF threshold IS NOT NULL THEN
+        PERFORM restore_similarity_threshold(previous_threshold);
+    END IF;
 END;
 $$ LANGUAGE plpgsql;
\ No newline at end of file
@@ -29,12 +29,18 @@ CREATE TABLE restaurant (
     UNIQUE(name, address)
 );
 
+-- Trigram index so fuzzy_search_restaurant_name's % filter doesn't scan every row
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX restaurant_name_trgm_idx ON restaurant USING gin (name gin_trgm_ops);
+
 CREATE TABLE url (
     id SERIAL PRIMARY KEY,
     source_id INT REFERENCES source(id) ON DELETE CASCADE,
     full_url TEXT NOT NULL,
     first_seen TIMESTAMP DEFAULT NOW(),
     last_crawled TIMESTAMP,
+    -- Set when the page is a near-duplicate (by SimHash) of an already processed URL
+    duplicate_of INT REFERENCES url(id) ON DELETE SET NULL,
     UNIQUE(full_url)
 );
 
@@ -48,9 +54,14 @@ CREATE TABLE reference (
 
 CREATE TABLE url_priority_queue (
     url_id INT PRIMARY KEY REFERENCES url(id) ON DELETE CASCADE,
-    priority INT CHECK (priority BETWEEN 0 AND 100) DEFAULT 1
+    priority INT CHECK (priority BETWEEN 0 AND 100) DEFAULT 1,
+    leased_by TEXT,
+    lease_expires_at TIMESTAMP
 );
 
+-- Extract workers claim the top of the queue with FOR UPDATE SKIP LOCKED
+CREATE INDEX url_priority_queue_priority_idx ON url_priority_queue (priority DESC);
+
 CREATE TABLE restaurant_priority_queue (
     name TEXT PRIMARY KEY,
     priority INT CHECK (priority BETWEEN 0 AND 100)
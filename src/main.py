@@ -13,11 +13,24 @@ from queue_manager.pipeline_helpers import print_queue_contents, initialize_rest
 from pipeline.search import search_engine_search
 from pipeline.validate import validate_url
 from pipeline.extract import extract_content
-from pipeline.transform import transform_data
+from pipeline.transform import (
+    transform_batch,
+    TRANSFORM_BATCH_SIZE,
+    TRANSFORM_MAX_LATENCY_MS,
+)
+from pipeline.transform.ner_engine import warm_up_ner
+from pipeline.transform.gazetteer import load_gazetteer
+from pipeline.transform.trigram_index import load_trigram_index
+from pipeline.transform.ner_pool import (
+    NER_EXECUTION_MODE,
+    start_ner_pool,
+    shutdown_ner_pool,
+)
 from pipeline.load import load_data
 from utils.setup_logging import setup_logging
-from database.db_connector import get_db_connection
-from queue_manager.worker import worker, extract_worker
+from utils.http_client import close_http_clients
+from database.db_connector import init_db_pool, close_db_pool, db_connection
+from queue_manager.worker import worker, batch_worker, extract_worker
 
 
 def main():
@@ -25,7 +38,7 @@ def main():
     setup_logging(
         log_filename="pipeline.log", log_level=logging.INFO, log_to_console=False
     )
-    conn = get_db_connection()
+    init_db_pool()
     logging.info("[PIPELINE]: Starting multi-threaded pipeline.")
 
     queues = {
@@ -35,9 +48,17 @@ def main():
         "load_queue": load_queue,
     }
 
-    print_queue_contents(conn, queues)
+    with db_connection() as conn:
+        print_queue_contents(conn, queues)
     initialize_restaurants()
-    print_queue_contents(conn, queues)
+    with db_connection() as conn:
+        print_queue_contents(conn, queues)
+        load_gazetteer(conn)
+        load_trigram_index(conn)
+    if NER_EXECUTION_MODE == "process":
+        start_ner_pool()
+    else:
+        warm_up_ner()
 
     threads = []
     NUM_SEARCH_WORKERS = 1
@@ -76,8 +97,14 @@ def main():
 
     for i in range(NUM_TRANSFORM_WORKERS):
         t = threading.Thread(
-            target=worker,
-            args=(transform_queue, transform_data, f"TRANSFORM_WORKER_{i+1}"),
+            target=batch_worker,
+            args=(
+                transform_queue,
+                transform_batch,
+                TRANSFORM_BATCH_SIZE,
+                TRANSFORM_MAX_LATENCY_MS,
+                f"TRANSFORM_WORKER_{i+1}",
+            ),
             daemon=True,
         )
         t.start()
@@ -95,7 +122,8 @@ def main():
     try:
         while True:
             time.sleep(10)
-            print_queue_contents(conn, queues)
+            with db_connection() as conn:
+                print_queue_contents(conn, queues)
     except KeyboardInterrupt:
         logging.info("[PIPELINE]: Keyboard interrupt. Shutting down...")
         stop_event.set()
@@ -106,7 +134,9 @@ def main():
     for t in threads:
         t.join()
 
-    conn.close()
+    shutdown_ner_pool()
+    close_http_clients()
+    close_db_pool()
     logging.info("[PIPELINE]: All phases complete! Shutting down.")
 
 
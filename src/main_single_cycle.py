@@ -12,12 +12,14 @@ from pipeline.search import search_engine_search
 from pipeline.validate import validate_url
 from pipeline.extract import extract_content
 from pipeline.transform import transform_data
+from pipeline.transform.ner_engine import warm_up_ner
 from pipeline.load import load_data
 from utils.setup_logging import setup_logging
+from utils.http_client import close_http_clients
 from database.db_operations import (
     get_url_priority_queue_length,
 )
-from database.db_connector import get_db_connection
+from database.db_connector import init_db_pool, close_db_pool, get_db_connection
 from queue_manager.pipeline_helpers import print_queue_contents, initialize_restaurants
 
 load_dotenv()
@@ -58,6 +60,7 @@ def process_task(phase_name, task_queue, func):
 
 
 def main():
+    init_db_pool()
     conn = get_db_connection()
     logging.info("[PIPELINE]: Starting pipeline.")
     print_queue_contents(conn, queues)
@@ -65,6 +68,7 @@ def main():
 
     initialize_restaurants()
     print_queue_contents(conn, queues)
+    warm_up_ner()
 
     phase_flow = [
         ("Search", search_queue, search_engine_search),
@@ -83,6 +87,8 @@ def main():
         print_queue_contents(conn, queues)
 
     conn.close()
+    close_http_clients()
+    close_db_pool()
     logging.info("[PIPELINE]: All phases complete!")
 
 
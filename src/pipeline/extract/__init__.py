@@ -1,30 +1,44 @@
 import logging
-import requests
-from bs4 import BeautifulSoup
+import os
+import socket
+import threading
+import time
 from database.db_connector import get_db_connection
 from database.db_operations import (
-    get_priority_queue_url,
+    claim_priority_queue_urls,
+    release_url_lease,
     update_priority_queue_url,
+    update_last_crawled,
     remove_from_url_priority_queue,
+    mark_url_duplicate,
+    check_url_id_exists,
 )
 from queue_manager.task_queues import transform_queue
+from utils.page_analysis import analyze
+from .fetcher import fetch_many, DEFERRED, FETCH_CONCURRENCY
+from .frontier import get_frontier
+from .near_duplicates import SIMHASH_ENABLED, get_simhash_index, simhash
+from .page import PageRecord
+from .politeness import is_allowed
+from .response_cache import get_response_cache
 
 PHASE = "EXTRACT"
 
+# How long a lease lasts before another worker may reclaim the URL
+URL_LEASE_SECONDS = int(os.getenv("URL_LEASE_SECONDS", 300))
+
+
+def lease_owner():
+    """Identifies this worker thread in url_priority_queue.leased_by."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
 
 def request_url(url):
-    """Requests the URL with a user-agent, returns a Response or None."""
-    headers = {"User-Agent": "MyUserAgent/1.0 (+https://github.com/jwong236)"}
-    try:
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        return resp
-    except requests.RequestException as e:
-        logging.warning(f"[{PHASE}]: Request failed for {url}: {e}")
-        return None
+    """Requests the URL with a user-agent, returns a FetchedPage (of any status) or None."""
+    return fetch_many([url])[0]
 
 
-def handle_http_status(conn, url_id, priority, response):
+def handle_http_status(conn, url_id, priority, response, owner):
     """Handles HTTP response codes: removes, requeues, or continues processing."""
     status = response.status_code
     if status == 404:
@@ -41,62 +55,138 @@ def handle_http_status(conn, url_id, priority, response):
             f"[{PHASE}]: Temporary server error ({status}). Lowering priority to {new_priority}."
         )
         update_priority_queue_url(conn, url_id, new_priority)
+        release_url_lease(url_id, owner, conn)
         return False
     return True
 
 
+def handle_unchanged(conn, url_id, full_url):
+    """Marks a revisited page that hasn't changed as crawled, without transforming it again."""
+    logging.info(f"[{PHASE}]: Unchanged since last crawl: {full_url}")
+    update_last_crawled(url_id, conn)
+    remove_from_url_priority_queue(url_id, conn)
+
+
+def handle_duplicate(conn, url_id, original_id, full_url):
+    """Links a near-duplicate page to the URL it copies, without transforming it."""
+    logging.info(f"[{PHASE}]: Near-duplicate of URL {original_id}: {full_url}")
+    mark_url_duplicate(url_id, original_id, conn)
+    update_last_crawled(url_id, conn)
+    remove_from_url_priority_queue(url_id, conn)
+
+
 def extract_content():
     """
-    Processes a URL from the priority queue, extracts content, and enqueues for transformation.
+    Fetches URLs through the in-process frontier, extracts content, and enqueues for transformation.
+    The frontier is refilled with URLs leased from the priority queue and hands them
+    out host by host, so any number of workers can run this concurrently.
 
     Returns:
         bool: True if a URL was successfully processed, False otherwise.
     """
     conn = get_db_connection()
+    owner = lease_owner()
+    frontier = get_frontier()
+    response_cache = get_response_cache()
     processed_count = 0
 
     try:
         logging.info(f"[{PHASE}]: Starting processing.")
 
         while True:
-            # 1) Get the highest priority URL
-            result = get_priority_queue_url(conn)
-            if not result:
-                logging.info(f"[{PHASE}]: No URLs in priority queue. Exiting.")
-                break
-
-            url_id, full_url, priority = result
-            logging.info(f"[{PHASE}]: Processing URL: {full_url}")
-
-            # 2) Request the page
-            resp = request_url(full_url)
-            if not resp:
-                logging.info(
-                    f"[{PHASE}]: Request failed, removing {url_id} from queue."
+            # 1) Top up the frontier with the highest priority URLs
+            if frontier.needs_refill():
+                batch = claim_priority_queue_urls(
+                    owner,
+                    frontier.refill_size(),
+                    URL_LEASE_SECONDS,
+                    conn,
+                    per_domain_limit=frontier.host_backlog,
                 )
-                remove_from_url_priority_queue(url_id, conn)
-                continue
 
-            # 3) Handle HTTP status
-            if not handle_http_status(conn, url_id, priority, resp):
+                # 2) Drop URLs robots.txt has disallowed since they were queued
+                allowed = []
+                for url_id, full_url, priority in batch:
+                    if is_allowed(full_url):
+                        allowed.append((url_id, full_url, priority))
+                    else:
+                        logging.info(f"[{PHASE}]: Disallowed by robots.txt: {full_url}")
+                        remove_from_url_priority_queue(url_id, conn)
+                frontier.add_many(allowed)
+
+            # 3) Take a round of URLs whose hosts are ready
+            ready, stale = frontier.take(FETCH_CONCURRENCY)
+            if stale:
+                # Another worker may have reclaimed these; their expired leases just lapse
+                logging.info(f"[{PHASE}]: Dropped {len(stale)} URLs held past their lease.")
+            if not ready:
+                wait = frontier.seconds_until_ready()
+                if wait is None:
+                    logging.info(f"[{PHASE}]: No unleased URLs in priority queue. Exiting.")
+                    break
+                time.sleep(min(max(wait, 0.05), 1.0))
                 continue
 
-            # 4) Parse HTML
-            soup = BeautifulSoup(resp.text, "html.parser")
-            if not soup or not soup.body or len(soup.get_text(strip=True)) < 10:
-                logging.info(f"[{PHASE}]: Skipping {full_url} (No meaningful content).")
+            # 4) Request every page in the round concurrently
+            responses = fetch_many([entry.url for entry in ready])
+
+            for (url_id, full_url, priority, _), resp in zip(ready, responses):
+                if resp is DEFERRED:
+                    # Host is busy for too long; let a later claim pick it up
+                    release_url_lease(url_id, owner, conn)
+                    continue
+                logging.info(f"[{PHASE}]: Processing URL: {full_url}")
+                if resp is None:
+                    logging.info(
+                        f"[{PHASE}]: Request failed, removing {url_id} from queue."
+                    )
+                    remove_from_url_priority_queue(url_id, conn)
+                    continue
+
+                # 5) Handle HTTP status; skip pages that haven't changed since the last visit
+                if resp.status_code == 304:
+                    response_cache.not_modified(full_url)
+                    handle_unchanged(conn, url_id, full_url)
+                    continue
+                if not handle_http_status(conn, url_id, priority, resp, owner):
+                    continue
+                if not response_cache.store(full_url, resp):
+                    handle_unchanged(conn, url_id, full_url)
+                    continue
+
+                # 6) Parse HTML once; transform works from the analysis
+                analysis = analyze(resp.content, full_url, resp.encoding)
+                if len(analysis.text) < 10:
+                    logging.info(
+                        f"[{PHASE}]: Skipping {full_url} (No meaningful content)."
+                    )
+                    remove_from_url_priority_queue(url_id, conn)
+                    continue
+
+                # 7) Near-duplicates of a processed page are linked, not transformed
+                if SIMHASH_ENABLED:
+                    text = analysis.main_text or analysis.text
+                    index = get_simhash_index()
+                    original_id = index.check(text, url_id)
+                    if original_id is not None:
+                        if check_url_id_exists(original_id, conn):
+                            handle_duplicate(conn, url_id, original_id, full_url)
+                            continue
+                        # Indexed before the URL table was rebuilt: this page takes its place
+                        logging.info(
+                            f"[{PHASE}]: URL {original_id} no longer exists; transforming {full_url}."
+                        )
+                        index.add(simhash(text), url_id)
+
+                # 8) Remove from priority queue
                 remove_from_url_priority_queue(url_id, conn)
-                continue
 
-            # 5) Remove from priority queue
-            remove_from_url_priority_queue(url_id, conn)
-
-            # 6) Enqueue to transformation phase
-            transform_queue.put((full_url, priority, soup))
-            logging.info(
-                f"[{PHASE}]: Successfully extracted content from {full_url}. Enqueued for transformation."
-            )
-            processed_count += 1
+                # 9) Enqueue the compressed analysis
+                transform_queue.put(PageRecord.pack(full_url, priority, analysis))
+                logging.info(
+                    f"[{PHASE}]: Successfully extracted content from {full_url}. Enqueued for transformation."
+                )
+                processed_count += 1
 
         logging.info(f"[{PHASE}]: Completed. Processed {processed_count} URLs.")
         print(f"[{PHASE}]: Completed. Processed {processed_count} URLs.")
@@ -0,0 +1,181 @@
+# ./src/pipeline/extract/fetcher.py
+import asyncio
+import logging
+import os
+import time
+from urllib.parse import urlparse
+import httpx
+from utils.http_client import create_async_client, get_async_client_loop
+from .page import FetchedPage, is_html
+from .politeness import USER_AGENT, get_host_scheduler
+from .response_cache import get_response_cache
+
+PHASE = "FETCHER"
+
+# Requests in flight across all hosts, and per host
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 100))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", 4))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", 10))
+# URLs whose host can't be fetched politely within this many seconds are handed back
+FETCH_MAX_HOST_WAIT = float(os.getenv("FETCH_MAX_HOST_WAIT", 60))
+# Bodies (after decompression) larger than this are abandoned mid-download
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", 5 * 1024 * 1024))
+
+# Returned instead of a response for URLs deferred by the host scheduler
+DEFERRED = "DEFERRED"
+
+
+class AsyncFetcher:
+    """
+    Fetches many URLs concurrently on one event loop. A global semaphore caps the
+    number of requests in flight and a semaphore per host caps how many of them
+    hit the same server. With a scheduler, each request also waits for its host's
+    next polite slot (without holding either semaphore). Pages are returned
+    whatever their status code, so the caller can still route them through
+    handle_http_status.
+
+    Bodies are streamed: a successful response that isn't HTML, or whose body
+    exceeds `max_bytes`, is abandoned as soon as its headers (or the first
+    chunk over the limit) arrive, and counts as a failed request.
+
+    Given a `client_loop` (utils.http_client.AsyncClientLoop), batches run on its
+    long-lived per-host clients so keep-alive and HTTP/2 connections are reused
+    across batches and workers; otherwise each batch opens its own client.
+
+    `request_headers(url)`, if given, returns extra headers for a URL, e.g. the
+    conditional headers of a revisit.
+    """
+
+    def __init__(
+        self,
+        concurrency=FETCH_CONCURRENCY,
+        per_host=FETCH_PER_HOST,
+        timeout=FETCH_TIMEOUT,
+        scheduler=None,
+        max_host_wait=FETCH_MAX_HOST_WAIT,
+        client_loop=None,
+        transport=None,
+        request_headers=None,
+        max_bytes=FETCH_MAX_BYTES,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.max_host_wait = max_host_wait
+        self.client_loop = client_loop
+        self._transport = transport
+        self._request_headers = request_headers
+        self.max_bytes = max_bytes
+        self._stats = {"too_large": 0, "not_html": 0, "bytes_downloaded": 0}
+
+    async def _download(self, url, response):
+        """Reads `response` into a FetchedPage, or returns None to abandon it."""
+        content_type = response.headers.get("Content-Type")
+        if response.is_success and not is_html(content_type):
+            self._stats["not_html"] += 1
+            logging.info(f"[{PHASE}]: Skipping {url} (Content-Type {content_type}).")
+            return None
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            self._stats["too_large"] += 1
+            logging.info(f"[{PHASE}]: Skipping {url} (Content-Length {length}).")
+            return None
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                self._stats["too_large"] += 1
+                logging.info(
+                    f"[{PHASE}]: Aborted {url} after {size} bytes (limit {self.max_bytes})."
+                )
+                return None
+            chunks.append(chunk)
+        self._stats["bytes_downloaded"] += size
+        return FetchedPage(
+            str(response.url), response.status_code, response.headers, b"".join(chunks)
+        )
+
+    async def _fetch(self, stream, url, in_flight, hosts):
+        if self.scheduler is not None:
+            # reserve() may fetch robots.txt for a new host, so keep it off the event loop
+            wait = await asyncio.to_thread(
+                self.scheduler.reserve, url, self.max_host_wait
+            )
+            if wait is None:
+                return DEFERRED
+            await asyncio.sleep(wait)
+        host = urlparse(url).netloc
+        if host not in hosts:
+            hosts[host] = asyncio.Semaphore(self.per_host)
+        headers = {"User-Agent": USER_AGENT}
+        if self._request_headers is not None:
+            headers.update(self._request_headers(url))
+        async with in_flight, hosts[host]:
+            try:
+                async with stream(
+                    "GET", url, headers=headers, timeout=self.timeout
+                ) as response:
+                    return await self._download(url, response)
+            except (httpx.HTTPError, httpx.InvalidURL) as e:
+                logging.warning(f"[{PHASE}]: Request failed for {url}: {e}")
+                return None
+
+    async def fetch_all(self, urls):
+        """
+        Fetches `urls` concurrently; returns one FetchedPage per URL, in order.
+        None marks a failed request and DEFERRED a URL the scheduler pushed back.
+        """
+        in_flight = asyncio.Semaphore(self.concurrency)
+        hosts = {}
+        if self.client_loop is not None:
+            return await asyncio.gather(
+                *(self._fetch(self.client_loop.stream, url, in_flight, hosts) for url in urls)
+            )
+        async with create_async_client(transport=self._transport) as client:
+            return await asyncio.gather(
+                *(self._fetch(client.stream, url, in_flight, hosts) for url in urls)
+            )
+
+    def fetch_many(self, urls):
+        """Blocking wrapper around fetch_all for synchronous callers such as extract workers."""
+        if not urls:
+            return []
+        start = time.perf_counter()
+        if self.client_loop is not None:
+            responses = self.client_loop.run(self.fetch_all(urls))
+        else:
+            responses = asyncio.run(self.fetch_all(urls))
+        elapsed = time.perf_counter() - start
+        fetched = sum(r is not None and r is not DEFERRED for r in responses)
+        logging.info(
+            f"[{PHASE}]: Fetched {fetched}/{len(urls)} "
+            f"pages in {elapsed:.2f}s ({len(urls) / elapsed if elapsed else 0:.1f} pages/s)."
+        )
+        return responses
+
+    def stats(self):
+        return dict(self._stats)
+
+
+_fetcher = None
+
+
+def fetch_many(urls):
+    """
+    Fetches `urls` with the process-wide fetcher, paced by the shared host scheduler
+    and revalidating pages already in the response cache.
+    """
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = AsyncFetcher(
+            scheduler=get_host_scheduler(),
+            client_loop=get_async_client_loop(),
+            request_headers=get_response_cache().conditional_headers,
+        )
+    return _fetcher.fetch_many(urls)
+
+
+def get_fetch_stats():
+    """Pages abandoned as too large or not HTML, and bytes downloaded, by the shared fetcher."""
+    return _fetcher.stats() if _fetcher is not None else {}
@@ -0,0 +1,171 @@
+# ./src/pipeline/extract/frontier.py
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from .fetcher import FETCH_CONCURRENCY
+from .politeness import host_of, get_host_scheduler
+
+PHASE = "FRONTIER"
+
+# Number of priority buckets (front queues) over the 0-100 priority range
+FRONTIER_PRIORITY_LEVELS = int(os.getenv("FRONTIER_PRIORITY_LEVELS", 10))
+# URLs held in memory; the frontier is topped up from url_priority_queue when it
+# falls below FETCH_CONCURRENCY, so the fetcher always has a full round available
+FRONTIER_CAPACITY = int(os.getenv("FRONTIER_CAPACITY", 2 * FETCH_CONCURRENCY))
+# Most URLs a single host may hold in its back queue; the rest wait in the front queues
+FRONTIER_HOST_BACKLOG = int(os.getenv("FRONTIER_HOST_BACKLOG", 8))
+# URLs held longer than this are dropped rather than fetched; keep it below
+# URL_LEASE_SECONDS so nothing is fetched after another worker could reclaim it
+FRONTIER_MAX_AGE = float(os.getenv("FRONTIER_MAX_AGE", 240))
+
+FrontierEntry = namedtuple("FrontierEntry", ["url_id", "url", "priority", "added_at"])
+
+
+class Frontier:
+    """
+    Two-level crawl frontier in front of url_priority_queue.
+
+    Front queues bucket URLs by priority. URLs are routed, highest bucket first,
+    into one back queue per host, each holding at most `host_backlog` URLs. A heap
+    orders hosts by the time they may next be fetched (ties broken by the priority
+    of the host's next URL), so take() hands out the best URL of every host that is
+    ready instead of draining one busy host.
+    """
+
+    def __init__(
+        self,
+        capacity=FRONTIER_CAPACITY,
+        levels=FRONTIER_PRIORITY_LEVELS,
+        host_backlog=FRONTIER_HOST_BACKLOG,
+        low_watermark=FETCH_CONCURRENCY,
+        delay_for=None,
+        max_age=FRONTIER_MAX_AGE,
+        clock=time.monotonic,
+    ):
+        self.capacity = capacity
+        self.levels = levels
+        self.host_backlog = host_backlog
+        self.low_watermark = min(low_watermark, capacity)
+        self.max_age = max_age
+        self._delay_for = delay_for or (lambda url: 0.0)
+        self._clock = clock
+        self._front = [deque() for _ in range(levels)]
+        self._back = {}  # host -> deque of FrontierEntry
+        self._heap = []  # (ready_at, -priority, seq, host)
+        self._next_allowed = {}  # host -> earliest next fetch, for hosts without a back queue
+        self._seq = itertools.count()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def _level(self, priority):
+        return min(self.levels - 1, max(0, int(priority * self.levels / 101)))
+
+    def needs_refill(self):
+        return self._size < self.low_watermark
+
+    def refill_size(self):
+        """How many URLs to claim from the table to fill the frontier back up."""
+        return max(0, self.capacity - self._size)
+
+    def add_many(self, rows):
+        """Adds claimed (url_id, full_url, priority) rows to the front queues."""
+        now = self._clock()
+        with self._lock:
+            for url_id, url, priority in rows:
+                entry = FrontierEntry(url_id, url, priority, now)
+                self._front[self._level(priority)].append(entry)
+                self._size += 1
+            self._route(now)
+
+    def _schedule(self, host, ready_at):
+        head = self._back[host][0]
+        heapq.heappush(self._heap, (ready_at, -head.priority, next(self._seq), host))
+
+    def _route(self, now):
+        """Moves URLs from the front queues into per-host back queues, best bucket first."""
+        for bucket in reversed(self._front):
+            kept = deque()
+            while bucket:
+                entry = bucket.popleft()
+                host = host_of(entry.url)
+                queue = self._back.get(host)
+                if queue is None:
+                    self._back[host] = deque([entry])
+                    self._schedule(host, max(now, self._next_allowed.pop(host, now)))
+                elif len(queue) < self.host_backlog:
+                    queue.append(entry)
+                else:
+                    kept.append(entry)
+            bucket.extend(kept)
+
+    def take(self, n):
+        """
+        Returns up to `n` URLs whose hosts are ready now; a host is rescheduled
+        after each URL it hands out, so one call takes one URL per host whenever
+        the host has a politeness delay. URLs held longer than `max_age` (their
+        lease may have been reclaimed) are dropped and returned separately as
+        `stale`.
+        """
+        now = self._clock()
+        ready, stale = [], []
+        with self._lock:
+            while self._heap and len(ready) < n and self._heap[0][0] <= now:
+                _, _, _, host = heapq.heappop(self._heap)
+                queue = self._back[host]
+                entry = queue.popleft()
+                self._size -= 1
+                if self.max_age is not None and now - entry.added_at > self.max_age:
+                    stale.append(entry)
+                    ready_at = now
+                else:
+                    ready.append(entry)
+                    ready_at = now + self._delay_for(entry.url)
+                if queue:
+                    self._schedule(host, ready_at)
+                else:
+                    del self._back[host]
+                    self._next_allowed[host] = ready_at
+                    # Let the host's overflow (or another host) take the freed back queue
+                    self._route(now)
+            self._route(now)
+            # Hosts that are already allowed again don't need remembering
+            if len(self._next_allowed) > self.capacity:
+                self._next_allowed = {
+                    h: t for h, t in self._next_allowed.items() if t > now
+                }
+        return ready, stale
+
+    def seconds_until_ready(self):
+        """Time until the next host becomes ready, or None if the frontier is empty."""
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self._clock())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self._size,
+                "hosts": len(self._back),
+                "front": [len(bucket) for bucket in self._front],
+            }
+
+
+_frontier = None
+_frontier_lock = threading.Lock()
+
+
+def get_frontier():
+    """Returns the process-wide frontier, shared by every extract worker."""
+    global _frontier
+    if _frontier is None:
+        with _frontier_lock:
+            if _frontier is None:
+                _frontier = Frontier(delay_for=get_host_scheduler().delay_for)
+    return _frontier
@@ -0,0 +1,189 @@
+# ./src/pipeline/extract/near_duplicates.py
+import hashlib
+import logging
+import os
+import re
+import threading
+from array import array
+
+PHASE = "NEAR_DUPLICATES"
+
+SIMHASH_ENABLED = os.getenv("SIMHASH_ENABLED", "true").lower() == "true"
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+SIMHASH_INDEX_PATH = os.getenv(
+    "SIMHASH_INDEX_PATH", os.path.join(DATA_DIR, "simhash_index.bin")
+)
+# Pages whose fingerprints differ in at most this many bits are near-duplicates.
+# With SIMHASH_BANDS bands, any pair within SIMHASH_BANDS - 1 bits shares a band,
+# so lookups are exact up to 3; above that some near-duplicates go unnoticed
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", 3))
+# Shorter texts have too few shingles for a stable fingerprint
+SIMHASH_MIN_WORDS = int(os.getenv("SIMHASH_MIN_WORDS", 50))
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE_SIZE = 3
+
+_WORD = re.compile(r"\w+")
+
+
+def _hash64(shingle):
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def simhash(text, min_words=SIMHASH_MIN_WORDS):
+    """
+    64-bit SimHash of `text` over overlapping three-word shingles, or None if
+    the text has fewer than `min_words` words.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < max(min_words, SHINGLE_SIZE):
+        return None
+    hashes = [
+        _hash64(" ".join(words[i : i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    ]
+    # Every hash as 64 binary digits back to back: digit i of each is a strided slice
+    digits = "".join(f"{h:064b}" for h in hashes)
+    half = len(hashes) / 2
+    fingerprint = 0
+    for i in range(SIMHASH_BITS):
+        if digits[i::SIMHASH_BITS].count("1") > half:
+            fingerprint |= 1 << (SIMHASH_BITS - 1 - i)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+
+def _bands(fingerprint):
+    return [
+        (fingerprint >> (band * BAND_BITS)) & BAND_MASK for band in range(SIMHASH_BANDS)
+    ]
+
+
+class SimHashIndex:
+    """
+    Banded LSH index of page fingerprints. Entries live in flat arrays: the
+    fingerprints and URL IDs, and per band a bucket head for each of the 2**16
+    band values plus a next-entry link, so an entry costs 32 bytes. Each entry
+    is appended to a file as it is added and replayed on startup.
+    """
+
+    def __init__(self, path=SIMHASH_INDEX_PATH, max_distance=SIMHASH_MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self.fingerprints = array("Q")
+        self.url_ids = array("Q")
+        self._heads = [
+            array("i", [-1]) * (1 << BAND_BITS) for _ in range(SIMHASH_BANDS)
+        ]
+        self._next = [array("i") for _ in range(SIMHASH_BANDS)]
+        self._lock = threading.Lock()
+        self._stats = {"pages": 0, "short": 0, "duplicates": 0}
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path):
+                self._replay()
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def _replay(self):
+        entries = array("Q")
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # A write cut short by a crash leaves a partial entry at the end
+        entries.frombytes(data[: len(data) - len(data) % (2 * entries.itemsize)])
+        for fingerprint, url_id in zip(entries[0::2], entries[1::2]):
+            self._insert(fingerprint, url_id)
+        logging.info(f"[{PHASE}]: Loaded {len(self)} fingerprints from {self.path}.")
+
+    def _insert(self, fingerprint, url_id):
+        position = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        self.url_ids.append(url_id)
+        for band, value in enumerate(_bands(fingerprint)):
+            self._next[band].append(self._heads[band][value])
+            self._heads[band][value] = position
+
+    def _add(self, fingerprint, url_id):
+        self._insert(fingerprint, url_id)
+        if self.path:
+            with open(self.path, "ab") as f:
+                array("Q", [fingerprint, url_id]).tofile(f)
+
+    def _matches(self, fingerprint):
+        # URL IDs of the entries sharing a band with `fingerprint` and within max_distance
+        matches, seen = [], set()
+        for band, value in enumerate(_bands(fingerprint)):
+            position = self._heads[band][value]
+            while position != -1:
+                if position not in seen:
+                    seen.add(position)
+                    fingerprint_b = self.fingerprints[position]
+                    if hamming_distance(fingerprint, fingerprint_b) <= self.max_distance:
+                        matches.append(self.url_ids[position])
+                position = self._next[band][position]
+        return matches
+
+    def find(self, fingerprint, exclude=None):
+        """Returns the URL ID of an indexed page near `fingerprint`, other than `exclude`, or None."""
+        with self._lock:
+            return next((u for u in self._matches(fingerprint) if u != exclude), None)
+
+    def add(self, fingerprint, url_id):
+        """Indexes a processed page and appends it to the index file."""
+        with self._lock:
+            self._add(fingerprint, url_id)
+
+    def check(self, text, url_id):
+        """
+        Fingerprints a page's text: returns the URL ID of another page it nearly
+        duplicates, or indexes it (unless a revisit already is) and returns None.
+        """
+        fingerprint = simhash(text)
+        with self._lock:
+            self._stats["pages"] += 1
+            if fingerprint is None:
+                self._stats["short"] += 1
+                return None
+            matches = self._matches(fingerprint)
+            original = next((u for u in matches if u != url_id), None)
+            if original is not None:
+                self._stats["duplicates"] += 1
+                return original
+            if url_id not in matches:
+                self._add(fingerprint, url_id)
+        return None
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["indexed"] = len(self.fingerprints)
+        s["duplicate_rate"] = s["duplicates"] / s["pages"] if s["pages"] else 0.0
+        return s
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_simhash_index():
+    """Returns the process-wide fingerprint index, replaying its file on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimHashIndex()
+    return _index
+
+
+def get_simhash_stats():
+    """Stats of the fingerprint index, or {} if this process hasn't opened it."""
+    return _index.stats() if _index is not None else {}
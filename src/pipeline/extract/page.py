@@ -0,0 +1,110 @@
+# ./src/pipeline/extract/page.py
+import codecs
+import pickle
+import re
+import zlib
+from collections import namedtuple
+
+# Media types worth parsing; a response without a Content-Type is sniffed by the parser
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Where HTML must declare its charset (the HTML spec's prescan window)
+META_SNIFF_BYTES = 1024
+_META_CHARSET = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE
+)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+def media_type(content_type):
+    """'text/html; charset=utf-8' -> 'text/html'."""
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def is_html(content_type):
+    return not content_type or media_type(content_type) in HTML_CONTENT_TYPES
+
+
+def _known(name):
+    try:
+        return codecs.lookup(name.decode("ascii") if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+def detect_encoding(content, content_type=None):
+    """
+    Picks the encoding of an HTML body from its bytes: BOM, then the
+    Content-Type charset, then a <meta charset> in the first kilobyte, then
+    UTF-8 if the body decodes as UTF-8, else windows-1252 (the web's default).
+    """
+    for bom, name in _BOMS:
+        if content.startswith(bom):
+            return name
+    if content_type and "charset=" in content_type.lower():
+        charset = content_type.lower().split("charset=", 1)[1].split(";")[0]
+        name = _known(charset.strip().strip("\"'"))
+        if name:
+            return name
+    match = _META_CHARSET.search(content[:META_SNIFF_BYTES])
+    if match:
+        name = _known(match.group(1))
+        if name:
+            return name
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+class FetchedPage:
+    """
+    A downloaded page: status, headers and the raw body. The body is decoded
+    lazily, with the encoding picked by detect_encoding.
+    """
+
+    def __init__(self, url, status_code, headers, content=b""):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self._encoding = None
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = detect_encoding(
+                self.content, self.headers.get("Content-Type")
+            )
+        return self._encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class PageRecord(namedtuple("PageRecord", ["url", "priority", "data"])):
+    """
+    What extract hands to transform: the page's PageAnalysis, pickled and
+    zlib-compressed. A few KB per page rather than a parse tree, and picklable,
+    so it can cross a process boundary; transform unpacks it on demand.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def pack(cls, url, priority, analysis):
+        data = zlib.compress(pickle.dumps(analysis, protocol=pickle.HIGHEST_PROTOCOL))
+        return cls(url, priority, data)
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+    def analysis(self):
+        return pickle.loads(zlib.decompress(self.data))
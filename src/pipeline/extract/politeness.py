@@ -0,0 +1,187 @@
+# ./src/pipeline/extract/politeness.py
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import httpx
+from utils.http_client import get_http_client
+from utils.ttl_cache import TTLCache, MISSING
+
+PHASE = "POLITENESS"
+
+# Sent with every request, and the agent robots.txt rules are matched against
+USER_AGENT = "MyUserAgent/1.0 (+https://github.com/jwong236)"
+
+# Minimum gap between two requests to the same host, unless robots.txt asks for more
+MIN_HOST_DELAY = float(os.getenv("MIN_HOST_DELAY", 1.0))
+# Crawl-delay values above this are capped rather than stalling a host for minutes
+MAX_CRAWL_DELAY = float(os.getenv("MAX_CRAWL_DELAY", 30))
+ROBOTS_CACHE_SIZE = int(os.getenv("ROBOTS_CACHE_SIZE", 10000))
+ROBOTS_CACHE_TTL = float(os.getenv("ROBOTS_CACHE_TTL", 24 * 3600))
+# robots.txt that could not be fetched (timeouts, 5xx) is retried sooner
+ROBOTS_RETRY_TTL = float(os.getenv("ROBOTS_RETRY_TTL", 300))
+ROBOTS_TIMEOUT = float(os.getenv("ROBOTS_TIMEOUT", 5))
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class RobotsCache:
+    """
+    robots.txt rules per host, fetched and parsed once and kept for a TTL.
+    Shared by every worker thread in the process; concurrent lookups for the same
+    host wait for a single fetch.
+    """
+
+    def __init__(
+        self,
+        maxsize=ROBOTS_CACHE_SIZE,
+        ttl=ROBOTS_CACHE_TTL,
+        retry_ttl=ROBOTS_RETRY_TTL,
+        fetch=None,
+    ):
+        self._cache = TTLCache(maxsize, ttl=ttl)
+        self.retry_ttl = retry_ttl
+        self._fetch = fetch or self._fetch_robots
+        self._host_locks = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def _fetch_robots(robots_url):
+        """Returns (status_code, body), or (None, None) if the request failed."""
+        try:
+            resp = get_http_client().get(
+                robots_url, headers={"User-Agent": USER_AGENT}, timeout=ROBOTS_TIMEOUT
+            )
+            return resp.status_code, resp.text
+        except httpx.HTTPError as e:
+            logging.warning(f"[{PHASE}]: Could not fetch {robots_url}: {e}")
+            return None, None
+
+    def _load(self, scheme, host):
+        robots_url = f"{scheme}://{host}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        status, body = self._fetch(robots_url)
+        ttl = None
+        if status == 200:
+            parser.parse(body.splitlines())
+        elif status in (401, 403):
+            parser.disallow_all = True
+        elif status is not None and 400 <= status < 500:
+            parser.allow_all = True
+        else:
+            # Unreachable or 5xx: don't drop the host's URLs, but ask again soon
+            parser.allow_all = True
+            ttl = self.retry_ttl
+        parser.modified()
+        return parser, ttl
+
+    def get(self, url):
+        """Returns the parsed robots.txt for `url`'s host."""
+        p = urlparse(url)
+        host = p.netloc.lower()
+        parser = self._cache.get(host)
+        if parser is not MISSING:
+            return parser
+        with self._locks_lock:
+            lock = self._host_locks.setdefault(host, threading.Lock())
+        with lock:
+            parser = self._cache.get(host)
+            if parser is MISSING:
+                parser, ttl = self._load(p.scheme or "https", host)
+                self._cache.set(host, parser, ttl=ttl)
+        with self._locks_lock:
+            self._host_locks.pop(host, None)
+        return parser
+
+    def can_fetch(self, url):
+        return self.get(url).can_fetch(USER_AGENT, url)
+
+    def crawl_delay(self, url):
+        """The host's Crawl-delay (or request-rate equivalent) in seconds, or None."""
+        parser = self.get(url)
+        delay = parser.crawl_delay(USER_AGENT)
+        if delay is None:
+            rate = parser.request_rate(USER_AGENT)
+            if rate and rate.requests:
+                delay = rate.seconds / rate.requests
+        return float(delay) if delay is not None else None
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class HostScheduler:
+    """
+    Spaces out requests to the same host. reserve() books the next free slot for
+    the URL's host and returns how long the caller must wait for it, so concurrent
+    fetches (from any thread or event loop) to one host are serialized at
+    max(MIN_HOST_DELAY, Crawl-delay) apart while other hosts proceed freely.
+    """
+
+    def __init__(
+        self,
+        robots=None,
+        min_delay=MIN_HOST_DELAY,
+        max_delay=MAX_CRAWL_DELAY,
+        clock=time.monotonic,
+    ):
+        self.robots = robots
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._next_slot = {}  # host -> earliest time the next request may start
+        self._lock = threading.Lock()
+
+    def delay_for(self, url):
+        delay = self.robots.crawl_delay(url) if self.robots else None
+        return min(max(self.min_delay, delay or 0.0), self.max_delay)
+
+    def reserve(self, url, max_wait=None):
+        """
+        Books the host's next request slot; returns seconds to wait until it.
+        Returns None without booking if the slot is more than `max_wait` seconds away.
+        """
+        host = host_of(url)
+        delay = self.delay_for(url)
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot.get(host, now))
+            if max_wait is not None and slot - now > max_wait:
+                return None
+            self._next_slot[host] = slot + delay
+        return slot - now
+
+
+_robots = None
+_scheduler = None
+_politeness_lock = threading.Lock()
+
+
+def get_robots_cache():
+    """Returns the process-wide robots.txt cache."""
+    global _robots
+    if _robots is None:
+        with _politeness_lock:
+            if _robots is None:
+                _robots = RobotsCache()
+    return _robots
+
+
+def get_host_scheduler():
+    """Returns the process-wide host scheduler, shared by every extract worker."""
+    global _scheduler
+    if _scheduler is None:
+        robots = get_robots_cache()
+        with _politeness_lock:
+            if _scheduler is None:
+                _scheduler = HostScheduler(robots)
+    return _scheduler
+
+
+def is_allowed(url):
+    """True if robots.txt lets us fetch `url`."""
+    return get_robots_cache().can_fetch(url)
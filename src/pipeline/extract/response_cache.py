@@ -0,0 +1,148 @@
+# ./src/pipeline/extract/response_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+PHASE = "RESPONSE_CACHE"
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+RESPONSE_CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH", os.path.join(DATA_DIR, "response_cache.sqlite3")
+)
+
+
+class ResponseCache:
+    """
+    On-disk store of HTTP validators per URL (ETag, Last-Modified, a hash and the
+    size of the last body). Revisits send If-None-Match/If-Modified-Since; a 304,
+    or a 200 whose body hashes the same as last time, means the page is unchanged
+    and can skip parsing and transform.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                content_length INTEGER,
+                fetched_at REAL
+            )
+            """
+        )
+        self._db.commit()
+        self._stats = {
+            "conditional_requests": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "changed": 0,
+            "bytes_saved": 0,
+        }
+
+    def _row(self, url):
+        with self._lock:
+            return self._db.execute(
+                "SELECT etag, last_modified, content_hash, content_length "
+                "FROM validators WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match/If-Modified-Since headers for a revisit of `url`, or {}."""
+        row = self._row(url)
+        if not row:
+            return {}
+        etag, last_modified, _, _ = row
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        if headers:
+            with self._lock:
+                self._stats["conditional_requests"] += 1
+        return headers
+
+    def not_modified(self, url):
+        """Records a 304 for `url`; the cached body size counts as bandwidth saved."""
+        row = self._row(url)
+        with self._lock:
+            self._stats["not_modified"] += 1
+            self._stats["bytes_saved"] += (row[3] or 0) if row else 0
+            self._db.execute(
+                "UPDATE validators SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self._db.commit()
+
+    def store(self, url, response):
+        """
+        Saves the validators of a 200 response for `url`.
+        Returns False if the body is identical to the last one fetched.
+        """
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        row = self._row(url)
+        changed = not row or row[2] != content_hash
+        with self._lock:
+            self._stats["changed" if changed else "unchanged"] += 1
+            self._db.execute(
+                """
+                INSERT INTO validators
+                    (url, etag, last_modified, content_hash, content_length, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    content_length = excluded.content_length,
+                    fetched_at = excluded.fetched_at
+                """,
+                (
+                    url,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    content_hash,
+                    len(response.content),
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+        return changed
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["transforms_skipped"] = s["not_modified"] + s["unchanged"]
+        return s
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide response cache, opening the on-disk store on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+                logging.info(f"[{PHASE}]: Opened {_cache.path}.")
+    return _cache
+
+
+def get_response_cache_stats():
+    """The shared response cache's stats, or {} if this process hasn't opened it."""
+    return _cache.stats() if _cache is not None else {}
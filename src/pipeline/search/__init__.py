@@ -1,9 +1,10 @@
 import logging
 import os
 import time
-import requests
+import httpx
 from dotenv import load_dotenv
 from queue_manager.task_queues import validate_queue
+from utils.http_client import get_http_client
 
 load_dotenv()
 BRAVE_API_KEY = os.getenv("BRAVE_API_KEY")
@@ -18,9 +19,9 @@ def search_engine_search(restaurant_data, result_size=20):
     if not BRAVE_API_KEY:
         raise ValueError("BRAVE_API_KEY is missing from .env")
 
+    # Accept-Encoding (gzip/brotli) is negotiated by the shared client
     headers = {
         "Accept": "application/json",
-        "Accept-Encoding": "gzip",
         "X-Subscription-Token": BRAVE_API_KEY,
     }
 
@@ -44,7 +45,7 @@ def search_engine_search(restaurant_data, result_size=20):
 
         for attempt in range(5):
             try:
-                response = requests.get(
+                response = get_http_client().get(
                     BRAVE_SEARCH_URL, headers=headers, params=params, timeout=10
                 )
                 response.raise_for_status()
@@ -64,7 +65,7 @@ def search_engine_search(restaurant_data, result_size=20):
                 time.sleep(2)
                 break
 
-            except requests.exceptions.HTTPError as e:
+            except httpx.HTTPStatusError as e:
                 if response.status_code == 429:
                     wait_time = min(2**attempt, 30)
                     logging.warning(
@@ -74,7 +75,7 @@ def search_engine_search(restaurant_data, result_size=20):
                 else:
                     logging.error(f"[{PHASE}]: HTTP error {response.status_code}: {e}")
                     break
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 logging.error(f"[{PHASE}]: Network error: {e}")
                 break
 
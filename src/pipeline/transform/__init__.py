@@ -1,22 +1,106 @@
 import logging
+import os
+import time
+from collections import namedtuple
 from urllib.parse import urlparse
 from database.db_connector import get_db_connection
-from database.db_operations import check_restaurant_exists, fuzzy_search_restaurant_name
+from database.db_operations import (
+    batch_fuzzy_search_restaurant_names,
+)
 from queue_manager.task_queues import load_queue
-from .url_utils import identify_urls_from_soup, extract_homepage
-from .identify_restaurants import identify_restaurants
+from .url_utils import identify_urls, extract_homepage
+from .identify_restaurants import (
+    identify_restaurants,
+    identify_restaurants_batch,
+    ner_text,
+)
+from .gazetteer import get_gazetteer
+from .trigram_index import get_trigram_index, FUZZY_MATCH_THRESHOLD
+from .name_utils import normalize_name
+from .mention_cache import get_mention_cache
+from .relevance_gate import get_relevance_gate
+from .structured_data import structured_restaurants, record_fast_path
+from .ner_cache import NER_CACHE_ENABLED, get_ner_cache, text_key
+from utils.ttl_cache import MISSING
 
 PHASE = "TRANSFORM"
 
+# Micro-batching: pages drained per batch, max wait for a batch to fill, and nlp.pipe batch size
+TRANSFORM_BATCH_SIZE = int(os.getenv("TRANSFORM_BATCH_SIZE", 16))
+TRANSFORM_MAX_LATENCY_MS = int(os.getenv("TRANSFORM_MAX_LATENCY_MS", 500))
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", 8))
+
+# How a page's restaurants are found: from its JSON-LD alone, from the NER result
+# cached for the same text, by NER, or not at all (turned away by the relevance gate)
+STRUCTURED, CACHED, NER, GATED = "structured", "cached", "ner", "gated"
+# `structured_restaurants` are the JSON-LD names, also passed to build_payload with
+# NER's mentions; `cache_key` is the page text's NER cache key, `cached` its hit
+PagePlan = namedtuple(
+    "PagePlan",
+    ["route", "known_restaurants", "structured_restaurants", "cache_key", "cached"],
+)
+
 
 def is_restaurant(restaurant_name, conn):
-    """Checks if a restaurant exists in DB using exact match or fuzzy search."""
-    if check_restaurant_exists(restaurant_name, conn):
-        return True, restaurant_name
-    result = fuzzy_search_restaurant_name(restaurant_name, conn)
-    return result and result.get("confidence", 0) > 0.75, (
-        result["name"] if result else None
-    )
+    """
+    Checks if a restaurant exists using exact match or fuzzy search.
+    Returns (exists, matched_name); see resolve_restaurants.
+    """
+    return resolve_restaurants([restaurant_name], conn)[restaurant_name]
+
+
+def resolve_restaurants(restaurant_names, conn):
+    """
+    Validates every candidate name from a page at once.
+    Returns {name: (exists, matched_name)}: whether the name matches a known
+    restaurant exactly or fuzzily, and the restaurant's name if there is a match.
+    Results (including rejections) are memoized in the mention cache.
+    Cache misses use the in-memory trigram index if loaded, otherwise a single batched DB query.
+    """
+    cache = get_mention_cache()
+    results = {}
+    names = []
+    for name in dict.fromkeys(restaurant_names):
+        cached = cache.get(normalize_name(name))
+        if cached is MISSING:
+            names.append(name)
+        else:
+            results[name] = cached
+    if not names:
+        return results
+
+    index = get_trigram_index()
+    if index.loaded:
+        resolved = {name: index.is_restaurant(name) for name in names}
+    else:
+        matches = batch_fuzzy_search_restaurant_names(
+            names, conn, threshold=FUZZY_MATCH_THRESHOLD
+        )
+        resolved = {}
+        for name in names:
+            match = matches.get(name)
+            if match is None:
+                resolved[name] = (False, None)
+            elif match["exact"]:
+                resolved[name] = (True, name)
+            else:
+                resolved[name] = (
+                    match["confidence"] > FUZZY_MATCH_THRESHOLD,
+                    match["name"],
+                )
+
+    for name, result in resolved.items():
+        cache.set(normalize_name(name), result)
+    results.update(resolved)
+    return results
+
+
+def refresh_restaurant_indexes(conn):
+    """Picks up restaurants inserted by other processes into the in-memory name indexes."""
+    added = get_gazetteer().maybe_refresh(conn)
+    added += get_trigram_index().maybe_refresh(conn)
+    if added:
+        get_mention_cache().clear()
 
 
 def estimate_priority(url, validated_restaurants, current_priority):
@@ -38,21 +122,10 @@ def estimate_priority(url, validated_restaurants, current_priority):
     return min(100, max(0, combined_score * 100.0))
 
 
-def estimate_relevance(soup, validated_restaurants, current_priority):
-    """Computes a relevance score [0-1] using weighted signals."""
-    text = soup.get_text(separator=" ", strip=True).lower()
-    text_length = len(text)
-    headers = [
-        h.get_text(strip=True).lower() for h in soup.find_all(["h1", "h2", "h3"])
-    ]
-
-    header_signal = (
-        sum(1 for r in validated_restaurants if any(r.lower() in hd for hd in headers))
-        / len(validated_restaurants)
-        if validated_restaurants
-        else 0.0
-    )
-    text_len_signal = min(text_length / 3000.0, 1.0)
+def relevance_features(analysis):
+    """The relevance signals that depend only on the page's main content, cached with its NER result."""
+    text = ner_text(analysis).lower()
+    text_len_signal = min(len(text) / 3000.0, 1.0)
     keyword_signal = min(
         sum(
             1
@@ -70,73 +143,209 @@ def estimate_relevance(soup, validated_restaurants, current_priority):
         / 5.0,
         1.0,
     )
+    return {"text_len_signal": text_len_signal, "keyword_signal": keyword_signal}
+
+
+def estimate_relevance(analysis, validated_restaurants, current_priority, features=None):
+    """Computes a relevance score [0-1] using weighted signals, over the page's main content."""
+    features = features or relevance_features(analysis)
+    headers = [header.lower() for _, header in analysis.headers]
+
+    header_signal = (
+        sum(1 for r in validated_restaurants if any(r.lower() in hd for hd in headers))
+        / len(validated_restaurants)
+        if validated_restaurants
+        else 0.0
+    )
     parent_signal = current_priority / 100.0
 
     A, B, C, D = 0.2, 0.2, 0.3, 0.3
     combined_score = (
-        A * header_signal + B * text_len_signal + C * keyword_signal + D * parent_signal
+        A * header_signal
+        + B * features["text_len_signal"]
+        + C * features["keyword_signal"]
+        + D * parent_signal
     )
 
     return min(1.0, max(0, combined_score))
 
 
-def transform_data(content_tuple):
+def find_known_restaurants(analysis):
+    """Finds exact mentions of restaurants already in the DB, without running NER."""
+    return get_gazetteer().find(analysis.text)
+
+
+def build_payload(
+    conn,
+    target_url,
+    parent_priority,
+    analysis,
+    potential_restaurants,
+    known_restaurants=(),
+    features=None,
+):
     """
-    Processes extracted content, identifies restaurants & derived URLs,
+    Validates NER mentions, derives URLs and relevance, and returns the load payload.
+    `features` are the page's relevance_features, if already known.
+    """
+    # Gazetteer hits are exact DB names, so only NER's new candidates need validating
+    validated_restaurants = set(known_restaurants)
+    known_keys = {normalize_name(r) for r in known_restaurants}
+    rejected_restaurants = []
+    if known_restaurants:
+        logging.info(f"[{PHASE}]: Gazetteer hits: {sorted(known_restaurants)}")
+
+    candidates = [
+        r for r in potential_restaurants if normalize_name(r) not in known_keys
+    ]
+    resolved = resolve_restaurants(candidates, conn)
+    for mention in candidates:
+        exists, rest_name = resolved[mention]
+        if exists:
+            validated_restaurants.add(rest_name)
+            logging.info(f"[{PHASE}]: Identified: {rest_name}")
+        else:
+            # Keep the mention itself; the nearest DB name is not what the page said
+            rejected_restaurants.append(mention)
+            logging.info(f"[{PHASE}]: Rejected: {mention}")
+    validated_restaurants = list(validated_restaurants)
+    logging.info(f"[{PHASE}]: Identified {len(validated_restaurants)} restaurants.")
+    logging.info(f"[{PHASE}]: Rejected {len(rejected_restaurants)} restaurants.")
+
+    # Extract derived URLs
+    homepage = extract_homepage(target_url)
+    all_links = identify_urls(analysis)
+    derived_links = set(all_links) - {homepage}
+
+    derived_url_pairs = [(homepage, min(100, parent_priority))]
+    for link in derived_links:
+        new_priority = estimate_priority(link, validated_restaurants, parent_priority)
+        derived_url_pairs.append((link, new_priority))
+        logging.info(f"[{PHASE}]: Derived URL: {link} (Priority: {new_priority})")
+
+    logging.info(f"[{PHASE}]: Extracted {len(derived_links)} URLs.")
+
+    # Compute relevance score
+    relevance_score = estimate_relevance(
+        analysis, validated_restaurants, parent_priority, features
+    )
+
+    return {
+        "target_url": target_url,
+        "relevance_score": relevance_score,
+        "derived_url_pairs": derived_url_pairs,
+        "identified_restaurants": validated_restaurants,
+        "rejected_restaurants": rejected_restaurants,
+    }
+
+
+def gated_payload(target_url, parent_priority, analysis):
+    """Payload for a page the relevance gate turned away: scored, but no NER and no derived URLs."""
+    return {
+        "target_url": target_url,
+        "relevance_score": estimate_relevance(analysis, [], parent_priority),
+        "derived_url_pairs": [],
+        "identified_restaurants": [],
+        "rejected_restaurants": [],
+    }
+
+
+def passes_gate(analysis, known_restaurants):
+    """Pages naming a known restaurant always go through NER; the rest ask the relevance gate."""
+    return bool(known_restaurants) or get_relevance_gate().allows(analysis)
+
+
+def covered_by_structured_data(conn, structured, known_restaurants):
+    """
+    True if the page's JSON-LD accounts for its restaurants: every name it gives
+    matches the restaurant table, and every gazetteer hit in the text is one of them.
+    """
+    if not structured:
+        return False
+    resolved = resolve_restaurants(structured, conn)
+    if not all(exists for exists, _ in resolved.values()):
+        return False
+    covered = {normalize_name(name) for name in structured}
+    covered.update(normalize_name(matched) for _, matched in resolved.values())
+    return all(normalize_name(r) in covered for r in known_restaurants)
+
+
+def plan_page(conn, analysis):
+    """
+    Decides whether a page needs NER: the JSON-LD fast path comes first, then
+    the NER cache, then the relevance gate.
+    """
+    known_restaurants = find_known_restaurants(analysis)
+    structured = structured_restaurants(analysis)
+    key = cached = None
+    if covered_by_structured_data(conn, structured, known_restaurants):
+        record_fast_path()
+        logging.info(
+            f"[{PHASE}]: {analysis.url} - Restaurants from structured data; skipping NER."
+        )
+        route = STRUCTURED
+    else:
+        if NER_CACHE_ENABLED:
+            key = text_key(ner_text(analysis))
+            cached = get_ner_cache().get(key)
+        if cached is not None:
+            logging.info(f"[{PHASE}]: {analysis.url} - Reusing cached NER result.")
+            route = CACHED
+        elif passes_gate(analysis, known_restaurants or structured):
+            route = NER
+        else:
+            route = GATED
+    return PagePlan(route, known_restaurants, structured, key, cached)
+
+
+def plan_mentions(plan, analysis, ner_mentions=None):
+    """
+    Candidate names and relevance features for a page that wasn't gated. Fresh
+    NER results (`ner_mentions`) are stored in the NER cache on the way.
+    """
+    potential_restaurants = list(plan.structured_restaurants)
+    if plan.route == CACHED:
+        return potential_restaurants + plan.cached["mentions"], plan.cached["features"]
+    features = relevance_features(analysis)
+    if plan.route == NER:
+        potential_restaurants += ner_mentions
+        if plan.cache_key:
+            get_ner_cache().set(plan.cache_key, ner_mentions, features)
+    return potential_restaurants, features
+
+
+def transform_data(page):
+    """
+    Processes an extracted page (a PageRecord), identifies restaurants & derived URLs,
     estimates relevance, and enqueues results.
     """
     conn = get_db_connection()
-    target_url, parent_priority, soup = content_tuple
+    target_url, parent_priority = page.url, page.priority
     processed_count = 0
 
     try:
         logging.info(f"[{PHASE}]: {target_url} - Processing content...")
 
         # Identify restaurants in content
-        validated_restaurants = set()
-        rejected_restaurants = []
-        potential_restaurants = identify_restaurants(soup)
-
-        for rest_name in potential_restaurants:
-            exists, rest_name = is_restaurant(rest_name, conn)
-            if exists:
-                validated_restaurants.add(rest_name)
-                logging.info(f"[{PHASE}]: Identified: {rest_name}")
-            else:
-                rejected_restaurants.append(rest_name)
-                logging.info(f"[{PHASE}]: Rejected: {rest_name}")
-        validated_restaurants = list(validated_restaurants)
-        logging.info(f"[{PHASE}]: Identified {len(validated_restaurants)} restaurants.")
-        logging.info(f"[{PHASE}]: Rejected {len(rejected_restaurants)} restaurants.")
-
-        # Extract derived URLs
-        homepage = extract_homepage(target_url)
-        all_links = identify_urls_from_soup(soup, target_url)
-        derived_links = set(all_links) - {homepage}
-
-        derived_url_pairs = [(homepage, min(100, parent_priority))]
-        for link in derived_links:
-            new_priority = estimate_priority(
-                link, validated_restaurants, parent_priority
+        analysis = page.analysis()
+        refresh_restaurant_indexes(conn)
+        plan = plan_page(conn, analysis)
+        if plan.route == GATED:
+            payload = gated_payload(target_url, parent_priority, analysis)
+        else:
+            ner_mentions = identify_restaurants(analysis) if plan.route == NER else None
+            potential_restaurants, features = plan_mentions(plan, analysis, ner_mentions)
+            payload = build_payload(
+                conn,
+                target_url,
+                parent_priority,
+                analysis,
+                potential_restaurants,
+                plan.known_restaurants,
+                features,
             )
-            derived_url_pairs.append((link, new_priority))
-            logging.info(f"[{PHASE}]: Derived URL: {link} (Priority: {new_priority})")
-
-        logging.info(f"[{PHASE}]: Extracted {len(derived_links)} URLs.")
-
-        # Compute relevance score
-        relevance_score = estimate_relevance(
-            soup, validated_restaurants, parent_priority
-        )
-
-        # Construct and enqueue payload
-        payload = {
-            "target_url": target_url,
-            "relevance_score": relevance_score,
-            "derived_url_pairs": derived_url_pairs,
-            "identified_restaurants": validated_restaurants,
-            "rejected_restaurants": rejected_restaurants,
-        }
+            if plan.route == NER:
+                get_relevance_gate().record(analysis, payload)
 
         logging.info(f"[{PHASE}]: Enqueuing payload")
         load_queue.put(payload)
@@ -151,3 +360,70 @@ def transform_data(content_tuple):
         conn.close()
         logging.info(f"[{PHASE}]: Processed {processed_count} URLs.")
         print(f"[{PHASE}]: Processed {processed_count} URLs.")
+
+
+def transform_batch(pages, ner_batch_size=NER_BATCH_SIZE):
+    """
+    Runs NER over a micro-batch of pages (PageRecords) in one nlp.pipe pass, then
+    fans the results back out into one load payload per page.
+    """
+    if not pages:
+        return 0
+
+    conn = get_db_connection()
+    processed_count = 0
+    start = time.perf_counter()
+
+    try:
+        refresh_restaurant_indexes(conn)
+        analyses = [page.analysis() for page in pages]
+        plans = [plan_page(conn, analysis) for analysis in analyses]
+        mentions = iter(
+            identify_restaurants_batch(
+                [a for a, plan in zip(analyses, plans) if plan.route == NER],
+                batch_size=ner_batch_size,
+            )
+        )
+        ner_time = time.perf_counter() - start
+
+        for page, analysis, plan in zip(pages, analyses, plans):
+            target_url, parent_priority = page.url, page.priority
+            try:
+                logging.info(f"[{PHASE}]: {target_url} - Processing content...")
+                if plan.route == GATED:
+                    load_queue.put(gated_payload(target_url, parent_priority, analysis))
+                    processed_count += 1
+                    continue
+                ner_mentions = next(mentions) if plan.route == NER else None
+                potential_restaurants, features = plan_mentions(
+                    plan, analysis, ner_mentions
+                )
+                payload = build_payload(
+                    conn,
+                    target_url,
+                    parent_priority,
+                    analysis,
+                    potential_restaurants,
+                    plan.known_restaurants,
+                    features,
+                )
+                if plan.route == NER:
+                    get_relevance_gate().record(analysis, payload)
+                load_queue.put(payload)
+                processed_count += 1
+            except Exception as e:
+                logging.error(f"[{PHASE}]: {target_url} - Error: {e}")
+
+        elapsed = time.perf_counter() - start
+        logging.info(
+            f"[{PHASE}]: Batch of {len(pages)} pages in {elapsed:.2f}s "
+            f"(NER {ner_time:.2f}s, {len(pages) / elapsed:.1f} pages/s)."
+        )
+        return processed_count
+
+    except Exception as e:
+        logging.error(f"[{PHASE}]: Batch error: {e}")
+        return processed_count
+    finally:
+        conn.close()
+        print(f"[{PHASE}]: Processed {processed_count} URLs.")
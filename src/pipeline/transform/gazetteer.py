@@ -0,0 +1,172 @@
+# ./src/pipeline/transform/gazetteer.py
+import logging
+import threading
+import time
+from collections import deque
+from database.db_operations import (
+    get_restaurants_after_id,
+    register_restaurant_listener,
+)
+from .name_utils import normalize_name
+
+PHASE = "GAZETTEER"
+
+# Single-word names ("March", "Trust", "Valley") are mostly ordinary words on a page,
+# so they are left to NER + validation rather than accepted as exact hits.
+MIN_NAME_TOKENS = 2
+GAZETTEER_REFRESH_SECONDS = 60
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher. Patterns can be added at any time; the failure
+    links are rebuilt lazily on the next search after an insert.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._own = [None]
+        self._fail = [0]
+        self._out = [()]
+        self._built = True
+
+    def __len__(self):
+        return sum(1 for value in self._own if value is not None)
+
+    def add(self, pattern, value):
+        """Adds `pattern`; searches report `value` wherever it occurs."""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._own.append(None)
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._own[node] = value
+        self._built = False
+
+    def build(self):
+        """Computes failure links and output sets breadth-first."""
+        goto, own = self._goto, self._own
+        fail = [0] * len(goto)
+        out = [()] * len(goto)
+        pending = deque(goto[0].values())
+        for node in pending:
+            out[node] = (own[node],) if own[node] is not None else ()
+
+        while pending:
+            node = pending.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = ((own[nxt],) if own[nxt] is not None else ()) + out[fail[nxt]]
+                pending.append(nxt)
+
+        self._fail, self._out, self._built = fail, out, True
+
+    def iter(self, text):
+        """Yields (end_index, value) for every pattern occurrence in one pass over `text`."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for value in out[node]:
+                yield i, value
+
+
+class Gazetteer:
+    """
+    In-memory index of every known restaurant name. Finds exact (normalized)
+    name hits on whole-word boundaries in a single linear pass over page text.
+    """
+
+    def __init__(self):
+        self._matcher = AhoCorasick()
+        self._names = {}  # normalized name -> canonical DB name
+        self._lock = threading.Lock()
+        self.last_id = 0
+        self.last_refresh = 0.0
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name):
+        """Adds one restaurant name to the index."""
+        key = normalize_name(name)
+        if len(key.split(" ")) < MIN_NAME_TOKENS:
+            return
+        with self._lock:
+            if key not in self._names:
+                self._names[key] = name
+                self._matcher.add(key, key)
+
+    def refresh(self, conn):
+        """Pulls restaurants inserted since the last refresh and indexes them."""
+        rows = get_restaurants_after_id(self.last_id, conn)
+        for restaurant_id, name, _ in rows:
+            self.add(name)
+            self.last_id = max(self.last_id, restaurant_id)
+        self.last_refresh = time.monotonic()
+        if rows:
+            logging.info(
+                f"[{PHASE}]: Indexed {len(rows)} restaurants ({len(self)} names total)."
+            )
+        return len(rows)
+
+    def maybe_refresh(self, conn, max_age=GAZETTEER_REFRESH_SECONDS):
+        """Refreshes only if the last refresh is older than `max_age` seconds."""
+        if time.monotonic() - self.last_refresh >= max_age:
+            return self.refresh(conn)
+        return 0
+
+    def find(self, text):
+        """Returns the canonical names of every known restaurant mentioned in `text`."""
+        text = normalize_name(text)
+        found = set()
+        with self._lock:
+            for end, key in self._matcher.iter(text):
+                start = end - len(key) + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+                found.add(self._names[key])
+        return list(found)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def _on_restaurant_inserted(restaurant_id, name, address):
+    get_gazetteer().add(name)
+
+
+def get_gazetteer():
+    """Returns the process-wide gazetteer, subscribing it to restaurant inserts on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer()
+                register_restaurant_listener(_on_restaurant_inserted)
+    return _gazetteer
+
+
+def load_gazetteer(conn):
+    """Builds the process-wide gazetteer from the restaurant table, e.g. at startup."""
+    start = time.perf_counter()
+    gazetteer = get_gazetteer()
+    gazetteer.refresh(conn)
+    logging.info(
+        f"[{PHASE}]: Loaded {len(gazetteer)} names in {time.perf_counter() - start:.2f}s."
+    )
+    return gazetteer
@@ -1,12 +1,51 @@
 # ./src/pipeline/transform/identify_restaurants.py
-import spacy
+import os
+import threading
+from .ner_engine import get_ner_engine
+from .ner_pool import NER_EXECUTION_MODE, get_ner_pool
 
+# Run NER over the page's main content only, leaving out navigation, footers and banners
+NER_MAIN_CONTENT_ONLY = os.getenv("NER_MAIN_CONTENT_ONLY", "true").lower() == "true"
 
-def identify_restaurants(soup):
-    nlp = spacy.load("en_core_web_trf")
-    restaurant_names = set()
-    doc = nlp(soup.get_text())
-    for ent in doc.ents:
-        if ent.label_ in ["ORG", "PRODUCT"]:
-            restaurant_names.add(ent.text)
-    return list(restaurant_names)
+_stats = {"pages": 0, "page_tokens": 0, "ner_tokens": 0}
+_stats_lock = threading.Lock()
+
+
+def _ner_backend():
+    return get_ner_pool() if NER_EXECUTION_MODE == "process" else get_ner_engine()
+
+
+def ner_text(analysis):
+    """The text NER and keyword scoring see: the main content, or the whole page if none was found."""
+    if NER_MAIN_CONTENT_ONLY and analysis.main_text:
+        return analysis.main_text
+    return analysis.text
+
+
+def _texts(analyses):
+    texts = [ner_text(analysis) for analysis in analyses]
+    # Whitespace-separated words, a stable proxy for the model's token count
+    page_tokens = sum(len(analysis.text.split()) for analysis in analyses)
+    ner_tokens = sum(len(text.split()) for text in texts)
+    with _stats_lock:
+        _stats["pages"] += len(analyses)
+        _stats["page_tokens"] += page_tokens
+        _stats["ner_tokens"] += ner_tokens
+    return texts
+
+
+def get_ner_input_stats():
+    with _stats_lock:
+        s = dict(_stats)
+    s["reduction"] = 1 - s["ner_tokens"] / s["page_tokens"] if s["page_tokens"] else 0.0
+    return s
+
+
+def identify_restaurants(analysis):
+    return _ner_backend().extract(_texts([analysis])[0])
+
+
+def identify_restaurants_batch(analyses, batch_size=8):
+    if not analyses:
+        return []
+    return _ner_backend().extract_many(_texts(analyses), batch_size=batch_size)
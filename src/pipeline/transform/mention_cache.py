@@ -0,0 +1,29 @@
+# ./src/pipeline/transform/mention_cache.py
+import os
+import threading
+from database.db_operations import register_restaurant_listener
+from utils.ttl_cache import TTLCache
+
+# Resolved mentions, keyed on the normalized mention: (exists, matched_name).
+# Negative results are cached too, since "Michelin" or "Yelp" appear on thousands of pages.
+MENTION_CACHE_SIZE = int(os.getenv("MENTION_CACHE_SIZE", 50000))
+MENTION_CACHE_TTL = float(os.getenv("MENTION_CACHE_TTL", 3600))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _on_restaurant_inserted(restaurant_id, name, address):
+    # A new restaurant can turn a cached rejection into a match, or change the best match
+    get_mention_cache().clear()
+
+
+def get_mention_cache():
+    """Returns the process-wide mention cache, invalidated whenever a restaurant is inserted."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTLCache(MENTION_CACHE_SIZE, ttl=MENTION_CACHE_TTL)
+                register_restaurant_listener(_on_restaurant_inserted)
+    return _cache
@@ -0,0 +1,29 @@
+# ./src/pipeline/transform/name_utils.py
+import re
+import unicodedata
+
+# Typographic variants that NFKC leaves alone but that show up in restaurant names
+_PUNCTUATION_MAP = str.maketrans(
+    {
+        "‘": "'",
+        "’": "'",
+        "ʼ": "'",
+        "“": '"',
+        "”": '"',
+        "–": "-",
+        "—": "-",
+        " ": " ",
+    }
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(text):
+    """
+    Normalizes a restaurant name (or page text) for matching.
+    Example:
+        Input: "  Manohar’s   DELHI Palace "
+        Output: "manohar's delhi palace"
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_PUNCTUATION_MAP)
+    return _WHITESPACE.sub(" ", text.casefold()).strip()
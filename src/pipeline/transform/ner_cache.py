@@ -0,0 +1,146 @@
+# ./src/pipeline/transform/ner_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from .ner_engine import NER_MODEL
+
+PHASE = "NER_CACHE"
+
+NER_CACHE_ENABLED = os.getenv("NER_CACHE_ENABLED", "true").lower() == "true"
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+NER_CACHE_PATH = os.getenv("NER_CACHE_PATH", os.path.join(DATA_DIR, "ner_cache.sqlite3"))
+# Least recently used entries are evicted once the stored results exceed this size
+NER_CACHE_MAX_BYTES = int(os.getenv("NER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def text_key(text, model=NER_MODEL):
+    """
+    Hash of a page's NER input, whitespace and Unicode normalized. The model is
+    part of the key, since another model finds other mentions in the same text.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha1(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class NERCache:
+    """
+    On-disk store of NER results by page text: the mentions found and the
+    relevance features computed from the text. Revisited URLs and articles
+    syndicated across sites reuse them instead of running NER again.
+    """
+
+    def __init__(self, path=NER_CACHE_PATH, max_bytes=NER_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ner_results (
+                text_hash TEXT PRIMARY KEY,
+                mentions TEXT,
+                features TEXT,
+                size INTEGER,
+                used_at REAL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS ner_results_used_at ON ner_results (used_at)"
+        )
+        self._db.commit()
+        self._bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM ner_results"
+        ).fetchone()[0]
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key):
+        """Returns {"mentions": [...], "features": {...}} stored under `key`, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT mentions, features FROM ner_results WHERE text_hash = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._db.execute(
+                "UPDATE ner_results SET used_at = ? WHERE text_hash = ?",
+                (time.time(), key),
+            )
+            self._db.commit()
+        return {"mentions": json.loads(row[0]), "features": json.loads(row[1])}
+
+    def set(self, key, mentions, features):
+        """Stores the NER result for `key`, evicting the least recently used results if full."""
+        mentions = json.dumps(list(mentions), separators=(",", ":"))
+        features = json.dumps(features, separators=(",", ":"))
+        size = len(key) + len(mentions) + len(features)
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM ner_results WHERE text_hash = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO ner_results "
+                "(text_hash, mentions, features, size, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, mentions, features, size, time.time()),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            self._stats["stores"] += 1
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        # Caller holds the lock; oldest first, until the results fit again
+        evicted = 0
+        for text_hash, size in self._db.execute(
+            "SELECT text_hash, size FROM ner_results ORDER BY used_at"
+        ).fetchall():
+            if self._bytes <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM ner_results WHERE text_hash = ?", (text_hash,))
+            self._bytes -= size
+            evicted += 1
+        self._stats["evictions"] += evicted
+        logging.info(f"[{PHASE}]: Evicted {evicted} results ({self._bytes} bytes left).")
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = self._db.execute("SELECT COUNT(*) FROM ner_results").fetchone()[0]
+            s["bytes"] = self._bytes
+        s["max_bytes"] = self.max_bytes
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ner_cache():
+    """Returns the process-wide NER result cache, opening the on-disk store on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = NERCache()
+                logging.info(f"[{PHASE}]: Opened {_cache.path}.")
+    return _cache
+
+
+def get_ner_cache_stats():
+    """Stats of the NER result cache, or {} if this process hasn't opened it."""
+    return _cache.stats() if _cache is not None else {}
@@ -0,0 +1,115 @@
+# ./src/pipeline/transform/ner_engine.py
+import logging
+import os
+import threading
+import time
+import spacy
+
+PHASE = "NER"
+
+# Model tiers, fastest and least accurate first; CPU-only hosts usually want sm or md
+NER_MODEL_TIERS = {
+    "sm": "en_core_web_sm",
+    "md": "en_core_web_md",
+    "lg": "en_core_web_lg",
+    "trf": "en_core_web_trf",
+}
+# The quantized ONNX export of a token-classification model, see ner_onnx
+ONNX_TIER = "onnx"
+# A tier above, "onnx", or any spaCy package name or model path
+NER_MODEL = os.getenv("NER_MODEL", "trf")
+NER_LABELS = ("ORG", "PRODUCT")
+
+# Pipeline components that ORG/PRODUCT extraction never reads from.
+UNUSED_COMPONENTS = [
+    "tagger",
+    "parser",
+    "senter",
+    "attribute_ruler",
+    "lemmatizer",
+    "morphologizer",
+    "textcat",
+]
+
+
+class NEREngine:
+    """
+    Lazily loaded spaCy pipeline shared by every transform worker in the process.
+    Loading is guarded so only one thread pays for it; inference is serialized
+    because spaCy pipelines are not guaranteed to be thread-safe.
+    """
+
+    def __init__(self, model_name=NER_MODEL, labels=NER_LABELS):
+        self.model_name = NER_MODEL_TIERS.get(model_name, model_name)
+        self.labels = set(labels)
+        self._nlp = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._nlp is not None
+
+    def load(self):
+        """Loads the model once; later calls return the cached pipeline."""
+        if self._nlp is None:
+            with self._load_lock:
+                if self._nlp is None:
+                    start = time.perf_counter()
+                    self._nlp = spacy.load(self.model_name, exclude=UNUSED_COMPONENTS)
+                    logging.info(
+                        f"[{PHASE}]: Loaded {self.model_name} {self._nlp.pipe_names} "
+                        f"in {time.perf_counter() - start:.1f}s."
+                    )
+        return self._nlp
+
+    def warm_up(self):
+        """Loads the model and runs one throwaway document so the first page isn't slow."""
+        self.extract("Dinner at The French Laundry in Yountville.")
+
+    def _mentions(self, doc):
+        return list({ent.text for ent in doc.ents if ent.label_ in self.labels})
+
+    def extract(self, text):
+        """Returns the unique ORG/PRODUCT mentions found in `text`."""
+        nlp = self.load()
+        with self._infer_lock:
+            doc = nlp(text)
+        return self._mentions(doc)
+
+    def extract_many(self, texts, batch_size=8):
+        """Runs nlp.pipe over `texts`, returning one mention list per text, in order."""
+        nlp = self.load()
+        with self._infer_lock:
+            docs = list(nlp.pipe(texts, batch_size=batch_size))
+        return [self._mentions(doc) for doc in docs]
+
+
+def create_ner_engine(model=NER_MODEL, labels=NER_LABELS):
+    """Returns an unloaded engine for `model`: a spaCy tier, package or path, or "onnx"."""
+    if model == ONNX_TIER:
+        from .ner_onnx import ONNXNEREngine
+
+        return ONNXNEREngine(labels=labels)
+    return NEREngine(model_name=model, labels=labels)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ner_engine():
+    """Returns the process-wide NER engine, creating it (but not loading the model) on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_ner_engine()
+    return _engine
+
+
+def warm_up_ner():
+    """Loads the process-wide NER model up front, e.g. before transform workers start."""
+    start = time.perf_counter()
+    get_ner_engine().warm_up()
+    logging.info(f"[{PHASE}]: Warm-up complete in {time.perf_counter() - start:.1f}s.")
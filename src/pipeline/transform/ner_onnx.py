@@ -0,0 +1,105 @@
+# ./src/pipeline/transform/ner_onnx.py
+import logging
+import os
+import sys
+import threading
+import time
+from .ner_engine import NER_LABELS
+
+PHASE = "NER_ONNX"
+
+NER_ONNX_MODEL_PATH = os.getenv("NER_ONNX_MODEL_PATH", "models/ner-onnx-int8")
+# Exported by export_quantized: a CoNLL-03 token classifier, whose ORG label covers restaurants
+NER_ONNX_SOURCE_MODEL = os.getenv("NER_ONNX_SOURCE_MODEL", "dslim/bert-base-NER")
+ONNX_FILE_NAME = "model_quantized.onnx"
+# Token overlap between windows when a page is longer than the model's input
+NER_ONNX_STRIDE = 64
+
+
+class ONNXNEREngine:
+    """
+    NEREngine's interface over an int8-quantized transformer run by onnxruntime.
+    Needs `optimum[onnxruntime]`, which is only imported when the model loads.
+    """
+
+    def __init__(self, model_path=NER_ONNX_MODEL_PATH, labels=NER_LABELS):
+        self.model_name = model_path
+        self.labels = set(labels)
+        self._pipe = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._pipe is not None
+
+    def load(self):
+        """Loads the model once; later calls return the cached pipeline."""
+        if self._pipe is None:
+            with self._load_lock:
+                if self._pipe is None:
+                    from optimum.onnxruntime import ORTModelForTokenClassification
+                    from transformers import AutoTokenizer, pipeline
+
+                    start = time.perf_counter()
+                    model = ORTModelForTokenClassification.from_pretrained(
+                        self.model_name, file_name=ONNX_FILE_NAME
+                    )
+                    self._pipe = pipeline(
+                        "token-classification",
+                        model=model,
+                        tokenizer=AutoTokenizer.from_pretrained(self.model_name),
+                        aggregation_strategy="simple",
+                        stride=NER_ONNX_STRIDE,
+                    )
+                    logging.info(
+                        f"[{PHASE}]: Loaded {self.model_name} "
+                        f"in {time.perf_counter() - start:.1f}s."
+                    )
+        return self._pipe
+
+    def warm_up(self):
+        """Loads the model and runs one throwaway document so the first page isn't slow."""
+        self.extract("Dinner at The French Laundry in Yountville.")
+
+    def _mentions(self, text, entities):
+        # The page's own spelling, not the tokenizer's reassembly of word pieces
+        return list(
+            {
+                text[ent["start"] : ent["end"]]
+                for ent in entities
+                if ent["entity_group"] in self.labels
+            }
+        )
+
+    def extract(self, text):
+        """Returns the unique ORG mentions found in `text`."""
+        return self.extract_many([text], batch_size=1)[0]
+
+    def extract_many(self, texts, batch_size=8):
+        """Runs the pipeline over `texts`, returning one mention list per text, in order."""
+        if not texts:
+            return []
+        pipe = self.load()
+        with self._infer_lock:
+            results = pipe(list(texts), batch_size=batch_size)
+        return [self._mentions(text, ents) for text, ents in zip(texts, results)]
+
+
+def export_quantized(source=NER_ONNX_SOURCE_MODEL, output_dir=NER_ONNX_MODEL_PATH):
+    """Exports a Hugging Face token classifier to ONNX with dynamic int8 quantization."""
+    from optimum.onnxruntime import ORTModelForTokenClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForTokenClassification.from_pretrained(source, export=True)
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    ORTQuantizer.from_pretrained(model).quantize(
+        save_dir=output_dir, quantization_config=config
+    )
+    AutoTokenizer.from_pretrained(source).save_pretrained(output_dir)
+    print(f"Saved {source} as {os.path.join(output_dir, ONNX_FILE_NAME)}.")
+
+
+if __name__ == "__main__":
+    export_quantized(*sys.argv[1:])
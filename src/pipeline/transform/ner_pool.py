@@ -0,0 +1,117 @@
+# ./src/pipeline/transform/ner_pool.py
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .ner_engine import create_ner_engine, NER_MODEL
+
+PHASE = "NER_POOL"
+
+# "thread" runs NER on the shared in-process engine, "process" fans it out to a process pool
+NER_EXECUTION_MODE = os.getenv("NER_EXECUTION_MODE", "thread")
+# Leave one core for the parent's parsing, DB and queue work
+NER_PROCESSES = int(os.getenv("NER_PROCESSES", 0)) or max(1, (os.cpu_count() or 2) - 1)
+
+# Per-child engine, created by the pool initializer
+_child_engine = None
+
+
+def _init_child(model, torch_threads):
+    """Pool initializer: loads the NER model once per child process."""
+    global _child_engine
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _child_engine = create_ner_engine(model)
+    _child_engine.load()
+
+
+def _extract_in_child(texts, batch_size):
+    return _child_engine.extract_many(texts, batch_size=batch_size)
+
+
+class NERProcessPool:
+    """
+    Runs NER in child processes so inference isn't bound to one core by the GIL.
+    Only plain strings cross the process boundary, never parsed documents.
+    """
+
+    def __init__(self, processes=NER_PROCESSES, model_name=NER_MODEL):
+        self.processes = processes
+        self.model_name = model_name
+        # Split the cores between children so torch doesn't oversubscribe them
+        torch_threads = max(1, (os.cpu_count() or 1) // processes)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_child,
+            initargs=(model_name, torch_threads),
+        )
+
+    def warm_up(self):
+        """Starts every child and waits until each has loaded the model."""
+        futures = [
+            self._executor.submit(_extract_in_child, ["warm up"], 1)
+            for _ in range(self.processes)
+        ]
+        for f in futures:
+            f.result()
+
+    def extract_many(self, texts, batch_size=8):
+        """Spreads `texts` across the children and returns mention lists in input order."""
+        if not texts:
+            return []
+        chunk = max(batch_size, math.ceil(len(texts) / self.processes))
+        futures = [
+            self._executor.submit(_extract_in_child, texts[i : i + chunk], batch_size)
+            for i in range(0, len(texts), chunk)
+        ]
+        results = []
+        for f in futures:
+            results.extend(f.result())
+        return results
+
+    def extract(self, text):
+        return self.extract_many([text], batch_size=1)[0]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ner_pool():
+    """Returns the process-wide NER pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = NERProcessPool()
+    return _pool
+
+
+def start_ner_pool():
+    """Starts the NER pool and loads the model in every child up front."""
+    start = time.perf_counter()
+    pool = get_ner_pool()
+    pool.warm_up()
+    logging.info(
+        f"[{PHASE}]: {pool.processes} NER processes ready in {time.perf_counter() - start:.1f}s."
+    )
+    return pool
+
+
+def shutdown_ner_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
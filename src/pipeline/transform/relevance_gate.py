@@ -0,0 +1,288 @@
+# ./src/pipeline/transform/relevance_gate.py
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import zlib
+from urllib.parse import urlparse
+from .identify_restaurants import ner_text
+
+PHASE = "RELEVANCE_GATE"
+
+RELEVANCE_GATE_ENABLED = os.getenv("RELEVANCE_GATE_ENABLED", "true").lower() == "true"
+# Pages the model gives a lower probability of being relevant skip NER and link expansion
+RELEVANCE_GATE_THRESHOLD = float(os.getenv("RELEVANCE_GATE_THRESHOLD", 0.2))
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+RELEVANCE_GATE_MODEL_PATH = os.getenv(
+    "RELEVANCE_GATE_MODEL_PATH", os.path.join(DATA_DIR, "relevance_gate.json")
+)
+# When enabled, every page that does go through NER is appended here as a training sample
+RELEVANCE_GATE_RECORD_SAMPLES = (
+    os.getenv("RELEVANCE_GATE_RECORD_SAMPLES", "false").lower() == "true"
+)
+RELEVANCE_GATE_SAMPLES_PATH = os.getenv(
+    "RELEVANCE_GATE_SAMPLES_PATH", os.path.join(DATA_DIR, "relevance_samples.jsonl")
+)
+# Recording stops once the samples file reaches this size
+RELEVANCE_GATE_SAMPLES_MAX_BYTES = int(
+    os.getenv("RELEVANCE_GATE_SAMPLES_MAX_BYTES", 256 * 1024 * 1024)
+)
+RELEVANCE_GATE_FEATURES = int(os.getenv("RELEVANCE_GATE_FEATURES", 2**18))
+# A scored page is a positive sample if it named a known restaurant or scored this high
+RELEVANT_SCORE = 0.5
+
+KEYWORDS = (
+    "review", "menu", "dish", "chef", "restaurant", "michelin", "wine list",
+    "reservation", "cuisine", "dinner", "brunch", "tasting", "eatery", "bistro",
+)
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _hash(name, n_features):
+    # crc32 rather than hash(): it must agree across processes and restarts
+    return zlib.crc32(name.encode("utf-8")) % n_features
+
+
+def extract_features(analysis, n_features=RELEVANCE_GATE_FEATURES):
+    """
+    Hashes a PageAnalysis into a sparse, L2-normalized {index: value} vector:
+    words and word pairs of the main text, header, title and URL words, and
+    food keywords, each in its own namespace, with sublinear counts.
+    """
+    counts = {}
+
+    def add(name):
+        i = _hash(name, n_features)
+        counts[i] = counts.get(i, 0) + 1
+
+    text = ner_text(analysis).lower()
+    words = _WORD.findall(text)
+    for word in words:
+        add("w:" + word)
+    for first, second in zip(words, words[1:]):
+        add(f"b:{first} {second}")
+    for _, header in analysis.headers:
+        for word in _WORD.findall(header.lower()):
+            add("h:" + word)
+    for word in _WORD.findall(analysis.title.lower()):
+        add("t:" + word)
+    parsed = urlparse(analysis.url)
+    for word in _WORD.findall(f"{parsed.netloc} {parsed.path}".lower()):
+        add("u:" + word)
+    for keyword in KEYWORDS:
+        if keyword in text:
+            add("k:" + keyword)
+
+    vector = {i: 1.0 + math.log(c) for i, c in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {i: v / norm for i, v in vector.items()}
+
+
+def _sigmoid(z):
+    if z < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+class RelevanceGate:
+    """
+    Logistic regression over hashed page features, run before NER. Without a
+    trained model every page is let through. Given a samples_path, pages it lets
+    through are recorded with the label transform gave them, to train the next
+    model from, until the file reaches samples_max_bytes.
+    """
+
+    def __init__(
+        self,
+        weights=None,
+        bias=0.0,
+        threshold=RELEVANCE_GATE_THRESHOLD,
+        n_features=RELEVANCE_GATE_FEATURES,
+        samples_path=None,
+        samples_max_bytes=RELEVANCE_GATE_SAMPLES_MAX_BYTES,
+        enabled=RELEVANCE_GATE_ENABLED,
+    ):
+        self.weights = weights
+        self.bias = bias
+        self.threshold = threshold
+        self.n_features = n_features
+        self.samples_path = samples_path
+        self.samples_max_bytes = samples_max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {"pages": 0, "skipped": 0}
+
+    @property
+    def trained(self):
+        return self.weights is not None
+
+    def probability(self, features):
+        z = self.bias + sum(self.weights.get(i, 0.0) * v for i, v in features.items())
+        return _sigmoid(z)
+
+    def allows(self, analysis):
+        """True if `analysis` should go through NER; logs every decision it makes."""
+        with self._lock:
+            self._stats["pages"] += 1
+        if not (self.enabled and self.trained):
+            return True
+        p = self.probability(extract_features(analysis, self.n_features))
+        allowed = p >= self.threshold
+        logging.info(
+            f"[{PHASE}]: {analysis.url} p={p:.2f} -> {'NER' if allowed else 'skip'}"
+        )
+        if not allowed:
+            with self._lock:
+                self._stats["skipped"] += 1
+        return allowed
+
+    def record(self, analysis, payload):
+        """Appends a page transform has scored to the training samples."""
+        if not self.samples_path:
+            return
+        label = int(
+            bool(payload["identified_restaurants"])
+            or payload["relevance_score"] >= RELEVANT_SCORE
+        )
+        sample = {
+            "url": analysis.url,
+            "label": label,
+            "score": payload["relevance_score"],
+            "features": extract_features(analysis, self.n_features),
+        }
+        line = json.dumps(sample, separators=(",", ":")) + "\n"
+        try:
+            with self._lock:
+                if not self.samples_path:
+                    return
+                os.makedirs(os.path.dirname(self.samples_path) or ".", exist_ok=True)
+                if os.path.exists(self.samples_path) and (
+                    os.path.getsize(self.samples_path) >= self.samples_max_bytes
+                ):
+                    logging.warning(
+                        f"[{PHASE}]: {self.samples_path} is full; no longer recording samples."
+                    )
+                    self.samples_path = None
+                    return
+                with open(self.samples_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            logging.warning(f"[{PHASE}]: Could not record sample: {e}")
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["trained"] = self.trained
+        s["skip_rate"] = s["skipped"] / s["pages"] if s["pages"] else 0.0
+        return s
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "n_features": self.n_features,
+                    "bias": self.bias,
+                    "weights": {str(i): w for i, w in self.weights.items()},
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Loads a saved model; an untrained gate (which lets everything through) if there is none."""
+        if not os.path.exists(path):
+            logging.info(f"[{PHASE}]: No model at {path}; every page goes through NER.")
+            return cls(**kwargs)
+        with open(path, encoding="utf-8") as f:
+            model = json.load(f)
+        weights = {int(i): w for i, w in model["weights"].items()}
+        logging.info(f"[{PHASE}]: Loaded {path} ({len(weights)} weights).")
+        return cls(weights, model["bias"], n_features=model["n_features"], **kwargs)
+
+
+def load_samples(path):
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                sample = json.loads(line)
+                features = {int(i): v for i, v in sample["features"].items()}
+                samples.append((features, sample["label"]))
+    return samples
+
+
+def train(samples, epochs=10, learning_rate=0.5, l2=1e-6, seed=0, **kwargs):
+    """Fits a RelevanceGate to (features, label) samples with plain SGD on the log loss."""
+    weights, bias = {}, 0.0
+    order = list(samples)
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        rate = learning_rate / (1 + epoch)
+        for features, label in order:
+            z = bias + sum(weights.get(i, 0.0) * v for i, v in features.items())
+            error = _sigmoid(z) - label
+            for i, v in features.items():
+                w = weights.get(i, 0.0)
+                weights[i] = w - rate * (error * v + l2 * w)
+            bias -= rate * error
+    return RelevanceGate(weights, bias, **kwargs)
+
+
+def evaluate(gate, samples):
+    """Share of pages skipped at the gate's threshold, and of relevant pages wrongly skipped."""
+    skipped = missed = relevant = 0
+    for features, label in samples:
+        skip = gate.probability(features) < gate.threshold
+        skipped += skip
+        relevant += label
+        missed += skip and label
+    return {
+        "pages": len(samples),
+        "skip_rate": skipped / len(samples) if samples else 0.0,
+        "relevant_recall": 1 - missed / relevant if relevant else 1.0,
+    }
+
+
+_gate = None
+_gate_lock = threading.Lock()
+
+
+def get_relevance_gate():
+    """
+    Returns the process-wide gate, loaded from RELEVANCE_GATE_MODEL_PATH. It
+    records samples only if RELEVANCE_GATE_RECORD_SAMPLES is set.
+    """
+    global _gate
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                samples_path = (
+                    RELEVANCE_GATE_SAMPLES_PATH if RELEVANCE_GATE_RECORD_SAMPLES else None
+                )
+                _gate = RelevanceGate.load(
+                    RELEVANCE_GATE_MODEL_PATH, samples_path=samples_path
+                )
+    return _gate
+
+
+def main(samples_path=RELEVANCE_GATE_SAMPLES_PATH, model_path=RELEVANCE_GATE_MODEL_PATH):
+    """Trains on recorded samples (holding out every fifth for evaluation) and saves the model."""
+    samples = load_samples(samples_path)
+    held_out = samples[::5]
+    training = [s for i, s in enumerate(samples) if i % 5]
+    gate = train(training)
+    print(f"Trained on {len(training)} pages; held out {len(held_out)}.")
+    print(f"Held out at threshold {gate.threshold}: {evaluate(gate, held_out)}")
+    gate = train(samples)
+    gate.save(model_path)
+    print(f"Saved {model_path}.")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,107 @@
+# ./src/pipeline/transform/structured_data.py
+import json
+import logging
+import threading
+
+PHASE = "STRUCTURED_DATA"
+
+# schema.org types that are a restaurant: FoodEstablishment and its subtypes
+RESTAURANT_TYPES = frozenset(
+    {
+        "restaurant", "foodestablishment", "barorpub", "bakery", "cafeorcoffeeshop",
+        "distillery", "fastfoodrestaurant", "icecreamshop", "winery", "brewery",
+    }
+)
+# Types whose `itemReviewed` names the thing the page is about
+REVIEW_TYPES = frozenset({"review", "criticreview", "userreview"})
+
+_stats = {"pages": 0, "with_restaurants": 0, "fast_path": 0, "names": 0}
+_stats_lock = threading.Lock()
+
+
+def _types(node):
+    types = node.get("@type", ())
+    if isinstance(types, str):
+        types = (types,)
+    # "http://schema.org/Restaurant" and "Restaurant" are the same type
+    return {
+        t.rstrip("/").rsplit("/", 1)[-1].lower() for t in types if isinstance(t, str)
+    }
+
+
+def _name(node):
+    name = node.get("name")
+    if isinstance(name, list):
+        name = next((n for n in name if isinstance(n, str)), None)
+    if isinstance(name, str):
+        name = " ".join(name.split())
+        return name or None
+    return None
+
+
+def _walk(value, names):
+    if isinstance(value, list):
+        for item in value:
+            _walk(item, names)
+        return
+    if not isinstance(value, dict):
+        return
+    types = _types(value)
+    if types & RESTAURANT_TYPES:
+        names.append(_name(value))
+    if types & REVIEW_TYPES:
+        reviewed = value.get("itemReviewed")
+        # An untyped itemReviewed on a review page is taken to be the restaurant
+        if isinstance(reviewed, dict) and not _types(reviewed):
+            names.append(_name(reviewed))
+    # Restaurants nest anywhere: @graph, ItemList.itemListElement[].item, itemReviewed
+    for item in value.values():
+        if isinstance(item, (dict, list)):
+            _walk(item, names)
+
+
+def _load(raw):
+    raw = raw.strip()
+    # Some CMSs wrap the JSON in a CDATA section or leave a trailing semicolon
+    if raw.startswith("<![CDATA["):
+        raw = raw[len("<![CDATA["):]
+        raw = raw[: raw.rfind("]]>")] if "]]>" in raw else raw
+    raw = raw.strip().rstrip(";")
+    try:
+        return json.loads(raw, strict=False)
+    except ValueError:
+        return None
+
+
+def structured_restaurants(analysis):
+    """
+    Names of the restaurants the page describes in its JSON-LD: every
+    Restaurant (or other FoodEstablishment) node, and the itemReviewed of
+    Reviews, in document order without repeats. Unparseable blocks are ignored.
+    """
+    names = []
+    for raw in analysis.json_ld:
+        data = _load(raw)
+        if data is None:
+            logging.debug(f"[{PHASE}]: {analysis.url} - Unparseable JSON-LD block.")
+            continue
+        _walk(data, names)
+    names = list(dict.fromkeys(name for name in names if name))
+    with _stats_lock:
+        _stats["pages"] += 1
+        _stats["with_restaurants"] += bool(names)
+        _stats["names"] += len(names)
+    return names
+
+
+def record_fast_path():
+    """Counts a page whose restaurants all came from its structured data, skipping NER."""
+    with _stats_lock:
+        _stats["fast_path"] += 1
+
+
+def get_structured_data_stats():
+    with _stats_lock:
+        s = dict(_stats)
+    s["fire_rate"] = s["fast_path"] / s["pages"] if s["pages"] else 0.0
+    return s
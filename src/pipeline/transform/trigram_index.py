@@ -0,0 +1,165 @@
+# ./src/pipeline/transform/trigram_index.py
+import logging
+import struct
+import threading
+import time
+from collections import defaultdict
+from database.db_operations import (
+    get_restaurants_after_id,
+    register_restaurant_listener,
+)
+
+PHASE = "TRIGRAM_INDEX"
+
+# is_restaurant accepts fuzzy matches strictly above this confidence
+FUZZY_MATCH_THRESHOLD = 0.75
+TRIGRAM_REFRESH_SECONDS = 60
+
+
+def trigrams(text):
+    """
+    Returns the set of trigrams pg_trgm extracts from `text` (show_trgm).
+    The string is lowercased and split into alphanumeric words; each word is
+    padded with two spaces in front and one behind.
+    Example:
+        Input: "Cat"
+        Output: {"  c", " ca", "cat", "at "}
+    """
+    result = set()
+    word = []
+    for ch in text.lower() + " ":
+        if ch.isalnum():
+            word.append(ch)
+        elif word:
+            padded = "  " + "".join(word) + " "
+            result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+            word = []
+    return result
+
+
+def _as_real(value):
+    """Rounds to float4, the type pg_trgm's similarity() returns."""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+def similarity(a, b):
+    """Python equivalent of pg_trgm's similarity(a, b)."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    shared = len(ta & tb)
+    return _as_real(shared / (len(ta) + len(tb) - shared))
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over restaurant names. best_match() returns what
+    fuzzy_search_restaurant_name() would, without a DB round trip.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(list)  # trigram -> [restaurant_id]
+        self._sizes = {}  # restaurant_id -> number of distinct trigrams
+        self._rows = {}  # restaurant_id -> (name, address)
+        self._exact = {}  # name -> restaurant_id
+        self._lock = threading.RLock()
+        self.last_id = 0
+        self.last_refresh = 0.0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, restaurant_id, name, address=None):
+        with self._lock:
+            if restaurant_id in self._rows:
+                return
+            grams = trigrams(name)
+            for gram in grams:
+                self._postings[gram].append(restaurant_id)
+            self._sizes[restaurant_id] = len(grams)
+            self._rows[restaurant_id] = (name, address)
+            self._exact.setdefault(name, restaurant_id)
+
+    def refresh(self, conn):
+        """Indexes restaurants inserted since the last refresh."""
+        rows = get_restaurants_after_id(self.last_id, conn)
+        for restaurant_id, name, address in rows:
+            self.add(restaurant_id, name, address)
+            self.last_id = max(self.last_id, restaurant_id)
+        self.last_refresh = time.monotonic()
+        self.loaded = True
+        return len(rows)
+
+    def maybe_refresh(self, conn, max_age=TRIGRAM_REFRESH_SECONDS):
+        if time.monotonic() - self.last_refresh >= max_age:
+            return self.refresh(conn)
+        return 0
+
+    def exact_match(self, name):
+        """Returns the restaurant ID whose name equals `name` exactly, like check_restaurant_exists."""
+        return self._exact.get(name)
+
+    def best_match(self, search_term):
+        """Returns the most similar restaurant as {id, name, address, confidence}, or None."""
+        query = trigrams(search_term)
+        if not query:
+            return None
+        with self._lock:
+            shared = defaultdict(int)
+            for gram in query:
+                for restaurant_id in self._postings.get(gram, ()):
+                    shared[restaurant_id] += 1
+            if not shared:
+                return None
+            best_id, best_score = None, -1.0
+            for restaurant_id, count in shared.items():
+                score = count / (len(query) + self._sizes[restaurant_id] - count)
+                if score > best_score or (score == best_score and restaurant_id < best_id):
+                    best_id, best_score = restaurant_id, score
+            name, address = self._rows[best_id]
+        return {
+            "id": best_id,
+            "name": name,
+            "address": address,
+            "confidence": _as_real(best_score),
+        }
+
+    def is_restaurant(self, restaurant_name, threshold=FUZZY_MATCH_THRESHOLD):
+        """Same contract as pipeline.transform.is_restaurant: (exists, matched_name)."""
+        if self.exact_match(restaurant_name):
+            return True, restaurant_name
+        result = self.best_match(restaurant_name)
+        return bool(result and result["confidence"] > threshold), (
+            result["name"] if result else None
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _on_restaurant_inserted(restaurant_id, name, address):
+    get_trigram_index().add(restaurant_id, name, address)
+
+
+def get_trigram_index():
+    """Returns the process-wide trigram index, subscribing it to restaurant inserts on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TrigramIndex()
+                register_restaurant_listener(_on_restaurant_inserted)
+    return _index
+
+
+def load_trigram_index(conn):
+    """Builds the process-wide trigram index from the restaurant table, e.g. at startup."""
+    start = time.perf_counter()
+    index = get_trigram_index()
+    index.refresh(conn)
+    logging.info(
+        f"[{PHASE}]: Loaded {len(index)} restaurants in {time.perf_counter() - start:.2f}s."
+    )
+    return index
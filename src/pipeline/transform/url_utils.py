@@ -1,6 +1,12 @@
 # ./src/pipeline/transform/url_utils.py
 import re
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Links are followed from the main content, headers, navigation and <div> sections
+LINK_SECTIONS = frozenset({"main", "nav", "h1", "h2", "h3", "div"})
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid)$", re.IGNORECASE)
 
 
 def extract_homepage(target_url):
@@ -15,23 +21,56 @@ def extract_homepage(target_url):
     return homepage
 
 
-def identify_urls_from_soup(soup, base_url):
+def canonicalize_link(url):
     """
-    Extracts relevant URLs only from the main content, headers, navigation, and now <div><p> sections.
+    Canonical form of an absolute http(s) URL, so one page linked several ways
+    is queued once: lowercase scheme and host, no default port, no fragment or
+    tracking parameters, "/" for an empty path. Returns None for other schemes.
+    Unlike validate's normalize_url, the rest of the query is kept: it often
+    selects the page (?id=2).
+    Example:
+        Input: "HTTPS://Www.Example.com:443/menu?utm_source=x&id=2#dinner"
+        Output: "https://www.example.com/menu?id=2"
     """
-    urls = set()
-    main_content = soup.find("main") or soup.find("div", class_="content")
-    navbar = soup.find("nav")
-    headers = soup.find_all(["h1", "h2", "h3"])
-    div_paragraphs = soup.find_all("div")
+    try:
+        parsed = urlparse(url.strip())
+        port = parsed.port
+    except ValueError:
+        return None
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+    netloc = parsed.hostname
+    if ":" in netloc:
+        netloc = f"[{netloc}]"
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    query = parsed.query
+    if query:
+        params = parse_qsl(query, keep_blank_values=True)
+        kept = [(k, v) for k, v in params if not TRACKING_PARAMS.match(k)]
+        if len(kept) != len(params):
+            query = urlencode(kept)
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, query, ""))
 
-    for section in [main_content, navbar] + headers + div_paragraphs:
-        if section:
-            for link in section.find_all("a", href=True):
-                url = urljoin(
-                    base_url, link["href"]
-                )  # Convert relative URLs to absolute
-                if url.startswith("http"):
-                    urls.add(url)
 
-    return list(urls)
+def identify_urls(analysis):
+    """
+    Extracts relevant URLs from a PageAnalysis: links that sit in the main
+    content, headers, navigation, or <div> sections. Each anchor is visited once.
+    Returns {canonical url: section tags around any of its links}, in page order.
+    """
+    urls = {}
+    for anchor in analysis.anchors:
+        if not LINK_SECTIONS.intersection(anchor.sections):
+            continue
+        url = canonicalize_link(anchor.url)
+        if url is None:
+            continue
+        seen = urls.get(url)
+        urls[url] = (
+            anchor.sections
+            if seen is None
+            else tuple(dict.fromkeys(seen + anchor.sections))
+        )
+    return urls
@@ -15,6 +15,7 @@ from database.db_operations import (
     insert_into_url_priority_queue,
     get_domain_quality_score,
 )
+from pipeline.extract.politeness import is_allowed
 
 # Phase name for logging consistency
 PHASE = "VALIDATE"
@@ -52,7 +53,7 @@ def calculate_priority_score(relevance, url_score):
 def validate_url(url_pair):
     """
     Validates and processes a (url, relevance_score) tuple:
-      1. Normalizes the URL.
+      1. Normalizes the URL and drops it if robots.txt disallows it.
       2. Checks/updates the domain (or inserts if new).
       3. Checks/updates the source.
       4. Checks if the URL exists:
@@ -69,6 +70,11 @@ def validate_url(url_pair):
 
         logging.info(f"[{PHASE}]: Processing URL: {norm_url}")
 
+        # Never queue what we aren't allowed to fetch
+        if not is_allowed(norm_url):
+            logging.info(f"[{PHASE}]: Disallowed by robots.txt, dropping {norm_url}.")
+            return
+
         # Step 1: Handle domain
         dom_id = check_domain_exists(domain_str, conn)
         if dom_id:
@@ -4,6 +4,16 @@ from database.db_operations import (
     get_url_priority_queue_length,
     get_restaurant_priority_queue_length,
 )
+from database.db_connector import get_pool_stats
+from pipeline.transform.mention_cache import get_mention_cache
+from pipeline.extract.response_cache import get_response_cache_stats
+from pipeline.extract.fetcher import get_fetch_stats
+from pipeline.extract.near_duplicates import get_simhash_stats
+from pipeline.transform.identify_restaurants import get_ner_input_stats
+from pipeline.transform.relevance_gate import get_relevance_gate
+from pipeline.transform.structured_data import get_structured_data_stats
+from pipeline.transform.ner_cache import get_ner_cache_stats
+from utils.http_client import get_http_stats
 from pipeline.initialize import get_restaurant_batch
 from queue_manager.task_queues import search_queue
 
@@ -16,13 +26,111 @@ def print_queue_contents(conn, queues):
         f"search_queue: {queues['search_queue'].qsize()} tasks\n"
         f"validate_queue: {queues['validate_queue'].qsize()} tasks\n"
         f"extract_queue: {url_count} tasks\n"
-        f"transform_queue: {queues['transform_queue'].qsize()} tasks\n"
+        f"transform_queue: {queues['transform_queue'].qsize()} tasks "
+        f"({queues['transform_queue'].bytes} bytes)\n"
         f"load_queue: {queues['load_queue'].qsize()} tasks\n"
         f"verify_queue: {rest_count} tasks\n"
         "--------------------"
     )
     logging.info(log_message)
 
+    pool = get_pool_stats()
+    if pool:
+        logging.info(
+            "--- DB Pool ---\n"
+            f"in_use: {pool['in_use']}/{pool['max_size']} "
+            f"(utilization {pool['utilization']:.0%}, peak {pool['peak_in_use']})\n"
+            f"idle: {pool['idle']}\n"
+            f"checkouts: {pool['checkouts']} (waited {pool['waits']}, timeouts {pool['timeouts']})\n"
+            f"wait_time: avg {pool['avg_wait_time'] * 1000:.1f}ms, max {pool['max_wait_time'] * 1000:.1f}ms\n"
+            "---------------"
+        )
+
+    cache = get_mention_cache().stats()
+    logging.info(
+        "--- Mention Cache ---\n"
+        f"size: {cache['size']}/{cache['maxsize']}\n"
+        f"hits: {cache['hits']}, misses: {cache['misses']} (hit rate {cache['hit_rate']:.0%})\n"
+        f"evictions: {cache['evictions']}, expirations: {cache['expirations']}, "
+        f"invalidations: {cache['invalidations']}\n"
+        "---------------------"
+    )
+
+    http = get_http_stats()
+    logging.info(
+        "--- HTTP Clients ---\n"
+        f"requests: {http['requests']} (HTTP/2 {http['http2_responses']})\n"
+        f"connections opened: {http['connections_opened']} "
+        f"(reuse ratio {http['reuse_ratio']:.0%})\n"
+        "--------------------"
+    )
+
+    fetch = get_fetch_stats()
+    if fetch:
+        logging.info(
+            "--- Fetcher ---\n"
+            f"bytes downloaded: {fetch['bytes_downloaded']}\n"
+            f"abandoned: {fetch['too_large']} too large, {fetch['not_html']} not HTML\n"
+            "---------------"
+        )
+
+    duplicates = get_simhash_stats()
+    if duplicates:
+        logging.info(
+            "--- Near Duplicates ---\n"
+            f"pages: {duplicates['pages']}, indexed: {duplicates['indexed']}, "
+            f"too short: {duplicates['short']}\n"
+            f"near-duplicates found: {duplicates['duplicates']} "
+            f"({duplicates['duplicate_rate']:.0%})\n"
+            "-----------------------"
+        )
+
+    ner_input = get_ner_input_stats()
+    logging.info(
+        "--- NER Input ---\n"
+        f"pages: {ner_input['pages']}, tokens: {ner_input['ner_tokens']} "
+        f"of {ner_input['page_tokens']} (boilerplate removed {ner_input['reduction']:.0%})\n"
+        "-----------------"
+    )
+
+    gate = get_relevance_gate().stats()
+    logging.info(
+        "--- Relevance Gate ---\n"
+        f"trained: {gate['trained']}, pages: {gate['pages']}, "
+        f"NER skipped: {gate['skipped']} ({gate['skip_rate']:.0%})\n"
+        "----------------------"
+    )
+
+    structured = get_structured_data_stats()
+    logging.info(
+        "--- Structured Data ---\n"
+        f"pages: {structured['pages']}, with restaurants: {structured['with_restaurants']} "
+        f"({structured['names']} names)\n"
+        f"NER skipped: {structured['fast_path']} (fire rate {structured['fire_rate']:.0%})\n"
+        "-----------------------"
+    )
+
+    ner_cache = get_ner_cache_stats()
+    if ner_cache:
+        logging.info(
+            "--- NER Cache ---\n"
+            f"entries: {ner_cache['entries']} ({ner_cache['bytes']}/{ner_cache['max_bytes']} bytes)\n"
+            f"hits: {ner_cache['hits']}, misses: {ner_cache['misses']} "
+            f"(hit rate {ner_cache['hit_rate']:.0%}), evictions: {ner_cache['evictions']}\n"
+            "-----------------"
+        )
+
+    responses = get_response_cache_stats()
+    if responses:
+        logging.info(
+            "--- Response Cache ---\n"
+            f"conditional requests: {responses['conditional_requests']}, "
+            f"304s: {responses['not_modified']}, unchanged 200s: {responses['unchanged']}\n"
+            f"transforms skipped: {responses['transforms_skipped']}, "
+            f"bytes saved: {responses['bytes_saved']}\n"
+            "----------------------"
+        )
+
 
 def initialize_restaurants(
     r_json="michelin_restaurants.json", progress="progress_tracker.json"
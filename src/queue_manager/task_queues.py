@@ -1,8 +1,63 @@
+import os
 import queue
+import time
 
 MAX_QUEUE_SIZE = 10000
+# Budget for pages waiting to be transformed, counted in compressed bytes
+TRANSFORM_QUEUE_MAX_BYTES = int(
+    os.getenv("TRANSFORM_QUEUE_MAX_BYTES", 256 * 1024 * 1024)
+)
+
+
+class ByteBoundedQueue(queue.Queue):
+    """
+    A queue.Queue bounded by the total size of its items instead of their count.
+    put() blocks while the items queued add up to `max_bytes`; an item larger
+    than the whole budget is still let through once the queue is empty.
+    Items report their size through `sizeof` (None sentinels count as 0).
+    """
+
+    def __init__(self, max_bytes, sizeof=lambda item: getattr(item, "nbytes", 0)):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._sizeof = sizeof
+
+    def _has_room(self, size):
+        return self.bytes == 0 or self.bytes + size <= self.max_bytes
+
+    def put(self, item, block=True, timeout=None):
+        size = self._sizeof(item)
+        with self.not_full:
+            if not block:
+                if not self._has_room(size):
+                    raise queue.Full
+            elif timeout is None:
+                while not self._has_room(size):
+                    self.not_full.wait()
+            elif timeout < 0:
+                raise ValueError("'timeout' must be a non-negative number")
+            else:
+                endtime = time.monotonic() + timeout
+                while not self._has_room(size):
+                    remaining = endtime - time.monotonic()
+                    if remaining <= 0.0:
+                        raise queue.Full
+                    self.not_full.wait(remaining)
+            self._put(item)
+            self.bytes += size
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _get(self):
+        item = super()._get()
+        self.bytes -= self._sizeof(item)
+        # Several smaller puts may fit in the space one item freed
+        self.not_full.notify_all()
+        return item
+
 
 search_queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
 validate_queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
-transform_queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
+transform_queue = ByteBoundedQueue(TRANSFORM_QUEUE_MAX_BYTES)
 load_queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
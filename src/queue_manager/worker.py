@@ -1,10 +1,10 @@
 import logging
-from database.db_operations import get_url_priority_queue_length
+import queue as queue_module
 import time
 from database.db_operations import (
     get_url_priority_queue_length,
 )
-from database.db_connector import get_db_connection
+from database.db_connector import db_connection
 
 
 def worker(queue, func, worker_name="WORKER"):
@@ -32,14 +32,60 @@ def worker(queue, func, worker_name="WORKER"):
             queue.task_done()
 
 
+def batch_worker(queue, func, batch_size, max_latency_ms, worker_name="BATCH_WORKER"):
+    """
+    A micro-batching worker loop. Blocks for the first item, then keeps draining
+    `queue` until it holds `batch_size` items or `max_latency_ms` has passed,
+    and calls `func(items)` once for the whole batch.
+    """
+    running = True
+    while running:
+        first = queue.get()
+        if first is None:
+            queue.task_done()
+            logging.info(f"[{worker_name}] Received shutdown signal.")
+            break
+
+        batch = [first]
+        deadline = time.monotonic() + max_latency_ms / 1000.0
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = queue.get(timeout=remaining)
+            except queue_module.Empty:
+                break
+            if item is None:
+                queue.task_done()
+                logging.info(f"[{worker_name}] Received shutdown signal.")
+                running = False
+                break
+            batch.append(item)
+
+        try:
+            logging.info(f"[{worker_name}] Starting batch of {len(batch)}")
+            func(batch)
+            logging.info(f"[{worker_name}] Batch complete.")
+        except Exception as e:
+            logging.error(f"[{worker_name}] Error: {e}")
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
 def extract_worker(func, stop_event, poll_interval=5):
-    conn = get_db_connection()
     while not stop_event.is_set():
         try:
-            if get_url_priority_queue_length(conn) > 0:
+            with db_connection() as conn:
+                pending = get_url_priority_queue_length(conn)
+            if pending > 0:
                 logging.info("[EXTRACT_WORKER] Starting task")
-                func()
+                processed = func()
                 logging.info("[EXTRACT_WORKER] Task complete.")
+                if not processed:
+                    # Everything left may be leased by other workers
+                    time.sleep(poll_interval)
             else:
                 time.sleep(poll_interval)
         except Exception as e:
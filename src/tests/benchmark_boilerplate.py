@@ -0,0 +1,81 @@
+"""
+Measures what boilerplate removal saves before NER, and what it costs in recall.
+
+For each saved page in tests/data, counts the words in the full visible text
+and in the main-content text NER now receives, then runs the NER model over
+both and reports the share of full-text mentions still found in the main
+content (recall), and the inference time of each. Run from src/:
+
+    python -m tests.benchmark_boilerplate [model]
+
+The model defaults to NER_MODEL; without it installed only token counts are shown.
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+from pipeline.transform.ner_engine import NEREngine, NER_MODEL
+from utils.page_analysis import analyze
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            page = json.load(f)
+        analysis = analyze(page["html"].encode("utf-8"), page["url"], "utf-8")
+        pages.append((os.path.basename(path), analysis))
+    return pages
+
+
+def timed_mentions(engine, text):
+    start = time.perf_counter()
+    mentions = set(engine.extract(text))
+    return mentions, time.perf_counter() - start
+
+
+def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else NER_MODEL
+    engine = NEREngine(model_name=model)
+    try:
+        engine.load()
+    except OSError as e:
+        print(f"NER model {model} unavailable ({e}); reporting token counts only.\n")
+        engine = None
+
+    print(
+        f"{'page':<30} {'full':>7} {'main':>7} {'removed':>8}"
+        + (f" {'recall':>7} {'full s':>7} {'main s':>7}" if engine else "")
+    )
+    totals = {"full": 0, "main": 0, "found": 0, "kept": 0, "full_s": 0.0, "main_s": 0.0}
+    for name, a in load_pages():
+        full, main = len(a.text.split()), len(a.main_text.split())
+        totals["full"] += full
+        totals["main"] += main
+        line = f"{name:<30} {full:>7} {main:>7} {1 - main / full if full else 0:>8.0%}"
+        if engine:
+            full_mentions, full_s = timed_mentions(engine, a.text)
+            main_mentions, main_s = timed_mentions(engine, a.main_text or a.text)
+            kept = len(full_mentions & main_mentions)
+            totals["found"] += len(full_mentions)
+            totals["kept"] += kept
+            totals["full_s"] += full_s
+            totals["main_s"] += main_s
+            recall = kept / len(full_mentions) if full_mentions else 1.0
+            line += f" {recall:>7.0%} {full_s:>7.2f} {main_s:>7.2f}"
+        print(line)
+
+    removed = 1 - totals["main"] / totals["full"] if totals["full"] else 0
+    line = f"{'total':<30} {totals['full']:>7} {totals['main']:>7} {removed:>8.0%}"
+    if engine:
+        recall = totals["kept"] / totals["found"] if totals["found"] else 1.0
+        line += f" {recall:>7.0%} {totals['full_s']:>7.2f} {totals['main_s']:>7.2f}"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
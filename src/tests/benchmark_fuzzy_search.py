@@ -0,0 +1,93 @@
+"""
+Benchmarks fuzzy_search_restaurant_name at different restaurant table sizes.
+
+Each size is loaded into a session-local TEMP table named `restaurant`, which
+shadows the real table (pg_temp is first on the search_path), so the real data
+is never touched. Run from src/ against a database with schema.sql and
+fuzzy_search.sql applied:
+
+    python -m tests.benchmark_fuzzy_search [1000 100000 1000000]
+"""
+
+import random
+import statistics
+import sys
+import time
+from database.db_connector import create_db_connection
+
+SIZES = [1_000, 100_000, 1_000_000]
+QUERIES = 50
+# The pre-index query: scores and sorts every row
+LEGACY_QUERY = """
+    SELECT id, name, address, similarity(name, %s) AS confidence
+    FROM restaurant ORDER BY confidence DESC LIMIT 1
+"""
+INDEXED_QUERY = (
+    "SELECT id, name, address, confidence FROM fuzzy_search_restaurant_name(%s, %s)"
+)
+
+WORDS = [
+    "Palace", "Kitchen", "Bistro", "Sushi", "Taqueria", "Trattoria", "House",
+    "Garden", "Grill", "Noodle", "Bar", "Cafe", "Osteria", "Diner", "Cantina",
+]
+
+
+def load_restaurants(cur, size):
+    cur.execute("DROP TABLE IF EXISTS pg_temp.restaurant")
+    cur.execute(
+        "CREATE TEMP TABLE restaurant (id SERIAL PRIMARY KEY, name TEXT NOT NULL, address TEXT)"
+    )
+    cur.execute(
+        """
+        INSERT INTO restaurant (name, address)
+        SELECT initcap(substr(md5(i::text), 1, 3 + i %% 5)) || ' '
+                   || (%s::text[])[1 + i %% %s] || ' ' || (i %% 997),
+               i || ' Main St.'
+        FROM generate_series(1, %s) AS i
+        """,
+        (WORDS, len(WORDS), size),
+    )
+    cur.execute("CREATE INDEX ON restaurant USING gin (name gin_trgm_ops)")
+    cur.execute("ANALYZE restaurant")
+    cur.execute("SELECT name FROM restaurant ORDER BY random() LIMIT %s", (QUERIES,))
+    return [r[0] for r in cur.fetchall()]
+
+
+def perturb(name, rng):
+    chars = list(name)
+    chars[rng.randrange(len(chars))] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def time_queries(cur, query, terms, extra=()):
+    timings = []
+    for term in terms:
+        start = time.perf_counter()
+        cur.execute(query, (term, *extra))
+        cur.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main(sizes):
+    rng = random.Random(0)
+    conn = create_db_connection()
+    try:
+        with conn.cursor() as cur:
+            print(f"{'rows':>10} | {'query':<8} | {'p50 ms':>8} | {'p95 ms':>8}")
+            for size in sizes:
+                names = load_restaurants(cur, size)
+                terms = [perturb(n, rng) for n in names]
+                terms += ["Michelin Guide", "Los Angeles Times", "Eater LA"]
+                indexed = time_queries(cur, INDEXED_QUERY, terms, (0.75,))
+                legacy = time_queries(cur, LEGACY_QUERY, terms[:10])
+                print(f"{size:>10} | {'indexed':<8} | {indexed[0]:>8.2f} | {indexed[1]:>8.2f}")
+                print(f"{size:>10} | {'legacy':<8} | {legacy[0]:>8.2f} | {legacy[1]:>8.2f}")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or SIZES)
@@ -0,0 +1,75 @@
+"""
+Benchmarks the shared keep-alive HTTP clients against one-connection-per-request
+fetching, using HOSTS local HTTP/1.1 keep-alive servers (tests/local_http_server.py),
+each in its own process. Every response is delayed by LATENCY seconds to stand
+in for a remote host. Run from src/:
+
+    python -m tests.benchmark_http_client [requests] [latency]
+"""
+
+import subprocess
+import sys
+import time
+import requests
+from pipeline.extract.fetcher import AsyncFetcher
+from utils.http_client import ConnectionStats, create_client, AsyncClientLoop
+
+REQUESTS = 500
+LATENCY = 0.02
+HOSTS = 8
+
+
+def bench(label, fn, n, stats=None):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    line = f"{label:<32} {n / elapsed:8.0f} req/s"
+    if stats is not None:
+        s = stats.stats()
+        line += f"   connections {s['connections_opened']:4d}   reuse {s['reuse_ratio']:.1%}"
+    else:
+        line += f"   connections {n:4d}   reuse {0:.1%}"
+    print(line)
+
+
+def main(n=REQUESTS, latency=LATENCY):
+    servers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "tests.local_http_server", str(latency)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(HOSTS)
+    ]
+    base_urls = [server.stdout.readline().strip() for server in servers]
+    urls = [f"{base_urls[i % HOSTS]}/page/{i}" for i in range(n)]
+    try:
+        # Old behaviour: module-level requests.get opens a connection per call
+        bench("requests.get per URL", lambda: [requests.get(u, timeout=10) for u in urls], n)
+
+        stats = ConnectionStats()
+        with create_client(stats) as client:
+            bench("shared client, sequential", lambda: [client.get(u) for u in urls], n, stats)
+
+        stats = ConnectionStats()
+        loop = AsyncClientLoop(stats)
+        fetcher = AsyncFetcher(concurrency=32, per_host=8, client_loop=loop)
+        try:
+            bench(
+                "shared async client, 32 in flight",
+                lambda: [fetcher.fetch_many(urls[i : i + 100]) for i in range(0, n, 100)],
+                n,
+                stats,
+            )
+        finally:
+            loop.close()
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS,
+        float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY,
+    )
@@ -0,0 +1,90 @@
+"""
+Compares the old soup-based link discovery, which ran find_all("a") inside
+every <main>, <nav>, header and <div> (so an anchor was visited once per
+enclosing div), with identify_urls over the single-pass page analysis.
+
+Uses the saved pages in tests/data, plus synthetic div-heavy pages of growing
+nesting depth, the case where the old version degrades. Run from src/:
+
+    python -m tests.benchmark_link_extraction [repeats]
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from pipeline.transform.url_utils import identify_urls
+from utils.page_analysis import analyze
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEPTHS = [5, 20, 50]
+LINKS_PER_PAGE = 400
+
+
+def legacy_identify_urls_from_soup(soup, base_url):
+    """The replaced implementation, kept here as the baseline."""
+    urls = set()
+    main_content = soup.find("main") or soup.find("div", class_="content")
+    navbar = soup.find("nav")
+    headers = soup.find_all(["h1", "h2", "h3"])
+    div_paragraphs = soup.find_all("div")
+
+    for section in [main_content, navbar] + headers + div_paragraphs:
+        if section:
+            for link in section.find_all("a", href=True):
+                url = urljoin(base_url, link["href"])
+                if url.startswith("http"):
+                    urls.add(url)
+
+    return list(urls)
+
+
+def nested_page(depth, links=LINKS_PER_PAGE):
+    """`links` anchors, each at the bottom of `depth` nested divs."""
+    block = "".join(
+        "<div>" * depth + f'<p><a href="/r/{i}#top">Restaurant {i}</a></p>' + "</div>" * depth
+        for i in range(links)
+    )
+    return f"<html><body><main>{block}</main></body></html>"
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def compare(name, url, html, repeats):
+    content = html.encode("utf-8")
+    legacy_time, legacy = timed(
+        lambda: legacy_identify_urls_from_soup(BeautifulSoup(html, "html.parser"), url),
+        repeats,
+    )
+    new_time, links = timed(lambda: identify_urls(analyze(content, url, "utf-8")), repeats)
+    print(
+        f"{name:<28} {legacy_time * 1000:>10.1f} {new_time * 1000:>10.1f} "
+        f"{legacy_time / new_time:>8.1f}x {len(legacy):>7} {len(links):>7}"
+    )
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(
+        f"{'page':<28} {'legacy ms':>10} {'new ms':>10} {'speedup':>9} "
+        f"{'legacy':>7} {'new':>7}"
+    )
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            page = json.load(f)
+        compare(os.path.basename(path), page["url"], page["html"], repeats)
+    for depth in DEPTHS:
+        compare(f"nested divs, depth {depth}", "https://a.com/", nested_page(depth), repeats)
+    print("(legacy/new: distinct URLs found; new ones are canonicalized and deduplicated)")
+
+
+if __name__ == "__main__":
+    main()
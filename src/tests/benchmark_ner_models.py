@@ -0,0 +1,117 @@
+"""
+Compares NER model tiers on throughput, memory and accuracy.
+
+Each tier runs in its own process over the main-content text of the saved pages
+in tests/data, so its peak RSS (resource.getrusage) is its own. A page's labels
+are the known restaurant names it mentions, taken from the restaurant table;
+precision is the share of a tier's mentions that are known restaurants, and
+recall the share of labelled names it found. Run from src/:
+
+    python -m tests.benchmark_ner_models [tier ...]
+
+Tiers default to sm md lg trf onnx; tiers whose model isn't installed are
+reported and skipped. Without a database the pages' own JSON-LD restaurant
+names stand in for the restaurant table.
+"""
+
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from database.db_connector import db_connection
+from database.db_operations import get_restaurants_after_id
+from pipeline.transform.gazetteer import Gazetteer
+from pipeline.transform.identify_restaurants import ner_text
+from pipeline.transform.name_utils import normalize_name
+from pipeline.transform.ner_engine import NER_MODEL_TIERS, ONNX_TIER, create_ner_engine
+from pipeline.transform.structured_data import structured_restaurants
+from tests.benchmark_boilerplate import load_pages
+
+TIERS = [*NER_MODEL_TIERS, ONNX_TIER]
+BATCH_SIZE = 8
+
+
+def known_restaurants(analyses):
+    """Restaurant names from the restaurant table, or from the pages' JSON-LD without a DB."""
+    try:
+        with db_connection(timeout=5) as conn:
+            rows = get_restaurants_after_id(0, conn)
+    except Exception as e:
+        print(f"Restaurant table unavailable ({e}).")
+        rows = []
+    if rows:
+        return [name for _, name, _ in rows], "restaurant table"
+    names = [name for a in analyses for name in structured_restaurants(a)]
+    return names, "page JSON-LD"
+
+
+def run_tier(tier, texts):
+    """In a child process: loads the tier, runs it over `texts`, reports timings and peak RSS."""
+    engine = create_ner_engine(tier)
+    start = time.perf_counter()
+    engine.load()
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    mentions = engine.extract_many(texts, batch_size=BATCH_SIZE)
+    infer_s = time.perf_counter() - start
+    # KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return mentions, load_s, infer_s, peak_rss
+
+
+def score(mentions, labels, known):
+    """Micro-averaged precision and recall over every page."""
+    predicted = correct = expected = found = 0
+    for page_mentions, page_labels in zip(mentions, labels):
+        keys = {normalize_name(m) for m in page_mentions}
+        predicted += len(keys)
+        correct += len(keys & known)
+        expected += len(page_labels)
+        found += len(page_labels & keys)
+    precision = correct / predicted if predicted else 0.0
+    recall = found / expected if expected else 0.0
+    return precision, recall
+
+
+def main():
+    tiers = sys.argv[1:] or TIERS
+    analyses = [a for _, a in load_pages()]
+    texts = [ner_text(a) for a in analyses]
+    names, source = known_restaurants(analyses)
+
+    gazetteer = Gazetteer()
+    for name in names:
+        gazetteer.add(name)
+    known = {normalize_name(name) for name in names}
+    labels = [{normalize_name(n) for n in gazetteer.find(text)} for text in texts]
+    print(
+        f"{len(texts)} pages, {sum(len(t.split()) for t in texts)} words, "
+        f"{sum(map(len, labels))} labelled mentions of {len(known)} names ({source}).\n"
+    )
+
+    print(
+        f"{'tier':<6} {'load s':>7} {'pages/s':>8} {'peak RSS':>10} "
+        f"{'precision':>10} {'recall':>7}"
+    )
+    for tier in tiers:
+        # A fresh process per tier, so one model's memory doesn't count against the next
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            try:
+                mentions, load_s, infer_s, peak_rss = pool.submit(
+                    run_tier, tier, texts
+                ).result()
+            except (OSError, ImportError) as e:
+                print(f"{tier:<6} unavailable: {e}")
+                continue
+        precision, recall = score(mentions, labels, known)
+        print(
+            f"{tier:<6} {load_s:>7.1f} {len(texts) / infer_s:>8.1f} "
+            f"{peak_rss / 1024:>8.0f}MB {precision:>10.0%} {recall:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
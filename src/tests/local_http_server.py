@@ -0,0 +1,53 @@
+import gzip
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = (
+    b"<html><body>"
+    + b"<p>Fancy Bistro serves a tasting menu worth the trip.</p>" * 200
+    + b"</body></html>"
+)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Serves PAGE over HTTP/1.1 keep-alive, gzipped when the client accepts it."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus delayed
+    # ACKs stall every keep-alive response by ~40ms
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        body = PAGE
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_local_server(latency=0.0):
+    """
+    Starts the server on a free port; returns (server, base_url).
+    `latency` seconds are added to every response to stand in for a remote host.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    # Serve from a separate process so benchmarks don't share the GIL with the server
+    server, base_url = start_local_server(float(sys.argv[1]) if len(sys.argv) > 1 else 0.0)
+    print(base_url, flush=True)
+    threading.Event().wait()
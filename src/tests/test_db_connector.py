@@ -0,0 +1,87 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+from database.db_connector import ConnectionPool, PooledConnection
+
+
+def make_conn():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@pytest.fixture
+def pool():
+    p = ConnectionPool(minconn=1, maxconn=2, timeout=0.2, connect=make_conn)
+    yield p
+    p.close()
+
+
+def test_pool_reuses_released_connection(pool):
+    c1 = pool.acquire()
+    pool.release(c1)
+    c2 = pool.acquire()
+    assert c1 is c2
+    assert pool.stats()["connections_created"] == 1
+
+
+def test_pool_grows_to_max_then_times_out(pool):
+    pool.acquire()
+    pool.acquire()
+    assert pool.stats()["size"] == 2
+    with pytest.raises(PoolError):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_blocks_until_release(pool):
+    c1 = pool.acquire()
+    c2 = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(c1,)).start()
+    c3 = pool.acquire(timeout=2)
+    assert c3 is c1
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["max_wait_time"] > 0
+    pool.release(c2)
+    pool.release(c3)
+
+
+def test_pool_discards_closed_connection(pool):
+    c1 = pool.acquire()
+    c1.closed = 1
+    pool.release(c1)
+    c2 = pool.acquire()
+    assert c2 is not c1
+    assert pool.stats()["connections_discarded"] == 1
+
+
+def test_pool_rolls_back_open_transaction_on_release(pool):
+    c1 = pool.acquire()
+    c1.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+    pool.release(c1)
+    c1.rollback.assert_called_once()
+
+
+def test_pool_health_check_pings_idle_connection():
+    p = ConnectionPool(minconn=1, maxconn=1, health_check_interval=0, connect=make_conn)
+    conn = p.acquire()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.execute.assert_called_once_with("SELECT 1")
+    p.release(conn)
+    p.close()
+
+
+def test_pooled_connection_close_returns_to_pool(pool):
+    pc = PooledConnection(pool, pool.acquire())
+    assert pool.stats()["in_use"] == 1
+    pc.cursor()
+    pc.close()
+    pc.close()
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+    assert stats["utilization"] == 0
@@ -14,10 +14,15 @@ from database.db_operations import (
     # URL
     insert_url,
     check_url_exists,
+    check_url_id_exists,
     update_last_crawled,
+    mark_url_duplicate,
     # Restaurant
     insert_restaurant,
     check_restaurant_exists,
+    get_restaurants_after_id,
+    register_restaurant_listener,
+    unregister_restaurant_listener,
     # Reference
     insert_reference,
     # Priority Queues
@@ -28,10 +33,13 @@ from database.db_operations import (
     remove_from_restaurant_priority_queue,
     get_priority_queue_url,
     get_priority_queue_restaurant,
+    claim_priority_queue_urls,
+    release_url_lease,
     update_priority_queue_url,
     update_priority_queue_restaurant,
     # Custom
     fuzzy_search_restaurant_name,
+    batch_fuzzy_search_restaurant_names,
 )
 
 
@@ -148,6 +156,13 @@ def test_check_url_exists_mock(mock_conn):
     assert r == 202
 
 
+def test_check_url_id_exists_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchone.return_value = None
+    assert check_url_id_exists(202, mock_conn) is False
+    c.execute.assert_called_once_with("SELECT 1 FROM url WHERE id = %s", (202,))
+
+
 def test_update_last_crawled_mock(mock_conn):
     c = mock_conn.cursor.return_value.__enter__.return_value
     update_last_crawled(101, mock_conn)
@@ -156,6 +171,15 @@ def test_update_last_crawled_mock(mock_conn):
     )
 
 
+def test_mark_url_duplicate_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    mark_url_duplicate(102, 101, mock_conn)
+    c.execute.assert_called_once_with(
+        "UPDATE url SET duplicate_of = %s WHERE id = %s", (101, 102)
+    )
+    mock_conn.commit.assert_called_once()
+
+
 # ---------------- RESTAURANT ----------------
 def test_insert_restaurant_mock(mock_conn):
     c = mock_conn.cursor.return_value.__enter__.return_value
@@ -178,6 +202,30 @@ def test_check_restaurant_exists_mock(mock_conn):
     assert r == 404
 
 
+def test_get_restaurants_after_id_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchall.return_value = [(5, "A", "1 St"), (6, "B", None)]
+    r = get_restaurants_after_id(4, mock_conn)
+    c.execute.assert_called_once_with(
+        "SELECT id, name, address FROM restaurant WHERE id > %s ORDER BY id", (4,)
+    )
+    assert r == [(5, "A", "1 St"), (6, "B", None)]
+
+
+def test_insert_restaurant_notifies_listeners_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchone.return_value = (303,)
+    listener = MagicMock()
+    register_restaurant_listener(listener)
+    try:
+        insert_restaurant("Mock Cafe", "123 Mock St", mock_conn)
+        c.execute.side_effect = Exception("duplicate")
+        insert_restaurant("Mock Cafe", "123 Mock St", mock_conn)
+    finally:
+        unregister_restaurant_listener(listener)
+    listener.assert_called_once_with(303, "Mock Cafe", "123 Mock St")
+
+
 # ---------------- REFERENCE ----------------
 def test_insert_reference_mock(mock_conn):
     c = mock_conn.cursor.return_value.__enter__.return_value
@@ -247,6 +295,31 @@ def test_get_priority_queue_url_mock(mock_conn):
     assert r == (999, "https://mockurl.com", 88)
 
 
+def test_claim_priority_queue_urls_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchall.return_value = [(2, "https://b.com", 40), (1, "https://a.com", 90)]
+    r = claim_priority_queue_urls("worker-1", 5, 300, mock_conn)
+    query, params = c.execute.call_args[0]
+    assert "FOR UPDATE SKIP LOCKED" in query
+    assert "lease_expires_at < NOW()" in query
+    assert "PARTITION BY domain_id" not in query
+    assert params["batch_size"] == 5
+    assert params["worker_id"] == "worker-1"
+    assert params["lease_seconds"] == 300
+    mock_conn.commit.assert_called_once()
+    assert r == [(1, "https://a.com", 90), (2, "https://b.com", 40)]
+
+
+def test_release_url_lease_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    release_url_lease(7, "worker-a", mock_conn)
+    c.execute.assert_called_once_with(
+        "UPDATE url_priority_queue SET leased_by = NULL, lease_expires_at = NULL "
+        "WHERE url_id = %s AND leased_by = %s",
+        (7, "worker-a"),
+    )
+
+
 def test_get_priority_queue_restaurant_mock(mock_conn):
     c = mock_conn.cursor.return_value.__enter__.return_value
     c.fetchone.return_value = ("Resto X", 99)
@@ -307,6 +380,41 @@ def test_fuzzy_search_restaurant_name_mock(mock_conn):
     }
 
 
+def test_fuzzy_search_restaurant_name_threshold_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchone.return_value = None
+    r = fuzzy_search_restaurant_name("Resto", mock_conn, threshold=0.75)
+    c.execute.assert_called_once_with(
+        "SELECT id, name, address, confidence FROM fuzzy_search_restaurant_name(%s, %s)",
+        ("Resto", 0.75),
+    )
+    assert r is None
+
+
+def test_batch_fuzzy_search_restaurant_names_mock(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchall.return_value = [
+        ("Fancy Resto", 111, "Fancy Resto", "321 Street", 1.0, True),
+        ("Nothing", None, None, None, None, None),
+    ]
+    r = batch_fuzzy_search_restaurant_names(["Fancy Resto", "Nothing"], mock_conn, 0.75)
+    c.execute.assert_called_once_with(
+        "SELECT search_term, id, name, address, confidence, exact "
+        "FROM fuzzy_search_restaurant_names(%s::text[], %s)",
+        (["Fancy Resto", "Nothing"], 0.75),
+    )
+    assert r == {
+        "Fancy Resto": {
+            "id": 111,
+            "name": "Fancy Resto",
+            "address": "321 Street",
+            "confidence": 1.0,
+            "exact": True,
+        },
+        "Nothing": None,
+    }
+
+
 # =================================================================================================
 #                                        REAL DB TESTS
 # =================================================================================================
@@ -549,6 +657,72 @@ def test_get_priority_queue_url_db(db_connection):
     db_connection.commit()
 
 
+def test_claim_priority_queue_urls_db(db_connection):
+    d = insert_domain("claim-pq-url.com", 0.3, db_connection)
+    s = insert_source(d, "claim-pq-src", db_connection)
+    urls = [insert_url(f"https://claimpq{i}.com", s, db_connection) for i in range(3)]
+    for i, u in enumerate(urls):
+        insert_into_url_priority_queue(u, 10 + i, db_connection)
+
+    first = claim_priority_queue_urls("worker-a", 2, 300, db_connection)
+    second = claim_priority_queue_urls("worker-b", 2, 300, db_connection)
+    assert [row[0] for row in first] == [urls[2], urls[1]]
+    assert [row[0] for row in second] == [urls[0]]
+
+    # An expired lease is reclaimed by the next claim
+    with db_connection.cursor() as cur:
+        cur.execute(
+            "UPDATE url_priority_queue SET lease_expires_at = NOW() - INTERVAL '1 second' "
+            "WHERE url_id = %s",
+            (urls[2],),
+        )
+    db_connection.commit()
+    # Only the worker holding a lease can release it
+    release_url_lease(urls[1], "worker-b", db_connection)
+    with db_connection.cursor() as cur:
+        cur.execute(
+            "SELECT leased_by FROM url_priority_queue WHERE url_id = %s", (urls[1],)
+        )
+        assert cur.fetchone() == ("worker-a",)
+    release_url_lease(urls[1], "worker-a", db_connection)
+    third = claim_priority_queue_urls("worker-c", 5, 300, db_connection)
+    assert [row[0] for row in third] == [urls[2], urls[1]]
+
+    with db_connection.cursor() as cur:
+        cur.execute("DELETE FROM url_priority_queue WHERE url_id = ANY(%s)", (urls,))
+        cur.execute("DELETE FROM url WHERE id = ANY(%s)", (urls,))
+        cur.execute("DELETE FROM source WHERE id = %s", (s,))
+        cur.execute("DELETE FROM domain WHERE id = %s", (d,))
+    db_connection.commit()
+
+
+def test_claim_priority_queue_urls_per_domain_limit_db(db_connection):
+    d1 = insert_domain("claim-busy.com", 0.3, db_connection)
+    d2 = insert_domain("claim-quiet.com", 0.3, db_connection)
+    s1 = insert_source(d1, "claim-busy-src", db_connection)
+    s2 = insert_source(d2, "claim-quiet-src", db_connection)
+    busy = [insert_url(f"https://claim-busy.com/{i}", s1, db_connection) for i in range(4)]
+    quiet = insert_url("https://claim-quiet.com/1", s2, db_connection)
+    for u in busy:
+        insert_into_url_priority_queue(u, 90, db_connection)
+    insert_into_url_priority_queue(quiet, 10, db_connection)
+
+    rows = claim_priority_queue_urls(
+        "worker-a", 3, 300, db_connection, per_domain_limit=2
+    )
+    claimed = [row[0] for row in rows]
+    assert len(claimed) == 3
+    assert quiet in claimed
+
+    urls = busy + [quiet]
+    with db_connection.cursor() as cur:
+        cur.execute("DELETE FROM url_priority_queue WHERE url_id = ANY(%s)", (urls,))
+        cur.execute("DELETE FROM url WHERE id = ANY(%s)", (urls,))
+        cur.execute("DELETE FROM source WHERE id IN (%s, %s)", (s1, s2))
+        cur.execute("DELETE FROM domain WHERE id IN (%s, %s)", (d1, d2))
+    db_connection.commit()
+
+
 def test_get_priority_queue_restaurant_db(db_connection):
     insert_into_restaurant_priority_queue("PQ1", 20, db_connection)
     insert_into_restaurant_priority_queue("PQ2", 90, db_connection)
@@ -600,3 +774,17 @@ def test_fuzzy_search_restaurant_name_db(db_connection):
         assert all(k in r for k in ("id", "name", "address", "confidence"))
     else:
         assert r is None
+
+
+def test_batch_fuzzy_search_restaurant_names_db(db_connection):
+    r_id = insert_restaurant("Batch Resto", "1 Batch Way", db_connection)
+    r = batch_fuzzy_search_restaurant_names(
+        ["Batch Resto", "Batch Restoo", "zzzzzz"], db_connection, 0.5
+    )
+    assert r["Batch Resto"]["exact"] is True
+    assert r["Batch Resto"]["confidence"] == 1.0
+    assert r["Batch Restoo"]["name"] == "Batch Resto"
+    assert r["zzzzzz"] is None
+    with db_connection.cursor() as cur:
+        cur.execute("DELETE FROM restaurant WHERE id = %s", (r_id,))
+    db_connection.commit()
@@ -1,9 +1,14 @@
+import itertools
 import pytest
 import logging
 from unittest.mock import patch, MagicMock
-from bs4 import BeautifulSoup
 from queue_manager.task_queues import transform_queue
 from pipeline.extract import extract_content
+from pipeline.extract.fetcher import DEFERRED
+from pipeline.extract.frontier import Frontier
+from pipeline.extract.page import PageRecord
+from pipeline.extract.response_cache import ResponseCache
+from pipeline.extract.near_duplicates import SimHashIndex
 from queue_manager.task_queues import transform_queue
 from database.db_operations import (
     insert_domain,
@@ -19,6 +24,23 @@ from pipeline.extract import extract_content
 PHASE = "EXTRACT"
 
 
+@pytest.fixture(autouse=True)
+def allow_all_robots():
+    """
+    Keeps robots.txt lookups off the network, gives each test an empty frontier
+    and an empty in-memory fingerprint index, and treats every fetched page as new.
+    """
+    cache = MagicMock()
+    cache.store.return_value = True
+    with patch("pipeline.extract.is_allowed", return_value=True), patch(
+        "pipeline.extract.get_frontier",
+        return_value=Frontier(delay_for=lambda url: 0.0),
+    ), patch("pipeline.extract.get_response_cache", return_value=cache), patch(
+        "pipeline.extract.get_simhash_index", return_value=SimHashIndex(path=None)
+    ):
+        yield
+
+
 @pytest.fixture
 def mock_conn():
     """Fixture for a mock database connection."""
@@ -35,31 +57,76 @@ def db_connection():
 
 
 def test_extract_content_request_failure(mock_conn):
-    """If request_url fails (returns None), we remove URL from queue and keep going."""
+    """If the fetch fails (returns None), we remove URL from queue and keep going."""
     with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
-        "pipeline.extract.get_priority_queue_url",
-        side_effect=[(123, "https://fail.com", 50), None],
-    ), patch("pipeline.extract.request_url", return_value=None) as mock_req, patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(123, "https://fail.com", 50)], []],
+    ), patch("pipeline.extract.fetch_many", return_value=[None]) as mock_fetch, patch(
         "pipeline.extract.remove_from_url_priority_queue"
     ) as mock_remove:
 
         transform_queue.queue.clear()
         result = extract_content()
         assert result is False
-        mock_req.assert_called_once_with("https://fail.com")
+        mock_fetch.assert_called_once_with(["https://fail.com"])
         mock_remove.assert_called_once_with(123, mock_conn)
         assert transform_queue.qsize() == 0
 
 
+def test_extract_content_robots_and_deferred(mock_conn):
+    """Disallowed URLs are removed before fetching; deferred ones get their lease released."""
+    with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(1, "https://a.com/private", 50), (2, "https://b.com/", 40)], []],
+    ), patch(
+        "pipeline.extract.is_allowed", side_effect=lambda url: "private" not in url
+    ), patch(
+        "pipeline.extract.fetch_many", return_value=[DEFERRED]
+    ) as mock_fetch, patch(
+        "pipeline.extract.lease_owner", return_value="worker-1"
+    ), patch(
+        "pipeline.extract.remove_from_url_priority_queue"
+    ) as mock_remove, patch(
+        "pipeline.extract.release_url_lease"
+    ) as mock_release:
+
+        transform_queue.queue.clear()
+        assert extract_content() is False
+        mock_remove.assert_called_once_with(1, mock_conn)
+        mock_fetch.assert_called_once_with(["https://b.com/"])
+        mock_release.assert_called_once_with(2, "worker-1", mock_conn)
+        assert transform_queue.qsize() == 0
+
+
+def test_extract_content_drops_stale_entries_without_releasing(mock_conn):
+    """URLs held past their lease may be another worker's by now; their leases just lapse."""
+    frontier = Frontier(
+        delay_for=lambda url: 0.0, max_age=0, clock=itertools.count().__next__
+    )
+    with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
+        "pipeline.extract.get_frontier", return_value=frontier
+    ), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(5, "https://slow.com/", 50)], []],
+    ), patch(
+        "pipeline.extract.fetch_many"
+    ) as mock_fetch, patch(
+        "pipeline.extract.release_url_lease"
+    ) as mock_release:
+        assert extract_content() is False
+        mock_fetch.assert_not_called()
+        mock_release.assert_not_called()
+
+
 def test_extract_content_404(mock_conn):
     """404 => remove from queue, no transform enqueued."""
     resp_mock = MagicMock()
     resp_mock.status_code = 404
 
     with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
-        "pipeline.extract.get_priority_queue_url",
-        side_effect=[(999, "https://404.com", 60), None],
-    ), patch("pipeline.extract.request_url", return_value=resp_mock), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(999, "https://404.com", 60)], []],
+    ), patch("pipeline.extract.fetch_many", return_value=[resp_mock]), patch(
         "pipeline.extract.remove_from_url_priority_queue"
     ) as mock_remove:
 
@@ -76,16 +143,21 @@ def test_extract_content_5xx(mock_conn):
     resp_mock.status_code = 503
 
     with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
-        "pipeline.extract.get_priority_queue_url",
-        side_effect=[(321, "https://5xx.com", 80), None],
-    ), patch("pipeline.extract.request_url", return_value=resp_mock), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(321, "https://5xx.com", 80)], []],
+    ), patch("pipeline.extract.fetch_many", return_value=[resp_mock]), patch(
+        "pipeline.extract.lease_owner", return_value="worker-1"
+    ), patch(
         "pipeline.extract.update_priority_queue_url"
-    ) as mock_update:
+    ) as mock_update, patch(
+        "pipeline.extract.release_url_lease"
+    ) as mock_release:
 
         transform_queue.queue.clear()
         result = extract_content()
         assert result is False
         mock_update.assert_called_once_with(mock_conn, 321, 60.0)  # 80 * 0.75 = 60
+        mock_release.assert_called_once_with(321, "worker-1", mock_conn)
         assert transform_queue.qsize() == 0
 
 
@@ -94,11 +166,13 @@ def test_extract_content_minimal_content(mock_conn):
     resp_mock = MagicMock()
     resp_mock.status_code = 200
     resp_mock.text = "<html><body></body></html>"
+    resp_mock.content = resp_mock.text.encode("utf-8")
+    resp_mock.encoding = "utf-8"
 
     with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
-        "pipeline.extract.get_priority_queue_url",
-        side_effect=[(456, "https://empty.com", 30), None],
-    ), patch("pipeline.extract.request_url", return_value=resp_mock), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(456, "https://empty.com", 30)], []],
+    ), patch("pipeline.extract.fetch_many", return_value=[resp_mock]), patch(
         "pipeline.extract.remove_from_url_priority_queue"
     ) as mock_remove:
 
@@ -114,11 +188,13 @@ def test_extract_content_successful(mock_conn):
     resp_mock = MagicMock()
     resp_mock.status_code = 200
     resp_mock.text = "<html><body><p>Valid content here.</p></body></html>"
+    resp_mock.content = resp_mock.text.encode("utf-8")
+    resp_mock.encoding = "utf-8"
 
     with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
-        "pipeline.extract.get_priority_queue_url",
-        side_effect=[(888, "https://valid.com", 75), None],
-    ), patch("pipeline.extract.request_url", return_value=resp_mock), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(888, "https://valid.com", 75)], []],
+    ), patch("pipeline.extract.fetch_many", return_value=[resp_mock]), patch(
         "pipeline.extract.remove_from_url_priority_queue"
     ) as mock_remove:
 
@@ -129,11 +205,48 @@ def test_extract_content_successful(mock_conn):
         mock_remove.assert_called_once_with(888, mock_conn)
         assert transform_queue.qsize() == 1
 
-        # Verify transform_queue contents
+        # Verify transform_queue contents: the page's compressed analysis
         item = transform_queue.get()
-        assert item[0] == "https://valid.com"
-        assert item[1] == 75
-        assert isinstance(item[2], BeautifulSoup)
+        assert isinstance(item, PageRecord)
+        assert item.url == "https://valid.com"
+        assert item.priority == 75
+        assert item.analysis().text == "Valid content here."
+
+
+def test_extract_content_unchanged_pages(mock_conn, tmp_path):
+    """A 304, or a 200 with the same body as last time, marks the URL crawled and skips transform."""
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    page = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+    page.content = b"<html><body><p>Valid content here.</p></body></html>"
+    cache.store("https://same.com", page)
+    cache.store("https://etag.com", page)
+    not_modified = MagicMock(status_code=304)
+
+    with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
+        "pipeline.extract.get_response_cache", return_value=cache
+    ), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[[(1, "https://etag.com", 50), (2, "https://same.com", 40)], []],
+    ), patch(
+        "pipeline.extract.fetch_many", return_value=[not_modified, page]
+    ), patch(
+        "pipeline.extract.update_last_crawled"
+    ) as mock_crawled, patch(
+        "pipeline.extract.remove_from_url_priority_queue"
+    ) as mock_remove:
+
+        transform_queue.queue.clear()
+        assert extract_content() is False
+        assert [c.args[0] for c in mock_crawled.call_args_list] == [1, 2]
+        assert [c.args[0] for c in mock_remove.call_args_list] == [1, 2]
+        assert transform_queue.qsize() == 0
+
+    stats = cache.stats()
+    assert stats["not_modified"] == 1
+    assert stats["unchanged"] == 1
+    assert stats["transforms_skipped"] == 2
+    assert stats["bytes_saved"] == len(page.content)
+    cache.close()
 
 
 def test_extract_content_db(db_connection):
@@ -157,11 +270,13 @@ def test_extract_content_db(db_connection):
     insert_into_url_priority_queue(u_id, 99, db_connection)
     db_connection.commit()
 
-    with patch("pipeline.extract.requests.get") as mock_get:
+    with patch("pipeline.extract.fetch_many") as mock_fetch:
         resp_mock = MagicMock()
         resp_mock.status_code = 200
         resp_mock.text = "<html><body>Real DB test content here</body></html>"
-        mock_get.return_value = resp_mock
+        resp_mock.content = resp_mock.text.encode("utf-8")
+        resp_mock.encoding = "utf-8"
+        mock_fetch.return_value = [resp_mock]
 
         success = extract_content()
         assert success is True
@@ -173,6 +288,71 @@ def test_extract_content_db(db_connection):
         # Check transform queue has 1 item
         assert transform_queue.qsize() == 1
         item = transform_queue.get()
-        assert item[0] == "https://test-extract.com/page"
-        assert item[1] == 99
-        assert "Real DB test content" in item[2].get_text()
+        assert item.url == "https://test-extract.com/page"
+        assert item.priority == 99
+        assert "Real DB test content" in item.analysis().text
+
+
+def near_duplicate_pages():
+    """Two fetched pages with the same article and different footers."""
+    article = " ".join(
+        f"The tasting menu at Fancy Bistro changes with course {i}." for i in range(20)
+    )
+    pages = []
+    for footer in ("Copyright A Site", "Copyright Another Site"):
+        resp = MagicMock(status_code=200, encoding="utf-8")
+        resp.content = f"<html><body><p>{article}</p><p>{footer}</p></body></html>".encode()
+        pages.append(resp)
+    return pages
+
+
+def test_extract_content_links_near_duplicates(mock_conn):
+    """A page nearly identical to one already extracted is linked to it, not transformed."""
+    with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[
+            [(1, "https://a.com/story", 50), (2, "https://b.com/story", 50)],
+            [],
+        ],
+    ), patch("pipeline.extract.fetch_many", return_value=near_duplicate_pages()), patch(
+        "pipeline.extract.remove_from_url_priority_queue"
+    ) as mock_remove, patch(
+        "pipeline.extract.check_url_id_exists", return_value=True
+    ), patch(
+        "pipeline.extract.mark_url_duplicate"
+    ) as mock_mark, patch(
+        "pipeline.extract.update_last_crawled"
+    ):
+        transform_queue.queue.clear()
+        assert extract_content() is True
+        assert transform_queue.qsize() == 1
+        assert transform_queue.get().url == "https://a.com/story"
+        mock_mark.assert_called_once_with(2, 1, mock_conn)
+        assert mock_remove.call_count == 2
+
+
+def test_extract_content_transforms_duplicates_of_deleted_urls(mock_conn):
+    """A near-duplicate of a URL no longer in the database is transformed and indexed instead."""
+    index = SimHashIndex(path=None)
+    with patch("pipeline.extract.get_db_connection", return_value=mock_conn), patch(
+        "pipeline.extract.get_simhash_index", return_value=index
+    ), patch(
+        "pipeline.extract.claim_priority_queue_urls",
+        side_effect=[
+            [(1, "https://a.com/story", 50), (2, "https://b.com/story", 50)],
+            [],
+        ],
+    ), patch("pipeline.extract.fetch_many", return_value=near_duplicate_pages()), patch(
+        "pipeline.extract.remove_from_url_priority_queue"
+    ), patch(
+        "pipeline.extract.check_url_id_exists", return_value=False
+    ) as mock_exists, patch(
+        "pipeline.extract.mark_url_duplicate"
+    ) as mock_mark:
+        transform_queue.queue.clear()
+        assert extract_content() is True
+        assert transform_queue.qsize() == 2
+        mock_exists.assert_called_once_with(1, mock_conn)
+        mock_mark.assert_not_called()
+        # Later copies are linked to the page that replaced the stale one
+        assert index.find(index.fingerprints[0]) == 2
@@ -0,0 +1,104 @@
+import asyncio
+import httpx
+from collections import defaultdict
+from unittest.mock import MagicMock
+from pipeline.extract.fetcher import AsyncFetcher, DEFERRED
+
+
+def make_transport(delay=0.01):
+    """Mock server that records the peak number of concurrent requests, overall and per host."""
+    state = {"in_flight": 0, "peak": 0, "hosts": defaultdict(int), "host_peak": defaultdict(int)}
+
+    async def handler(request):
+        host = request.url.host
+        state["in_flight"] += 1
+        state["hosts"][host] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        state["host_peak"][host] = max(state["host_peak"][host], state["hosts"][host])
+        await asyncio.sleep(delay)
+        state["in_flight"] -= 1
+        state["hosts"][host] -= 1
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, html=f"<html><body>{request.url}</body></html>")
+
+    return httpx.MockTransport(handler), state
+
+
+def test_fetch_many_preserves_order_and_statuses():
+    transport, _ = make_transport()
+    fetcher = AsyncFetcher(transport=transport)
+    urls = ["https://a.com/1", "https://a.com/missing", "https://b.com/down", "https://b.com/2"]
+
+    responses = fetcher.fetch_many(urls)
+
+    assert responses[0].status_code == 200
+    assert "https://a.com/1" in responses[0].text
+    # Error statuses are returned, not raised, so handle_http_status can see them
+    assert responses[1].status_code == 404
+    assert responses[2] is None
+    assert responses[3].status_code == 200
+
+
+def test_fetch_many_respects_concurrency_caps():
+    transport, state = make_transport()
+    fetcher = AsyncFetcher(concurrency=8, per_host=2, transport=transport)
+    urls = [f"https://host{i % 5}.com/{i}" for i in range(50)]
+
+    responses = fetcher.fetch_many(urls)
+
+    assert all(r.status_code == 200 for r in responses)
+    assert state["peak"] <= 8
+    assert max(state["host_peak"].values()) <= 2
+    # Requests to different hosts did overlap
+    assert state["peak"] > 2
+
+
+def test_fetch_many_empty():
+    assert AsyncFetcher().fetch_many([]) == []
+
+
+def test_fetch_many_defers_urls_the_scheduler_cannot_place():
+    transport, _ = make_transport()
+    scheduler = MagicMock()
+    scheduler.reserve.side_effect = lambda url, max_wait: None if "busy" in url else 0
+    fetcher = AsyncFetcher(scheduler=scheduler, max_host_wait=60, transport=transport)
+
+    responses = fetcher.fetch_many(["https://busy.com/1", "https://free.com/1"])
+
+    assert responses[0] is DEFERRED
+    assert responses[1].status_code == 200
+
+
+
+def test_fetch_many_abandons_non_html_and_oversized_bodies():
+    async def chunks():
+        for _ in range(100):
+            yield b"<p>" + b"x" * 1000 + b"</p>"
+
+    def handler(request):
+        if request.url.path == "/menu.pdf":
+            return httpx.Response(
+                200, content=b"%PDF-1.4", headers={"Content-Type": "application/pdf"}
+            )
+        if request.url.path == "/huge":
+            # No Content-Length: the limit must be enforced while streaming
+            return httpx.Response(200, content=chunks(), headers={"Content-Type": "text/html"})
+        if request.url.path == "/declared":
+            return httpx.Response(
+                200, content=b"x" * 20_000, headers={"Content-Type": "text/html"}
+            )
+        return httpx.Response(
+            200, content=b"<html><body>ok</body></html>", headers={"Content-Type": "text/html"}
+        )
+
+    fetcher = AsyncFetcher(transport=httpx.MockTransport(handler), max_bytes=10_000)
+    urls = ["https://a.com/menu.pdf", "https://a.com/huge", "https://a.com/declared", "https://a.com/"]
+
+    responses = fetcher.fetch_many(urls)
+
+    assert responses[:3] == [None, None, None]
+    assert responses[3].text == "<html><body>ok</body></html>"
+    assert fetcher.stats() == {"too_large": 2, "not_html": 1, "bytes_downloaded": 28}
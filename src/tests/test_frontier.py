@@ -0,0 +1,61 @@
+from pipeline.extract.frontier import Frontier
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def urls(entries):
+    return [entry.url for entry in entries]
+
+
+def test_frontier_interleaves_hosts_by_priority():
+    clock = FakeClock()
+    frontier = Frontier(capacity=20, delay_for=lambda url: 1.0, clock=clock)
+    frontier.add_many(
+        [(i, f"https://listicle.com/{i}", 95) for i in range(5)]
+        + [(10, "https://blog.com/a", 40), (11, "https://news.com/a", 70)]
+    )
+
+    ready, stale = frontier.take(10)
+    # One URL per host per round, best host first, rather than five from the busiest host
+    assert urls(ready) == ["https://listicle.com/0", "https://news.com/a", "https://blog.com/a"]
+    assert stale == []
+    assert frontier.take(10) == ([], [])
+    assert frontier.seconds_until_ready() == 1.0
+
+    clock.now = 1.0
+    ready, _ = frontier.take(10)
+    assert urls(ready) == ["https://listicle.com/1"]
+    assert len(frontier) == 3
+
+
+def test_frontier_caps_each_host_backlog():
+    frontier = Frontier(capacity=20, host_backlog=2, low_watermark=10, delay_for=lambda url: 0.0)
+    frontier.add_many([(i, f"https://busy.com/{i}", 90) for i in range(6)])
+    stats = frontier.stats()
+    assert stats["hosts"] == 1
+    # Routed URLs sit in busy.com's back queue; the overflow waits in the top front queue
+    assert stats["front"][8] == 4
+    assert frontier.needs_refill()
+    assert frontier.refill_size() == 14
+
+    ready, _ = frontier.take(3)
+    assert urls(ready) == ["https://busy.com/0", "https://busy.com/1", "https://busy.com/2"]
+    assert frontier.stats()["front"][8] == 1
+
+
+def test_frontier_returns_stale_entries():
+    clock = FakeClock()
+    frontier = Frontier(max_age=10, delay_for=lambda url: 0.0, clock=clock)
+    frontier.add_many([(1, "https://a.com/1", 50), (2, "https://a.com/2", 50)])
+    clock.now = 11
+    ready, stale = frontier.take(5)
+    assert ready == []
+    assert [entry.url_id for entry in stale] == [1, 2]
+    assert len(frontier) == 0
+    assert frontier.seconds_until_ready() is None
@@ -0,0 +1,89 @@
+import random
+import pytest
+from unittest.mock import MagicMock, patch
+from database.db_operations import insert_restaurant
+from pipeline.transform.gazetteer import (
+    AhoCorasick,
+    Gazetteer,
+    _on_restaurant_inserted,
+    get_gazetteer,
+)
+from pipeline.transform.name_utils import normalize_name
+
+
+@pytest.fixture
+def mock_conn():
+    m_conn = MagicMock()
+    m_cursor = MagicMock()
+    m_conn.cursor.return_value.__enter__.return_value = m_cursor
+    return m_conn
+
+
+def naive_matches(patterns, text):
+    return sorted(
+        (i + len(p) - 1, p)
+        for p in patterns
+        for i in range(len(text) - len(p) + 1)
+        if text.startswith(p, i)
+    )
+
+
+def test_normalize_name():
+    assert normalize_name("  Manohar’s   DELHI\tPalace ") == "manohar's delhi palace"
+    assert normalize_name("Ｃａｆé") == "café"
+
+
+def test_aho_corasick_matches_naive_search():
+    rng = random.Random(7)
+    patterns = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)}
+    text = "".join(rng.choice("abcd") for _ in range(500))
+    ac = AhoCorasick()
+    for p in patterns:
+        ac.add(p, p)
+    assert sorted(ac.iter(text)) == naive_matches(patterns, text)
+
+
+def test_aho_corasick_incremental_add():
+    ac = AhoCorasick()
+    ac.add("she", "she")
+    assert list(ac.iter("ushers")) == [(3, "she")]
+    ac.add("he", "he")
+    ac.add("hers", "hers")
+    assert sorted(ac.iter("ushers")) == [(3, "he"), (3, "she"), (5, "hers")]
+    assert len(ac) == 3
+
+
+def test_gazetteer_finds_whole_word_hits():
+    g = Gazetteer()
+    for name in ["Pijja Palace", "Cobi's Kitchen", "The Modern", "Olivia"]:
+        g.add(name)
+    text = "We loved PIJJA   PALACE and Cobi’s kitchen, not Olivia or the moderns."
+    assert sorted(g.find(text)) == ["Cobi's Kitchen", "Pijja Palace"]
+
+
+def test_gazetteer_refresh_is_incremental(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchall.side_effect = [
+        [(1, "Pijja Palace", None), (2, "Bar Olivia", None)],
+        [(3, "Hibi Ya", None)],
+    ]
+    g = Gazetteer()
+    assert g.refresh(mock_conn) == 2
+    assert g.refresh(mock_conn) == 1
+    assert c.execute.call_args_list[1][0][1] == (2,)
+    assert g.last_id == 3
+    assert sorted(g.find("bar olivia and hibi ya")) == ["Bar Olivia", "Hibi Ya"]
+
+
+def test_gazetteer_picks_up_inserted_restaurant(mock_conn):
+    c = mock_conn.cursor.return_value.__enter__.return_value
+    c.fetchone.return_value = (42,)
+    # A gazetteer of its own stands in for the process-wide one, and only it hears
+    # the insert, so "Brand New Bistro" doesn't reach later tests
+    with patch("pipeline.transform.gazetteer._gazetteer", Gazetteer()), patch(
+        "database.db_operations._restaurant_listeners", [_on_restaurant_inserted]
+    ):
+        g = get_gazetteer()
+        assert g.find("Dinner at Brand New Bistro") == []
+        insert_restaurant("Brand New Bistro", "1 Main St", mock_conn)
+        assert g.find("Dinner at Brand New Bistro") == ["Brand New Bistro"]
@@ -0,0 +1,56 @@
+import pytest
+from pipeline.extract.fetcher import AsyncFetcher
+from utils.http_client import ConnectionStats, create_client, AsyncClientLoop
+from tests.local_http_server import start_local_server, PAGE
+
+
+@pytest.fixture
+def local_server():
+    server, base_url = start_local_server()
+    yield base_url
+    server.shutdown()
+
+
+def test_client_reuses_connections(local_server):
+    stats = ConnectionStats()
+    with create_client(stats) as client:
+        for i in range(10):
+            resp = client.get(f"{local_server}/page/{i}")
+            assert resp.content == PAGE
+            assert resp.headers["Content-Encoding"] == "gzip"
+
+    s = stats.stats()
+    assert s["requests"] == 10
+    assert s["connections_opened"] == 1
+    assert s["reuse_ratio"] == 0.9
+
+
+def test_async_client_loop_is_shared_across_batches(local_server):
+    stats = ConnectionStats()
+    loop = AsyncClientLoop(stats)
+    try:
+        fetcher = AsyncFetcher(concurrency=4, per_host=4, client_loop=loop)
+        for batch in range(3):
+            responses = fetcher.fetch_many(
+                [f"{local_server}/{batch}/{i}" for i in range(8)]
+            )
+            assert all(r.status_code == 200 for r in responses)
+    finally:
+        loop.close()
+
+    s = stats.stats()
+    assert s["requests"] == 24
+    # At most one connection per concurrent request, kept alive across batches
+    assert s["connections_opened"] <= 4
+
+
+def test_async_client_loop_evicts_idle_host_clients(local_server):
+    loop = AsyncClientLoop(max_hosts=1)
+    try:
+        fetcher = AsyncFetcher(client_loop=loop)
+        port = local_server.rsplit(":", 1)[1]
+        fetcher.fetch_many([f"http://127.0.0.1:{port}/a"])
+        fetcher.fetch_many([f"http://localhost:{port}/b"])
+        assert len(loop) == 1
+    finally:
+        loop.close()
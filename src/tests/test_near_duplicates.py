@@ -0,0 +1,77 @@
+import random
+from unittest.mock import patch
+from pipeline.extract.near_duplicates import (
+    SimHashIndex,
+    get_simhash_stats,
+    simhash,
+    hamming_distance,
+)
+
+WORDS = (
+    "tasting menu chef dinner course wine list bistro review reservation dish "
+    "service dessert kitchen sommelier brunch pastry seasonal room table"
+).split()
+
+
+def article(seed, length=1000):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def test_simhash_near_and_far():
+    text = article(0)
+    words = text.split()
+    words[500] = "changed"
+    template = " ".join(words) + " Copyright 2025 Other Reviews. All rights reserved."
+
+    assert simhash(text) == simhash(" ".join(text.split()).upper())
+    assert hamming_distance(simhash(text), simhash(template)) <= 3
+    assert hamming_distance(simhash(text), simhash(article(1))) > 10
+    assert simhash("too short to fingerprint") is None
+
+
+def test_index_finds_within_distance_only():
+    index = SimHashIndex(path=None, max_distance=3)
+    base = 0x0123456789ABCDEF
+    index.add(base, 7)
+
+    # Three flipped bits, one per band, still share the fourth band
+    assert index.find(base ^ (1 | 1 << 20 | 1 << 40)) == 7
+    assert index.find(base ^ 0b1111) is None
+    assert index.find(base ^ 0b111, exclude=7) is None
+    assert len(index) == 1
+
+
+def test_index_check_links_and_survives_restart(tmp_path):
+    path = str(tmp_path / "simhash.bin")
+    index = SimHashIndex(path=path)
+    text = article(0)
+
+    assert index.check(text, 1) is None
+    assert index.check(text + " Shared on another site.", 2) == 1
+    # A revisit of the same URL is neither a duplicate nor indexed twice
+    assert index.check(text, 1) is None
+    assert index.check(article(1), 3) is None
+    assert index.check("short page", 4) is None
+    stats = index.stats()
+    assert (stats["pages"], stats["duplicates"], stats["short"]) == (5, 1, 1)
+    assert stats["indexed"] == 2
+
+    with open(path, "ab") as f:
+        f.write(b"\x00\x01")  # a torn write is ignored on replay
+    reloaded = SimHashIndex(path=path)
+    assert list(reloaded.url_ids) == [1, 3]
+    assert reloaded.check(text, 5) == 1
+
+
+def test_index_creates_its_directory_and_stats_need_no_index(tmp_path):
+    path = tmp_path / "data" / "simhash.bin"
+    SimHashIndex(path=str(path)).add(simhash(article(0)), 1)
+    assert path.exists()
+
+    # Logging stats must not open (and create) the shared index
+    with patch("pipeline.extract.near_duplicates._index", None), patch(
+        "pipeline.extract.near_duplicates.SimHashIndex"
+    ) as opened:
+        assert get_simhash_stats() == {}
+    opened.assert_not_called()
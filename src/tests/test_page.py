@@ -0,0 +1,31 @@
+import httpx
+from pipeline.extract.page import FetchedPage, detect_encoding, is_html
+
+
+def test_is_html():
+    assert is_html("text/html; charset=UTF-8")
+    assert is_html("application/xhtml+xml")
+    assert is_html(None)
+    assert not is_html("application/pdf")
+    assert not is_html("image/jpeg")
+
+
+def test_detect_encoding_order():
+    body = "<html><head><meta charset='iso-8859-1'></head><body>Café</body></html>"
+    latin1 = body.encode("iso-8859-1")
+    # The Content-Type charset wins over <meta>
+    assert detect_encoding(latin1, "text/html; charset=utf-8") == "utf-8"
+    assert detect_encoding(latin1, "text/html") == "iso8859-1"
+    assert detect_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">') == "shift_jis"
+    # A BOM beats everything else
+    assert detect_encoding(b"\xef\xbb\xbf<p>x</p>", "text/html; charset=iso-8859-1") == "utf-8"
+    # Unknown charsets are ignored, then the body is tried as UTF-8
+    assert detect_encoding("Café".encode("utf-8"), "text/html; charset=bogus") == "utf-8"
+    assert detect_encoding("Café".encode("cp1252")) == "cp1252"
+
+
+def test_fetched_page_text():
+    headers = httpx.Headers({"Content-Type": "text/html; charset=windows-1252"})
+    page = FetchedPage("https://a.com/", 200, headers, "Crème brûlée".encode("cp1252"))
+    assert page.encoding == "cp1252"
+    assert page.text == "Crème brûlée"
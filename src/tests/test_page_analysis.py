@@ -0,0 +1,79 @@
+from utils.page_analysis import analyze, Anchor
+
+PAGE = b"""<!doctype html>
+<html>
+  <head>
+    <title>Best  Bistros</title>
+    <meta name="Description" content="Reviews of Orange County restaurants">
+    <meta property="og:type" content="article">
+    <base href="https://guide.example.com/oc/">
+    <script>var hidden = "Not Visible";</script>
+    <style>.x { color: red }</style>
+  </head>
+  <body>
+    <nav><a href="/">Home</a> <a href="reviews">Reviews</a></nav>
+    <main>
+      <h1>Top picks</h1>
+      <h2>Fancy <b>Bistro</b></h2>
+      <div><div><p>We loved <a href="fancy-bistro#menu">Fancy
+        Bistro</a> in Costa Mesa.</p></div></div>
+      <!-- a comment -->after the comment
+    </main>
+    <noscript>Enable JavaScript</noscript>
+    <footer><a href="https://other.com/about">About</a></footer>
+  </body>
+</html>"""
+
+
+def test_analyze_collects_everything_in_one_pass():
+    a = analyze(PAGE, "https://guide.example.com/oc/list", "utf-8")
+
+    assert a.title == "Best Bistros"
+    assert a.text == (
+        "Home Reviews Top picks Fancy Bistro We loved Fancy Bistro in Costa Mesa. "
+        "after the comment About"
+    )
+    assert a.headers == [("h1", "Top picks"), ("h2", "Fancy Bistro")]
+    assert a.meta == {
+        "description": "Reviews of Orange County restaurants",
+        "og:type": "article",
+    }
+    assert a.anchors == [
+        Anchor("https://guide.example.com/", "Home", ("nav",)),
+        Anchor("https://guide.example.com/oc/reviews", "Reviews", ("nav",)),
+        Anchor(
+            "https://guide.example.com/oc/fancy-bistro#menu",
+            "Fancy Bistro",
+            ("main", "div"),
+        ),
+        Anchor("https://other.com/about", "About", ("footer",)),
+    ]
+
+
+def test_analyze_handles_empty_and_legacy_encodings():
+    empty = analyze(b"", "https://a.com/")
+    assert empty.text == "" and empty.anchors == []
+    assert analyze("<p>Crème brûlée</p>".encode("cp1252"), "u", "cp1252").text == "Crème brûlée"
+
+
+def test_main_text_drops_boilerplate():
+    html = b"""
+    <body class="two-column content-sidebar">
+      <header><a href="/">Site</a> <a href="/about">About us</a></header>
+      <div id="cookie-banner">We use cookies to improve your experience.</div>
+      <div class="menu-links"><a href="/a">Pizza</a> <a href="/b">Tacos</a> <a href="/c">Ramen</a></div>
+      <div class="entry-content">
+        <h1>Dinner at Fancy Bistro</h1>
+        <p>The tasting menu at Fancy Bistro was the best meal of the year.</p>
+        <ul><li><a href="/r/1">Hanuman</a></li><li><a href="/r/2">Jitlada</a></li></ul>
+        <div class="share-buttons"><a href="/share">Share on Facebook</a></div>
+      </div>
+      <aside>Popular posts</aside>
+      <footer>Copyright 2024</footer>
+    </body>"""
+    a = analyze(html, "https://a.com/")
+    assert a.main_text == (
+        "Dinner at Fancy Bistro "
+        "The tasting menu at Fancy Bistro was the best meal of the year. Hanuman Jitlada"
+    )
+    assert "cookies" in a.text and "Copyright" in a.text and "Pizza" in a.text
@@ -0,0 +1,77 @@
+from pipeline.extract.politeness import RobotsCache, HostScheduler
+
+ROBOTS = """
+User-agent: *
+Disallow: /private
+Crawl-delay: 5
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_fetch(responses):
+    calls = []
+
+    def fetch(robots_url):
+        calls.append(robots_url)
+        return responses.get(robots_url, (404, ""))
+
+    return fetch, calls
+
+
+def test_robots_cache_parses_once_per_host():
+    fetch, calls = make_fetch({"https://a.com/robots.txt": (200, ROBOTS)})
+    robots = RobotsCache(fetch=fetch)
+
+    assert robots.can_fetch("https://a.com/reviews/1")
+    assert not robots.can_fetch("https://a.com/private/menu")
+    assert robots.crawl_delay("https://a.com/") == 5.0
+    assert calls == ["https://a.com/robots.txt"]
+
+
+def test_robots_cache_status_handling():
+    fetch, calls = make_fetch(
+        {
+            "https://forbidden.com/robots.txt": (403, ""),
+            "https://down.com/robots.txt": (None, None),
+        }
+    )
+    robots = RobotsCache(retry_ttl=0, fetch=fetch)
+
+    assert robots.can_fetch("https://missing.com/anything")
+    assert not robots.can_fetch("https://forbidden.com/")
+    # An unreachable robots.txt doesn't block the host, and is fetched again once the retry TTL passes
+    assert robots.can_fetch("https://down.com/page")
+    assert robots.can_fetch("https://down.com/page")
+    assert calls.count("https://down.com/robots.txt") == 2
+
+
+def test_host_scheduler_spaces_requests_per_host():
+    fetch, _ = make_fetch({"https://slow.com/robots.txt": (200, ROBOTS)})
+    clock = FakeClock()
+    scheduler = HostScheduler(RobotsCache(fetch=fetch), min_delay=1.0, clock=clock)
+
+    assert scheduler.reserve("https://fast.com/1") == 0
+    assert scheduler.reserve("https://fast.com/2") == 1.0
+    assert scheduler.reserve("https://slow.com/1") == 0
+    # Crawl-delay overrides the minimum delay
+    assert scheduler.reserve("https://slow.com/2") == 5.0
+    # Slots too far away are not booked
+    assert scheduler.reserve("https://slow.com/3", max_wait=8) is None
+    assert scheduler.reserve("https://slow.com/3", max_wait=10) == 10.0
+
+    clock.now += 20
+    assert scheduler.reserve("https://fast.com/3") == 0
+
+
+def test_host_scheduler_caps_crawl_delay():
+    fetch, _ = make_fetch({"https://a.com/robots.txt": (200, "User-agent: *\nCrawl-delay: 600\n")})
+    scheduler = HostScheduler(RobotsCache(fetch=fetch), max_delay=30, clock=FakeClock())
+    scheduler.reserve("https://a.com/1")
+    assert scheduler.reserve("https://a.com/2") == 30
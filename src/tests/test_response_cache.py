@@ -0,0 +1,102 @@
+import httpx
+import pytest
+from unittest.mock import patch
+from pipeline.extract.fetcher import AsyncFetcher
+from pipeline.extract.response_cache import ResponseCache, get_response_cache_stats
+
+BODY = b"<html><body><p>Tasting menu</p></body></html>"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def make_transport():
+    """Mock server that honours If-None-Match for /etag and sends no validators for /plain."""
+
+    def handler(request):
+        if request.url.path == "/etag":
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                content=BODY,
+                headers={"ETag": '"v1"', "Last-Modified": "Sat, 01 Mar 2025 00:00:00 GMT"},
+            )
+        return httpx.Response(200, content=BODY)
+
+    return httpx.MockTransport(handler)
+
+
+def test_conditional_headers(cache):
+    assert cache.conditional_headers("https://a.com/etag") == {}
+
+    fetcher = AsyncFetcher(transport=make_transport())
+    resp = fetcher.fetch_many(["https://a.com/etag"])[0]
+    assert cache.store("https://a.com/etag", resp) is True
+
+    assert cache.conditional_headers("https://a.com/etag") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Sat, 01 Mar 2025 00:00:00 GMT",
+    }
+
+
+def test_revisit_returns_304_and_counts_bytes_saved(cache):
+    fetcher = AsyncFetcher(
+        transport=make_transport(), request_headers=cache.conditional_headers
+    )
+    first = fetcher.fetch_many(["https://a.com/etag"])[0]
+    cache.store("https://a.com/etag", first)
+
+    second = fetcher.fetch_many(["https://a.com/etag"])[0]
+    assert second.status_code == 304
+    cache.not_modified("https://a.com/etag")
+
+    stats = cache.stats()
+    assert stats["conditional_requests"] == 1
+    assert stats["not_modified"] == 1
+    assert stats["bytes_saved"] == len(BODY)
+    assert stats["transforms_skipped"] == 1
+
+
+def test_unchanged_body_without_validators(cache):
+    fetcher = AsyncFetcher(
+        transport=make_transport(), request_headers=cache.conditional_headers
+    )
+    first = fetcher.fetch_many(["https://a.com/plain"])[0]
+    assert cache.store("https://a.com/plain", first) is True
+    second = fetcher.fetch_many(["https://a.com/plain"])[0]
+    assert second.status_code == 200
+    assert cache.store("https://a.com/plain", second) is False
+
+    changed = httpx.Response(200, content=BODY + b"<p>New</p>")
+    assert cache.store("https://a.com/plain", changed) is True
+    assert cache.stats()["unchanged"] == 1
+
+
+def test_validators_persist(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path)
+    cache.store("https://a.com/", httpx.Response(200, content=BODY, headers={"ETag": '"x"'}))
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.conditional_headers("https://a.com/") == {"If-None-Match": '"x"'}
+    reopened.close()
+
+
+def test_cache_creates_its_directory_and_stats_need_no_cache(tmp_path):
+    path = tmp_path / "data" / "responses.sqlite3"
+    cache = ResponseCache(str(path))
+    assert path.exists()
+    cache.close()
+
+    # Logging stats must not open (and create) the shared cache
+    with patch("pipeline.extract.response_cache._cache", None), patch(
+        "pipeline.extract.response_cache.ResponseCache"
+    ) as opened:
+        assert get_response_cache_stats() == {}
+    opened.assert_not_called()
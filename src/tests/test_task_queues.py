@@ -0,0 +1,64 @@
+import pickle
+import queue
+import threading
+import pytest
+from pipeline.extract.page import PageRecord
+from utils.page_analysis import analyze
+from queue_manager.task_queues import ByteBoundedQueue
+from queue_manager.worker import batch_worker
+
+HTML = b"<html><body>" + b"<p>Fancy Bistro serves a tasting menu.</p>" * 200 + b"</body></html>"
+ANALYSIS = analyze(HTML, "https://a.com/")
+
+
+def test_page_record_is_compact_and_picklable():
+    page = PageRecord.pack("https://a.com/", 40, ANALYSIS)
+    assert page.nbytes < len(HTML) / 10
+    restored = pickle.loads(pickle.dumps(page))
+    assert restored == page
+    assert restored.analysis() == ANALYSIS
+
+
+def test_byte_bounded_queue_limits_bytes_not_items():
+    q = ByteBoundedQueue(max_bytes=100, sizeof=len)
+    q.put(b"x" * 60)
+    q.put(b"x" * 40)
+    assert q.bytes == 100
+    with pytest.raises(queue.Full):
+        q.put(b"x", block=False)
+    with pytest.raises(queue.Full):
+        q.put(b"x", timeout=0.01)
+
+    assert q.get() == b"x" * 60
+    assert q.bytes == 40
+    q.put(b"x" * 60, block=False)
+    assert q.qsize() == 2
+
+
+def test_byte_bounded_queue_admits_oversized_item_when_empty():
+    q = ByteBoundedQueue(max_bytes=10, sizeof=len)
+    q.put(b"x" * 50, block=False)
+    with pytest.raises(queue.Full):
+        q.put(b"x", block=False)
+    q.get()
+    assert q.bytes == 0
+
+
+def test_byte_bounded_queue_unblocks_producer_and_counts_sentinels_as_zero():
+    q = ByteBoundedQueue(max_bytes=2 * PageRecord.pack("u", 0, ANALYSIS).nbytes)
+    pages = [PageRecord.pack(f"https://a.com/{i}", i, ANALYSIS) for i in range(6)]
+
+    def produce():
+        for page in pages:
+            q.put(page)
+        q.put(None)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    batches = []
+    batch_worker(q, batches.append, batch_size=2, max_latency_ms=50)
+    producer.join(timeout=5)
+
+    assert [p.url for batch in batches for p in batch] == [p.url for p in pages]
+    assert q.bytes == 0
+    assert q.unfinished_tasks == 0
@@ -1,10 +1,75 @@
+import threading
 import pytest
+import spacy
 from unittest.mock import patch, MagicMock
-from bs4 import BeautifulSoup
-from pipeline.transform import transform_data
+from pipeline.transform import (
+    transform_data,
+    transform_batch,
+    build_payload,
+    resolve_restaurants,
+)
+from pipeline.transform.url_utils import identify_urls, canonicalize_link
+from pipeline.transform.identify_restaurants import (
+    identify_restaurants_batch,
+    get_ner_input_stats,
+)
+from pipeline.transform.ner_engine import NEREngine, create_ner_engine
+from pipeline.transform.ner_onnx import ONNXNEREngine
+from pipeline.transform.ner_pool import NERProcessPool
+from pipeline.transform.mention_cache import get_mention_cache, _on_restaurant_inserted
+from pipeline.transform.relevance_gate import (
+    RelevanceGate,
+    extract_features,
+    train,
+    evaluate,
+)
+from pipeline.transform.ner_cache import NERCache, get_ner_cache_stats, text_key
+from pipeline.transform.structured_data import (
+    structured_restaurants,
+    get_structured_data_stats,
+)
+from pipeline.extract.page import PageRecord
+from utils.page_analysis import analyze
+from database.db_operations import insert_restaurant
 from queue_manager.task_queues import load_queue
 
 
+@pytest.fixture(autouse=True)
+def open_relevance_gate():
+    """An untrained gate that lets every page through and records no samples."""
+    with patch(
+        "pipeline.transform.get_relevance_gate", return_value=RelevanceGate()
+    ) as gate:
+        yield gate
+
+
+@pytest.fixture(autouse=True)
+def ner_cache(tmp_path):
+    """A fresh on-disk NER cache per test, instead of the working directory's."""
+    cache = NERCache(str(tmp_path / "ner_cache.sqlite3"))
+    with patch("pipeline.transform.get_ner_cache", return_value=cache):
+        yield cache
+    cache.close()
+
+
+@pytest.fixture
+def ner_model_path(tmp_path):
+    """A tiny rule-based pipeline saved to disk, standing in for en_core_web_trf."""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(
+        [
+            {"label": "ORG", "pattern": "Fancy Bistro"},
+            {"label": "PRODUCT", "pattern": "Tasting Menu"},
+            {"label": "GPE", "pattern": "Costa Mesa"},
+        ]
+    )
+    # Stands in for a component the NER engine should never load
+    nlp.add_pipe("sentencizer", name="parser")
+    nlp.to_disk(tmp_path / "model")
+    return str(tmp_path / "model")
+
+
 def test_transform_data_weighted():
     load_queue.queue.clear()
 
@@ -17,24 +82,450 @@ def test_transform_data_weighted():
       <a href="https://example.com/home">Home</a>
     </html>
     """
-    soup = BeautifulSoup(html, "html.parser")
+    url = "https://example.com/page"
+    page = PageRecord.pack(url, 40, analyze(html.encode("utf-8"), url))
 
     with patch("pipeline.transform.get_db_connection") as mock_conn, patch(
         "pipeline.transform.identify_restaurants", return_value=["Fancy Bistro"]
-    ), patch("pipeline.transform.is_restaurant", return_value=True), patch(
+    ), patch(
+        "pipeline.transform.resolve_restaurants",
+        return_value={"Fancy Bistro": (True, "Fancy Bistro")},
+    ), patch(
         "pipeline.transform.extract_homepage", return_value="https://example.com/home"
     ), patch(
-        "pipeline.transform.identify_urls_from_soup",
+        "pipeline.transform.identify_urls",
         return_value=["https://deriv1.com", "https://example.com/home"],
     ):
 
-        transform_data(("https://example.com/page", 40, soup))
+        transform_data(page)
 
     assert load_queue.qsize() == 1
     payload = load_queue.get()
     assert payload["target_url"] == "https://example.com/page"
+    assert payload["identified_restaurants"] == ["Fancy Bistro"]
     assert 0 <= payload["relevance_score"] <= 100
     derived = payload["derived_url_pairs"]
     assert len(derived) == 2
     assert derived[0][0] == "https://example.com/home"
     assert derived[0][1] == 40
+
+
+def test_ner_engine_loads_model_once(ner_model_path):
+    engine = NEREngine(model_name=ner_model_path)
+    with patch("pipeline.transform.ner_engine.spacy.load", wraps=spacy.load) as load:
+        threads = [
+            threading.Thread(target=engine.extract, args=("Fancy Bistro",))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        engine.extract("Fancy Bistro again")
+    assert load.call_count == 1
+
+
+def test_ner_engine_excludes_unused_components(ner_model_path):
+    engine = NEREngine(model_name=ner_model_path)
+    assert engine.load().pipe_names == ["entity_ruler"]
+
+
+def test_ner_engine_filters_labels(ner_model_path):
+    engine = NEREngine(model_name=ner_model_path)
+    mentions = engine.extract(
+        "Fancy Bistro in Costa Mesa serves a Tasting Menu. Fancy Bistro is great."
+    )
+    assert sorted(mentions) == ["Fancy Bistro", "Tasting Menu"]
+
+
+def test_create_ner_engine_resolves_model_tiers(ner_model_path):
+    assert create_ner_engine("sm").model_name == "en_core_web_sm"
+    assert create_ner_engine("trf").model_name == "en_core_web_trf"
+    assert create_ner_engine(ner_model_path).extract("Fancy Bistro") == ["Fancy Bistro"]
+    onnx = create_ner_engine("onnx")
+    assert isinstance(onnx, ONNXNEREngine) and not onnx.loaded
+
+
+def test_ner_engine_extract_many_preserves_order(ner_model_path):
+    engine = NEREngine(model_name=ner_model_path)
+    results = engine.extract_many(
+        ["Nothing here.", "Fancy Bistro!", "A Tasting Menu at Fancy Bistro"],
+        batch_size=2,
+    )
+    assert results[0] == []
+    assert results[1] == ["Fancy Bistro"]
+    assert sorted(results[2]) == ["Fancy Bistro", "Tasting Menu"]
+
+
+def test_transform_batch_fans_out_payloads():
+    load_queue.queue.clear()
+    pages = [
+        PageRecord.pack(url, priority, analyze(html, url))
+        for url, priority, html in [
+            ("https://a.com/page", 40, b"<p>Fancy Bistro</p>"),
+            ("https://b.com/page", 60, b"<p>Nothing</p>"),
+        ]
+    ]
+
+    with patch("pipeline.transform.get_db_connection"), patch(
+        "pipeline.transform.refresh_restaurant_indexes"
+    ), patch("pipeline.transform.find_known_restaurants", return_value=[]), patch(
+        "pipeline.transform.identify_restaurants_batch",
+        return_value=[["Fancy Bistro"], ["Yelp"]],
+    ) as mock_batch, patch(
+        "pipeline.transform.resolve_restaurants",
+        side_effect=lambda names, conn: {
+            name: (name == "Fancy Bistro", name) for name in names
+        },
+    ):
+        processed = transform_batch(pages, ner_batch_size=4)
+
+    assert processed == 2
+    analyses = mock_batch.call_args.args[0]
+    assert [a.text for a in analyses] == ["Fancy Bistro", "Nothing"]
+    assert mock_batch.call_args.kwargs == {"batch_size": 4}
+    first, second = load_queue.get(), load_queue.get()
+    assert first["target_url"] == "https://a.com/page"
+    assert first["identified_restaurants"] == ["Fancy Bistro"]
+    assert second["target_url"] == "https://b.com/page"
+    assert second["rejected_restaurants"] == ["Yelp"]
+    assert second["derived_url_pairs"][0] == ("https://b.com/", 60)
+
+
+def test_ner_process_pool_matches_in_process_engine(ner_model_path):
+    texts = ["Fancy Bistro", "nothing", "Tasting Menu", "Fancy Bistro, Costa Mesa"]
+    expected = NEREngine(model_name=ner_model_path).extract_many(texts)
+    pool = NERProcessPool(processes=2, model_name=ner_model_path)
+    try:
+        assert pool.extract_many(texts, batch_size=1) == expected
+        assert pool.extract("Fancy Bistro") == ["Fancy Bistro"]
+        assert pool.extract_many([]) == []
+    finally:
+        pool.shutdown()
+
+
+def test_build_payload_skips_validation_for_gazetteer_hits():
+    analysis = analyze(b"<p>Pijja Palace and Yelp</p>", "https://a.com/page")
+    with patch(
+        "pipeline.transform.resolve_restaurants",
+        return_value={"Yelp": (False, None)},
+    ) as mock_resolve:
+        payload = build_payload(
+            MagicMock(),
+            "https://a.com/page",
+            50,
+            analysis,
+            ["PIJJA PALACE", "Yelp"],
+            known_restaurants=["Pijja Palace"],
+        )
+    assert mock_resolve.call_args[0][0] == ["Yelp"]
+    assert payload["identified_restaurants"] == ["Pijja Palace"]
+    assert payload["rejected_restaurants"] == ["Yelp"]
+
+
+def test_resolve_restaurants_uses_one_batched_query():
+    matches = {
+        "Pijja Palace": {"name": "Pijja Palace", "confidence": 1.0, "exact": True},
+        "Pija Palace": {"name": "Pijja Palace", "confidence": 0.8, "exact": False},
+        "Palace Hotel": {"name": "Pijja Palace", "confidence": 0.76, "exact": False},
+        "Yelp": None,
+    }
+    conn = MagicMock()
+    get_mention_cache().clear()
+    with patch("pipeline.transform.get_trigram_index") as mock_index, patch(
+        "pipeline.transform.batch_fuzzy_search_restaurant_names", return_value=matches
+    ) as mock_batch:
+        mock_index.return_value.loaded = False
+        result = resolve_restaurants(list(matches) + ["Yelp"], conn)
+
+    mock_batch.assert_called_once_with(list(matches), conn, threshold=0.75)
+    assert result == {
+        "Pijja Palace": (True, "Pijja Palace"),
+        "Pija Palace": (True, "Pijja Palace"),
+        "Palace Hotel": (True, "Pijja Palace"),
+        "Yelp": (False, None),
+    }
+
+
+def test_resolve_restaurants_caches_results_until_insert():
+    cache = get_mention_cache()
+    cache.clear()
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (7,)
+    # Only the mention cache hears the insert; the process-wide gazetteer and
+    # trigram index must not pick up "Yelp" for later tests
+    with patch("pipeline.transform.get_trigram_index") as mock_index, patch(
+        "database.db_operations._restaurant_listeners", [_on_restaurant_inserted]
+    ):
+        mock_index.return_value.loaded = True
+        mock_index.return_value.is_restaurant.return_value = (False, None)
+        resolve_restaurants(["Yelp"], conn)
+        # Rejections are cached, and lookups are keyed on the normalized mention
+        assert resolve_restaurants(["YELP ", "Yelp"], conn) == {
+            "YELP ": (False, None),
+            "Yelp": (False, None),
+        }
+        assert mock_index.return_value.is_restaurant.call_count == 1
+
+        insert_restaurant("Yelp", "1 Main St", conn)
+        assert len(cache) == 0
+        resolve_restaurants(["Yelp"], conn)
+        assert mock_index.return_value.is_restaurant.call_count == 2
+
+
+def test_canonicalize_link():
+    assert (
+        canonicalize_link("HTTPS://Www.Example.com:443/menu?utm_source=x&id=2#dinner")
+        == "https://www.example.com/menu?id=2"
+    )
+    assert canonicalize_link("http://a.com") == "http://a.com/"
+    assert canonicalize_link("http://a.com:8080/x?b=1&a") == "http://a.com:8080/x?b=1&a"
+    assert canonicalize_link("mailto:chef@a.com") is None
+    assert canonicalize_link("javascript:void(0)") is None
+    assert canonicalize_link("http://[::1") is None
+
+
+def test_identify_urls_dedups_and_records_sections():
+    html = b"""
+    <nav><a href="/menu">Menu</a></nav>
+    <div><div><a href="/menu#mains">Mains</a><a href="/r/1?utm_campaign=x">R1</a></div></div>
+    <footer><a href="/careers">Careers</a></footer>
+    <main><a href="mailto:chef@a.com">Mail</a><a href="HTTPS://A.com/r/1">R1 again</a></main>
+    """
+    urls = identify_urls(analyze(html, "https://a.com/page"))
+    assert urls == {
+        "https://a.com/menu": ("nav", "div"),
+        "https://a.com/r/1": ("div", "main"),
+    }
+
+
+def test_ner_runs_on_main_content():
+    pages = [
+        analyze(
+            b"<nav><a href='/'>Home</a> <a href='/x'>Yelp</a></nav>"
+            b"<main><p>Fancy Bistro in Costa Mesa</p></main>",
+            "https://a.com/",
+        ),
+        # Nothing left after boilerplate removal: NER gets the whole page
+        analyze(b"<footer>Fancy Bistro</footer>", "https://b.com/"),
+    ]
+    before = get_ner_input_stats()
+    with patch("pipeline.transform.identify_restaurants._ner_backend") as backend:
+        identify_restaurants_batch(pages, batch_size=2)
+    texts = backend.return_value.extract_many.call_args.args[0]
+    assert texts == ["Fancy Bistro in Costa Mesa", "Fancy Bistro"]
+    after = get_ner_input_stats()
+    assert after["page_tokens"] - before["page_tokens"] == 9
+    assert after["ner_tokens"] - before["ner_tokens"] == 7
+
+
+RELEVANT_PAGES = [
+    b"<h1>Review: Fancy Bistro</h1><p>The chef's tasting menu and wine list make this restaurant a Michelin pick.</p>",
+    b"<h1>Best brunch spots</h1><p>Our critic reviews the dinner menu, every dish, and the chef behind each eatery.</p>",
+    b"<h1>Hanuman review</h1><p>Thai cuisine in Costa Mesa: the khao soi is the best dish on the menu.</p>",
+]
+IRRELEVANT_PAGES = [
+    b"<h1>Organ (biology)</h1><p>An organ is a group of tissues with similar functions in an organism.</p>",
+    b"<h1>Tax filing guide</h1><p>Deductions, credits and the deadlines for filing your federal return.</p>",
+    b"<h1>Football scores</h1><p>The home team won the match after extra time and a penalty shootout.</p>",
+]
+
+
+def _samples():
+    return [
+        (extract_features(analyze(html, f"https://site{i}.com/page")), label)
+        for label, pages in ((1, RELEVANT_PAGES), (0, IRRELEVANT_PAGES))
+        for i, html in enumerate(pages)
+    ]
+
+
+def test_relevance_gate_trains_and_round_trips(tmp_path):
+    gate = train(_samples(), epochs=30, threshold=0.5)
+    assert evaluate(gate, _samples()) == {
+        "pages": 6,
+        "skip_rate": 0.5,
+        "relevant_recall": 1.0,
+    }
+    path = str(tmp_path / "gate.json")
+    gate.save(path)
+    loaded = RelevanceGate.load(path, threshold=0.5)
+    assert loaded.allows(analyze(RELEVANT_PAGES[0], "https://site0.com/page"))
+    assert not loaded.allows(analyze(IRRELEVANT_PAGES[0], "https://site0.com/page"))
+    assert loaded.stats()["skipped"] == 1
+    # Without a model everything goes through
+    assert RelevanceGate.load(str(tmp_path / "missing.json")).allows(
+        analyze(IRRELEVANT_PAGES[0], "https://a.com/")
+    )
+
+
+def test_transform_batch_skips_ner_for_gated_pages(open_relevance_gate, tmp_path):
+    load_queue.queue.clear()
+    gate = train(_samples(), epochs=30, threshold=0.5)
+    gate.samples_path = str(tmp_path / "samples.jsonl")
+    open_relevance_gate.return_value = gate
+    pages = [
+        PageRecord.pack(url, 40, analyze(html, url))
+        for url, html in [
+            ("https://a.com/review", RELEVANT_PAGES[1]),
+            ("https://b.com/organ", IRRELEVANT_PAGES[0]),
+        ]
+    ]
+
+    with patch("pipeline.transform.get_db_connection"), patch(
+        "pipeline.transform.refresh_restaurant_indexes"
+    ), patch("pipeline.transform.find_known_restaurants", return_value=[]), patch(
+        "pipeline.transform.identify_restaurants_batch", return_value=[["Yelp"]]
+    ) as mock_batch, patch(
+        "pipeline.transform.resolve_restaurants", return_value={"Yelp": (False, None)}
+    ):
+        assert transform_batch(pages) == 2
+
+    assert [a.url for a in mock_batch.call_args.args[0]] == ["https://a.com/review"]
+    first, second = load_queue.get(), load_queue.get()
+    assert first["rejected_restaurants"] == ["Yelp"]
+    assert second["target_url"] == "https://b.com/organ"
+    assert second["derived_url_pairs"] == []
+    with open(gate.samples_path) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_relevance_gate_stops_recording_when_samples_are_full(tmp_path):
+    path = tmp_path / "data" / "samples.jsonl"
+    gate = RelevanceGate(samples_path=str(path), samples_max_bytes=1)
+    analysis = analyze(RELEVANT_PAGES[0], "https://a.com/")
+    payload = {"identified_restaurants": [], "relevance_score": 0.9}
+    gate.record(analysis, payload)
+    gate.record(analysis, payload)
+    assert len(path.read_text().splitlines()) == 1
+    assert gate.samples_path is None
+
+
+JSON_LD_PAGE = b"""<html><head>
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [
+  {"@type": "BreadcrumbList", "name": "Guides"},
+  {"@type": "ItemList", "itemListElement": [
+    {"@type": "ListItem", "item": {"@type": ["Restaurant", "LocalBusiness"],
+     "name": "Fancy  Bistro", "address": {"@type": "PostalAddress", "name": "1 Main St"}}},
+    {"@type": "ListItem", "item": {"@type": "http://schema.org/Bakery", "name": "Tasting Menu"}}
+  ]}]}</script>
+<script type="application/ld+json">{"@type": "Review", "itemReviewed": {"name": "Fancy Bistro"},
+  "author": {"@type": "Person", "name": "A Critic"}}</script>
+<script type="application/ld+json">{not json</script>
+</head><body><p>Fancy Bistro and Tasting Menu, reviewed.</p></body></html>"""
+
+
+def test_structured_restaurants_reads_json_ld():
+    analysis = analyze(JSON_LD_PAGE, "https://a.com/guide")
+    assert len(analysis.json_ld) == 3
+    assert structured_restaurants(analysis) == ["Fancy Bistro", "Tasting Menu"]
+    assert structured_restaurants(analyze(b"<p>No data</p>", "https://b.com/")) == []
+
+
+def test_transform_batch_takes_structured_data_fast_path():
+    load_queue.queue.clear()
+    before = get_structured_data_stats()
+    pages = [
+        PageRecord.pack(url, 40, analyze(html, url))
+        for url, html in [
+            ("https://a.com/guide", JSON_LD_PAGE),
+            ("https://b.com/guide", JSON_LD_PAGE.replace(b"Tasting Menu", b"Unknown Diner")),
+            ("https://c.com/page", b"<p>Fancy Bistro</p>"),
+        ]
+    ]
+
+    with patch("pipeline.transform.get_db_connection"), patch(
+        "pipeline.transform.refresh_restaurant_indexes"
+    ), patch("pipeline.transform.find_known_restaurants", return_value=[]), patch(
+        "pipeline.transform.identify_restaurants_batch",
+        return_value=[["Yelp"], ["Fancy Bistro"]],
+    ) as mock_batch, patch(
+        "pipeline.transform.resolve_restaurants",
+        side_effect=lambda names, conn: {
+            name: (name != "Unknown Diner" and name != "Yelp", name) for name in names
+        },
+    ):
+        assert transform_batch(pages) == 3
+
+    # Only the page whose JSON-LD names an unknown restaurant, and the one without any, run NER
+    analyses = mock_batch.call_args.args[0]
+    assert [a.url for a in analyses] == ["https://b.com/guide", "https://c.com/page"]
+    first, second, third = load_queue.get(), load_queue.get(), load_queue.get()
+    assert sorted(first["identified_restaurants"]) == ["Fancy Bistro", "Tasting Menu"]
+    assert first["rejected_restaurants"] == []
+    assert second["identified_restaurants"] == ["Fancy Bistro"]
+    assert sorted(second["rejected_restaurants"]) == ["Unknown Diner", "Yelp"]
+    assert third["identified_restaurants"] == ["Fancy Bistro"]
+    after = get_structured_data_stats()
+    assert after["fast_path"] - before["fast_path"] == 1
+    assert after["pages"] - before["pages"] == 3
+
+
+def test_ner_cache_evicts_least_recently_used(tmp_path):
+    cache = NERCache(str(tmp_path / "cache.sqlite3"), max_bytes=200)
+    first, second, third = (text_key(t) for t in ("one  page", "two", "three"))
+    assert text_key("one page") == first
+    assert text_key("one page", model="sm") != first
+
+    cache.set(first, ["Fancy Bistro"], {"keyword_signal": 0.2})
+    cache.set(second, ["Tasting Menu"], {"keyword_signal": 0.0})
+    assert cache.get(first) == {
+        "mentions": ["Fancy Bistro"],
+        "features": {"keyword_signal": 0.2},
+    }
+    cache.set(third, [], {"keyword_signal": 0.0})
+
+    # `second` was used least recently, so it made room
+    assert cache.get(second) is None
+    assert cache.get(third)["mentions"] == []
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert stats["bytes"] <= 200
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    cache.close()
+
+    # Results and their sizes survive a restart
+    reopened = NERCache(str(tmp_path / "cache.sqlite3"), max_bytes=200)
+    assert reopened.stats()["bytes"] == stats["bytes"]
+    assert reopened.get(first)["mentions"] == ["Fancy Bistro"]
+    reopened.close()
+
+
+def test_ner_cache_creates_its_directory_and_stats_need_no_cache(tmp_path):
+    path = tmp_path / "data" / "ner_cache.sqlite3"
+    NERCache(str(path)).close()
+    assert path.exists()
+
+    # Logging stats must not open (and create) the shared cache
+    with patch("pipeline.transform.ner_cache._cache", None), patch(
+        "pipeline.transform.ner_cache.NERCache"
+    ) as opened:
+        assert get_ner_cache_stats() == {}
+    opened.assert_not_called()
+
+
+def test_transform_batch_reuses_cached_ner_results(ner_cache):
+    load_queue.queue.clear()
+    html = b"<p>Fancy Bistro is a restaurant with a tasting menu.</p>"
+    pages = [
+        PageRecord.pack(url, 40, analyze(html, url))
+        for url in ("https://a.com/story", "https://syndicated.com/story")
+    ]
+
+    with patch("pipeline.transform.get_db_connection"), patch(
+        "pipeline.transform.refresh_restaurant_indexes"
+    ), patch("pipeline.transform.find_known_restaurants", return_value=[]), patch(
+        "pipeline.transform.identify_restaurants_batch", return_value=[["Fancy Bistro"]]
+    ) as mock_batch, patch(
+        "pipeline.transform.resolve_restaurants",
+        side_effect=lambda names, conn: {name: (True, name) for name in names},
+    ):
+        assert transform_batch(pages[:1]) == 1
+        assert transform_batch(pages[1:]) == 1
+
+    ner_pages = [call.args[0] for call in mock_batch.call_args_list]
+    assert [[a.url for a in batch] for batch in ner_pages] == [["https://a.com/story"], []]
+    first, second = load_queue.get(), load_queue.get()
+    assert first["identified_restaurants"] == second["identified_restaurants"]
+    assert first["relevance_score"] == second["relevance_score"]
+    assert second["derived_url_pairs"][0] == ("https://syndicated.com/", 40)
+    assert ner_cache.stats()["hits"] == 1
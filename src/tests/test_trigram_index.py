@@ -0,0 +1,115 @@
+import os
+import re
+import random
+import pytest
+from unittest.mock import MagicMock
+from database.db_connector import get_db_connection
+from database.db_operations import fuzzy_search_restaurant_name
+from pipeline.transform.trigram_index import (
+    TrigramIndex,
+    trigrams,
+    similarity,
+    FUZZY_MATCH_THRESHOLD,
+)
+
+SEED_SQL = os.path.join(
+    os.path.dirname(__file__), "..", "database", "scripts", "insert_michelin_restaurants.sql"
+)
+
+
+def michelin_names():
+    with open(SEED_SQL, encoding="utf-8") as f:
+        sql = f.read()
+    return [m.replace("''", "'") for m in re.findall(r"\(\s*'((?:[^']|'')*)',\s*'", sql)]
+
+
+def perturb(name, rng):
+    chars = list(name)
+    for _ in range(rng.randint(0, 2)):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+    return "".join(chars)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    names = michelin_names()
+    index = TrigramIndex()
+    for i, name in enumerate(names, 1):
+        index.add(i, name)
+    rng = random.Random(42)
+    queries = [perturb(n, rng) for n in rng.sample(names, 200)]
+    queries += ["Michelin", "Yelp", "Eater", "The", "Los Angeles Times"]
+    return names, index, queries
+
+
+@pytest.fixture
+def db_connection():
+    conn = get_db_connection()
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+# Expected values are pg_trgm's own output (show_trgm / similarity)
+def test_trigrams_match_show_trgm():
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("Cat!") == {"  c", " ca", "cat", "at "}
+    assert trigrams("a") == {"  a", " a "}
+    assert trigrams("   ") == set()
+
+
+def test_similarity_matches_pg_trgm():
+    assert similarity("word", "two words") == pytest.approx(0.36363637, abs=1e-8)
+    assert similarity("Pijja Palace", "PIJJA palace!") == 1.0
+    assert similarity("", "anything") == 0.0
+
+
+def test_best_match_agrees_with_brute_force(corpus):
+    names, index, queries = corpus
+    for q in queries:
+        best = index.best_match(q)
+        expected = max(similarity(q, n) for n in names)
+        if expected == 0:
+            assert best is None
+        else:
+            assert best["confidence"] == pytest.approx(expected, abs=1e-6)
+            assert similarity(q, best["name"]) == pytest.approx(expected, abs=1e-6)
+
+
+def test_is_restaurant_contract(corpus):
+    names, index, _ = corpus
+    assert index.is_restaurant("Pijja Palace") == (True, "Pijja Palace")
+    assert index.is_restaurant("Pijja Palace!") == (True, "Pijja Palace")
+    exists, matched = index.is_restaurant("Michelin Guide")
+    assert exists is False
+    assert index.best_match("Michelin Guide")["confidence"] <= FUZZY_MATCH_THRESHOLD
+
+
+def test_refresh_is_incremental():
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.side_effect = [[(1, "Olivia", "205 S. Vermont Ave.")], [(2, "hibi", None)]]
+    index = TrigramIndex()
+    assert not index.loaded
+    index.refresh(conn)
+    index.refresh(conn)
+    assert index.loaded and len(index) == 2
+    assert index.best_match("olivia")["address"] == "205 S. Vermont Ave."
+
+
+# ---------------- REAL DB ----------------
+def test_trigram_index_matches_sql_db(db_connection, corpus):
+    _, _, queries = corpus
+    index = TrigramIndex()
+    index.refresh(db_connection)
+    for q in queries:
+        sql = fuzzy_search_restaurant_name(q, db_connection, threshold=0.3)
+        local = index.best_match(q)
+        if sql is None:
+            assert local is None or local["confidence"] < 0.3
+            continue
+        assert local["confidence"] == pytest.approx(sql["confidence"], abs=1e-6)
+        assert (local["confidence"] > FUZZY_MATCH_THRESHOLD) == (
+            sql["confidence"] > FUZZY_MATCH_THRESHOLD
+        )
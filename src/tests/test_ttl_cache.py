@@ -0,0 +1,54 @@
+from utils.ttl_cache import TTLCache, MISSING
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(10, ttl=60, clock=clock)
+    cache.set("a", (False, None))
+    cache.set("b", 2, ttl=5)
+
+    clock.now = 10
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") is MISSING
+
+    clock.now = 61
+    assert cache.get("a", "default") == "default"
+    stats = cache.stats()
+    assert stats["expirations"] == 2
+    assert stats["size"] == 0
+
+
+def test_ttl_cache_stats():
+    cache = TTLCache(10)
+    cache.set("a", None)
+    assert cache.get("a") is None
+    assert cache.get("b") is MISSING
+    cache.clear()
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["invalidations"] == 1
+    assert len(cache) == 0
@@ -11,6 +11,13 @@ from pipeline.validate import (
 )
 
 
+@pytest.fixture(autouse=True)
+def allow_all_robots():
+    """Keeps robots.txt lookups off the network."""
+    with patch("pipeline.validate.is_allowed", return_value=True):
+        yield
+
+
 @pytest.fixture(scope="function")
 def setup_test_database():
     conn = get_db_connection()
@@ -163,3 +170,15 @@ def test_validate_url_error_handling(
         validate_url(("https://error.com", 0.6))
 
     mock_insert_queue.assert_not_called()
+
+
+def test_validate_url_drops_disallowed_url():
+    with patch("pipeline.validate.get_db_connection"), patch(
+        "pipeline.validate.is_allowed", return_value=False
+    ), patch("pipeline.validate.check_domain_exists") as mock_domain, patch(
+        "pipeline.validate.insert_into_url_priority_queue"
+    ) as mock_insert_queue:
+        validate_url(("https://blocked.com/private?x=1", 0.9))
+
+    mock_domain.assert_not_called()
+    mock_insert_queue.assert_not_called()
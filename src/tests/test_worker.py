@@ -0,0 +1,55 @@
+import queue
+import threading
+from queue_manager.worker import worker, batch_worker
+
+
+def test_worker_processes_until_shutdown():
+    q = queue.Queue()
+    seen = []
+    for item in [1, 2, None]:
+        q.put(item)
+    worker(q, seen.append, "TEST_WORKER")
+    assert seen == [1, 2]
+    assert q.unfinished_tasks == 0
+
+
+def test_batch_worker_respects_batch_size():
+    q = queue.Queue()
+    batches = []
+    for item in range(5):
+        q.put(item)
+    q.put(None)
+    batch_worker(q, batches.append, batch_size=2, max_latency_ms=50)
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert q.unfinished_tasks == 0
+
+
+def test_batch_worker_flushes_partial_batch_after_latency():
+    q = queue.Queue()
+    batches = []
+    t = threading.Thread(
+        target=batch_worker, args=(q, batches.append, 10, 20), daemon=True
+    )
+    t.start()
+    q.put("a")
+    q.join()
+    assert batches == [["a"]]
+    q.put(None)
+    t.join(timeout=1)
+    assert not t.is_alive()
+
+
+def test_batch_worker_survives_failing_batch():
+    q = queue.Queue()
+    calls = []
+
+    def flaky(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    for item in ["a", "b", None]:
+        q.put(item)
+    batch_worker(q, flaky, batch_size=1, max_latency_ms=10)
+    assert calls == [["a"], ["b"]]
+    assert q.unfinished_tasks == 0
@@ -0,0 +1,245 @@
+# ./src/utils/http_client.py
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+import httpx
+
+PHASE = "HTTP"
+
+# HTTP/2 needs the h2 package and brotli decoding the brotli package (httpx[http2,brotli]);
+# httpx advertises "br" in Accept-Encoding only when brotli is installed.
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 200))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 100))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+# The async fetch path keeps one small pool per host: httpcore scans every
+# connection in a pool per request, so one big shared pool gets slower as it grows.
+HTTP_PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", 8))
+HTTP_MAX_HOST_CLIENTS = int(os.getenv("HTTP_MAX_HOST_CLIENTS", 1000))
+
+
+class ConnectionStats:
+    """
+    Counts requests and the TCP connections opened for them, via httpcore's
+    trace extension, so connection reuse can be read off the logs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "connections_opened": 0, "http2_responses": 0}
+
+    def _record(self, event_name):
+        if event_name == "connection.connect_tcp.started":
+            with self._lock:
+                self._stats["connections_opened"] += 1
+
+    def trace(self, event_name, info):
+        self._record(event_name)
+
+    async def atrace(self, event_name, info):
+        self._record(event_name)
+
+    def on_request(self, request):
+        request.extensions["trace"] = self.trace
+        with self._lock:
+            self._stats["requests"] += 1
+
+    async def aon_request(self, request):
+        request.extensions["trace"] = self.atrace
+        with self._lock:
+            self._stats["requests"] += 1
+
+    def on_response(self, response):
+        if response.http_version == "HTTP/2":
+            with self._lock:
+                self._stats["http2_responses"] += 1
+
+    async def aon_response(self, response):
+        self.on_response(response)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["reuse_ratio"] = (
+            1 - s["connections_opened"] / s["requests"] if s["requests"] else 0.0
+        )
+        return s
+
+
+def client_options(http2=HTTP2_ENABLED, **overrides):
+    """Keyword arguments shared by the sync and async clients."""
+    options = {
+        "http2": http2,
+        "timeout": HTTP_TIMEOUT,
+        "follow_redirects": True,
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+    options.update(overrides)
+    return options
+
+
+def create_client(stats=None, **overrides):
+    """A pooled keep-alive httpx.Client; pass `stats` to count connection reuse."""
+    hooks = {}
+    if stats is not None:
+        hooks = {"request": [stats.on_request], "response": [stats.on_response]}
+    return httpx.Client(event_hooks=hooks, **client_options(**overrides))
+
+
+def create_async_client(stats=None, **overrides):
+    hooks = {}
+    if stats is not None:
+        hooks = {"request": [stats.aon_request], "response": [stats.aon_response]}
+    return httpx.AsyncClient(event_hooks=hooks, **client_options(**overrides))
+
+
+class AsyncClientLoop:
+    """
+    An event loop on a background thread that owns long-lived AsyncClients, one
+    per host. Synchronous callers hand it coroutines with run(), so every extract
+    worker shares the same keep-alive (or HTTP/2) connections and they outlive a
+    batch. The least recently used idle host clients are closed beyond `max_hosts`.
+    """
+
+    def __init__(
+        self,
+        stats=None,
+        per_host_connections=HTTP_PER_HOST_CONNECTIONS,
+        max_hosts=HTTP_MAX_HOST_CLIENTS,
+        **overrides,
+    ):
+        self.stats = stats
+        self.per_host_connections = per_host_connections
+        self.max_hosts = max_hosts
+        self._overrides = overrides
+        self._clients = OrderedDict()  # host -> AsyncClient, least recently used first
+        self._in_use = {}  # host -> requests in flight
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="http-client-loop", daemon=True
+        )
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def run(self, coro):
+        """Runs `coro` on the client loop and blocks until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _client_for(self, host):
+        client = self._clients.get(host)
+        if client is None:
+            options = {
+                "limits": httpx.Limits(
+                    max_connections=self.per_host_connections,
+                    max_keepalive_connections=self.per_host_connections,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+                **self._overrides,
+            }
+            client = create_async_client(self.stats, **options)
+            self._clients[host] = client
+            self._evict()
+        self._clients.move_to_end(host)
+        return client
+
+    def _evict(self):
+        for host in list(self._clients):
+            if len(self._clients) <= self.max_hosts:
+                break
+            if not self._in_use.get(host):
+                self._loop.create_task(self._clients.pop(host).aclose())
+
+    def _acquire(self, url):
+        host = urlparse(url).netloc
+        client = self._client_for(host)
+        self._in_use[host] = self._in_use.get(host, 0) + 1
+        return host, client
+
+    def _release(self, host):
+        self._in_use[host] -= 1
+        if not self._in_use[host]:
+            del self._in_use[host]
+
+    async def get(self, url, **kwargs):
+        """GET `url` on its host's client. Must be awaited on this loop (inside run())."""
+        host, client = self._acquire(url)
+        try:
+            return await client.get(url, **kwargs)
+        finally:
+            self._release(host)
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """Like httpx.AsyncClient.stream, on `url`'s host client. Use inside run()."""
+        host, client = self._acquire(url)
+        try:
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
+        finally:
+            self._release(host)
+
+    async def _close_all(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def close(self):
+        self.run(self._close_all())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_stats = ConnectionStats()
+_client = None
+_async_loop = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Returns the process-wide pooled client used by the search stage and robots.txt fetches."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client(_stats)
+    return _client
+
+
+def get_async_client_loop():
+    """Returns the process-wide async clients, shared by every extract worker."""
+    global _async_loop
+    if _async_loop is None:
+        with _client_lock:
+            if _async_loop is None:
+                _async_loop = AsyncClientLoop(_stats)
+    return _async_loop
+
+
+def get_http_stats():
+    return _stats.stats()
+
+
+def close_http_clients():
+    """Closes the shared clients and their pooled connections, e.g. at shutdown."""
+    global _client, _async_loop
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        if _async_loop is not None:
+            _async_loop.close()
+            _async_loop = None
+    logging.info(f"[{PHASE}]: Closed HTTP clients. {get_http_stats()}")
@@ -0,0 +1,220 @@
+# ./src/utils/page_analysis.py
+import re
+from collections import namedtuple
+from urllib.parse import urljoin
+import lxml.html
+from lxml import etree
+
+# Elements whose content is never shown; <title> and <meta> are read on the way through <head>
+SKIP_TAGS = frozenset(
+    {"head", "title", "script", "style", "noscript", "template", "svg", "iframe", "object"}
+)
+# Ancestors recorded for each link, so link scoring can tell navigation from content
+SECTION_TAGS = frozenset(
+    {"main", "nav", "header", "footer", "aside", "article", "section", "h1", "h2", "h3", "div"}
+)
+HEADER_TAGS = frozenset({"h1", "h2", "h3"})
+
+# Main-content extraction: text is grouped into blocks, and a block whose words
+# are mostly link text (menus, tag clouds, "related" lists) is boilerplate, as is
+# everything inside the containers below or an element whose class/id names one
+BLOCK_TAGS = frozenset(
+    {
+        "body", "div", "p", "li", "td", "th", "dd", "dt", "blockquote", "pre",
+        "section", "article", "main", "figcaption", "h1", "h2", "h3", "h4", "h5", "h6",
+    }
+)
+BOILERPLATE_TAGS = frozenset({"nav", "footer", "aside", "form", "button", "select"})
+BOILERPLATE_NAMES = re.compile(
+    r"(?:^|[\s_-])(?:cookies?|consent|gdpr|banner|nav|navbar|navigation|footer|"
+    r"sidebar|share|sharing|social|subscribe|newsletter|breadcrumbs?|popup|modal|"
+    r"ad|ads|advert|advertisement|promo|related)(?:$|[\s_-])",
+    re.IGNORECASE,
+)
+# The content region: <main>, <article>, or an element named like one. Link-heavy
+# blocks outside it are menus; inside, they are often the content itself, e.g. a
+# list of linked restaurant names
+CONTENT_TAGS = frozenset({"main", "article"})
+CONTENT_NAMES = re.compile(
+    r"(?:^|[\s_-])(?:content|entry|post|article|story|main)(?:$|[\s_-])", re.IGNORECASE
+)
+# Classes on <html>/<body> ("content-sidebar") describe the page layout, not a region
+LAYOUT_TAGS = frozenset({"html", "body"})
+MAX_LINK_DENSITY = 0.5
+
+# `url` is absolute (resolved against <base href> or the page URL); `sections`
+# lists the section tags enclosing the link, outermost first, without repeats
+Anchor = namedtuple("Anchor", ["url", "text", "sections"])
+# `main_text` is `text` with boilerplate blocks removed; `json_ld` holds the raw
+# contents of the page's <script type="application/ld+json"> blocks
+PageAnalysis = namedtuple(
+    "PageAnalysis",
+    ["url", "title", "text", "main_text", "headers", "anchors", "meta", "json_ld"],
+)
+
+
+def _parse(content, encoding):
+    try:
+        parser = lxml.html.HTMLParser(
+            encoding=encoding, remove_comments=True, remove_pis=True
+        )
+        return etree.fromstring(content, parser)
+    except LookupError:
+        # libxml2 doesn't know every Python codec name; decode here instead
+        text = content.decode(encoding, errors="replace")
+        return lxml.html.document_fromstring(text)
+
+
+def _resolve(base, href):
+    try:
+        return urljoin(base, href.strip())
+    except ValueError:
+        return None
+
+
+def _names(el):
+    return f"{el.get('class', '')} {el.get('id', '')}".strip()
+
+
+def _is_content(el, tag):
+    if tag in CONTENT_TAGS:
+        return True
+    return tag not in LAYOUT_TAGS and bool(CONTENT_NAMES.search(_names(el)))
+
+
+def _is_boilerplate(el, tag, in_content):
+    if tag in BOILERPLATE_TAGS:
+        return True
+    # A page-wide <header> is navigation; one inside the content holds its title
+    if tag == "header" and not in_content:
+        return True
+    return tag not in LAYOUT_TAGS and bool(BOILERPLATE_NAMES.search(_names(el)))
+
+
+def analyze(content, url, encoding=None):
+    """
+    Parses an HTML body once with lxml and, in a single walk of the tree, returns
+    a PageAnalysis holding:
+        text:      the visible text, whitespace collapsed and pieces joined by spaces
+        main_text: the visible text minus boilerplate (navigation, footers,
+                   banners, link-heavy blocks)
+        headers:   (tag, text) for every h1-h3
+        anchors:   an Anchor for every <a href>
+        meta:      <meta> name/property/http-equiv -> content (first one wins)
+        json_ld:   the raw JSON of every application/ld+json script
+    """
+    try:
+        root = _parse(content, encoding)
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+        root = None
+    if root is None:
+        return PageAnalysis(url, "", "", "", [], [], {}, [])
+
+    base = url
+    title = ""
+    text, headers, anchors, meta, json_ld = [], [], [], {}, []
+    sections = []  # section tags enclosing the current element
+    open_spans = []  # (element, text parts, finish) for open headers and links
+    blocks = []  # [text parts, link words, words, in content] per block, in document order
+    open_blocks = []  # (element, block) for the enclosing blocks
+    boilerplate = []  # enclosing boilerplate elements
+    content = []  # enclosing content-region elements
+    in_links = 0
+    skip = 0
+
+    def add(raw):
+        piece = " ".join(raw.split())
+        if not piece:
+            return
+        text.append(piece)
+        for _, parts, _ in open_spans:
+            parts.append(piece)
+        if open_blocks and not boilerplate:
+            block = open_blocks[-1][1]
+            block[0].append(piece)
+            words = piece.count(" ") + 1
+            block[2] += words
+            if in_links:
+                block[1] += words
+
+    for event, el in etree.iterwalk(root, events=("start", "end")):
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+        if event == "start":
+            if tag == "meta":
+                key = el.get("name") or el.get("property") or el.get("http-equiv")
+                if key and el.get("content") is not None:
+                    meta.setdefault(key.lower(), el.get("content"))
+            elif tag == "base" and el.get("href"):
+                base = _resolve(url, el.get("href")) or url
+            elif tag == "title" and not title:
+                title = " ".join(" ".join(el.itertext()).split())
+            elif tag == "script" and el.text:
+                if (el.get("type") or "").strip().lower() == "application/ld+json":
+                    json_ld.append(el.text)
+            if tag in SKIP_TAGS:
+                skip += 1
+                continue
+            if skip:
+                continue
+            if _is_boilerplate(el, tag, bool(content)):
+                boilerplate.append(el)
+            elif _is_content(el, tag):
+                content.append(el)
+            if tag in BLOCK_TAGS:
+                block = [[], 0, 0, bool(content)]
+                blocks.append(block)
+                open_blocks.append((el, block))
+            if tag in SECTION_TAGS:
+                sections.append(tag)
+            if tag in HEADER_TAGS:
+                open_spans.append(
+                    (el, [], lambda parts, tag=tag: headers.append((tag, " ".join(parts))))
+                )
+            elif tag == "a" and el.get("href") is not None:
+                in_links += 1
+                href = _resolve(base, el.get("href"))
+                context = tuple(dict.fromkeys(sections))
+                if href:
+                    open_spans.append(
+                        (
+                            el,
+                            [],
+                            lambda parts, href=href, context=context: anchors.append(
+                                Anchor(href, " ".join(parts), context)
+                            ),
+                        )
+                    )
+            if el.text:
+                add(el.text)
+        else:
+            if tag in SKIP_TAGS:
+                skip -= 1
+            elif skip:
+                continue
+            else:
+                if tag in SECTION_TAGS:
+                    sections.pop()
+                if open_spans and open_spans[-1][0] is el:
+                    _, parts, finish = open_spans.pop()
+                    finish(parts)
+                if tag == "a" and el.get("href") is not None:
+                    in_links -= 1
+                if open_blocks and open_blocks[-1][0] is el:
+                    open_blocks.pop()
+                if boilerplate and boilerplate[-1] is el:
+                    boilerplate.pop()
+                elif content and content[-1] is el:
+                    content.pop()
+            if not skip and el.tail and el is not root:
+                add(el.tail)
+
+    main_text = " ".join(
+        " ".join(parts)
+        for parts, link_words, words, in_content in blocks
+        if words and (in_content or link_words / words <= MAX_LINK_DENSITY)
+    )
+    return PageAnalysis(
+        url, title, " ".join(text), main_text, headers, anchors, meta, json_ld
+    )
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get on a miss, so cached None/False values stay distinguishable
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with an optional per-entry time-to-live.
+    Tracks hits, misses, evictions and expirations so it can be sized from logs.
+    """
+
+    def __init__(self, maxsize, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        """Drops every entry, e.g. when the data behind the cache changed."""
+        with self._lock:
+            self._data.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = len(self._data)
+            s["maxsize"] = self.maxsize
+            lookups = s["hits"] + s["misses"]
+            s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+            return s